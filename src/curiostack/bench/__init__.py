@@ -0,0 +1,9 @@
+from .fakes import FakeEmbeddings, FakeContentFilter, FakeLinkExtraction, fake_llm
+from .server import BenchServer
+from .runner import (
+    BASELINE_PATH,
+    run_benchmark,
+    compare,
+    load_report,
+    save_report,
+)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import List
+
+from crawl4ai.extraction_strategy import ExtractionStrategy
+from crawl4ai.content_filter_strategy import RelevantContentFilter
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+# Same size as models/embedding-001, so the collections look like production
+VECTOR_SIZE = 768
+
+ARTICLE_LINK = re.compile(r"\[([^\]]{8,})\]\((https?://[^)\s]+/article/[^)\s]+)\)")
+ARTICLE_BODY = re.compile(r"<article[^>]*>(.*?)</article>", re.DOTALL)
+TITLE_TAG = re.compile(r"<title>(.*?)</title>", re.DOTALL)
+
+FAKE_POST = {
+    "title": "Benchmark post",
+    "content": "## Overview\nGenerated offline.\n\n## Key Takeaways\n- one\n- two",
+    "excerpt": "A post written by the fake LLM.",
+    "url": None,
+    "author": None,
+    "date": None,
+    "category": "AI",
+    "tags": ["benchmark"],
+    "image": None,
+    "featured": False,
+}
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hash-based embeddings with a fixed latency per request."""
+
+    def __init__(self, latency: float = 0.05, size: int = VECTOR_SIZE):
+        self.latency = latency
+        self.size = size
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        vector = [rng.gauss(0, 1) for _ in range(self.size)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str], **kwargs) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str, **kwargs) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def fake_llm(latency: float = 0.5) -> FakeListChatModel:
+    """Chat model that answers every prompt with a valid writer post."""
+    return FakeListChatModel(responses=[json.dumps(FAKE_POST)], sleep=latency)
+
+
+class FakeLinkExtraction(ExtractionStrategy):
+    """Stand-in for the LLMExtractionStrategy used on source listing pages.
+
+    Picks the article links out of the page markdown after a fixed delay.
+    """
+
+    def __init__(self, latency: float = 0.5, **kwargs):
+        super().__init__(input_format="markdown", **kwargs)
+        self.latency = latency
+
+    def extract(self, url: str, html: str, *q, **kwargs) -> List[dict]:
+        time.sleep(self.latency)
+        return [
+            {"title": title.strip(), "url": link, "source": url}
+            for title, link in ARTICLE_LINK.findall(html)
+        ]
+
+    def run(self, url: str, sections: List[str], *q, **kwargs) -> List[dict]:
+        return self.extract(url, "\n".join(sections))
+
+
+class FakeContentFilter(RelevantContentFilter):
+    """Stand-in for the Gemini LLMContentFilter.
+
+    Returns the ``<article>`` body plus the metadata block the real filter
+    produces, after a fixed delay.
+    """
+
+    def __init__(self, latency: float = 1.0):
+        super().__init__()
+        self.latency = latency
+
+    def filter_content(self, html: str, min_word_threshold: int = None) -> List[str]:
+        time.sleep(self.latency)
+        title = TITLE_TAG.search(html)
+        body = ARTICLE_BODY.search(html)
+        metadata = {
+            "title": title.group(1).strip() if title else None,
+            "author": None,
+            "published_date": None,
+            "source_url": None,
+            "tags": ["benchmark"],
+        }
+        block = f"<pre>```json\n{json.dumps(metadata)}\n```</pre>"
+        return [block, body.group(1) if body else html]
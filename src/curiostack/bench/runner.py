@@ -0,0 +1,285 @@
+import importlib
+import json
+import math
+import os
+import shutil
+import sqlite3
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from crawl4ai import CacheMode, CrawlerRunConfig
+from qdrant_client import QdrantClient
+
+from .fakes import FakeContentFilter, FakeEmbeddings, FakeLinkExtraction, fake_llm
+from .server import BenchServer
+from .. import metrics
+from ..config import get_db_path
+from ..logger import get_logger
+from ..scraping import Crawler, ContentExtractor
+from ..preprocessing import ContentWriter, pre_pro, update_img_url
+from ..utils import run_with_browser
+
+logger = get_logger(__name__)
+
+# Niche used for benchmark runs; its database and output folder are wiped
+NICHE = "bench"
+
+# Where a stored baseline lives unless another path is given
+BASELINE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "benchmarks", "baseline.json"
+)
+
+# For these the smaller number is better; for throughput the bigger one is
+LOWER_IS_BETTER = ("seconds", "peak_mb", "p50", "p99")
+
+
+def _output_dir(niche: str) -> str:
+    _, script_dir = get_db_path(niche, script_dir=True)
+    return os.path.join(script_dir, "..", "..", "data", "raw", niche)
+
+
+def _reset_niche(niche: str):
+    db_path = get_db_path(niche)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    shutil.rmtree(_output_dir(niche), ignore_errors=True)
+
+
+@contextmanager
+def offline(server: BenchServer, sources: List[str], latency: dict):
+    """Swap Gemini, Qdrant Cloud, Unsplash and the source list for local fakes.
+
+    Module attributes are patched where they were imported by name, and
+    restored on exit.
+    """
+    embeddings = FakeEmbeddings(latency=latency["embed"])
+    llm = fake_llm(latency=latency["llm"])
+    content_filter = FakeContentFilter(latency=latency["filter"])
+    client = QdrantClient(":memory:")
+
+    def run_config():
+        return CrawlerRunConfig(
+            extraction_strategy=FakeLinkExtraction(latency=latency["extraction"]),
+            word_count_threshold=10,
+            cache_mode=CacheMode.BYPASS,
+        )
+
+    patches = {
+        "curiostack.config": {
+            "embeddings": embeddings,
+            "llm": llm,
+            "client": client,
+            "filter": content_filter,
+        },
+        "curiostack.scraping.crawler": {
+            "run_config": run_config,
+            "niches_urls": lambda niche: sources,
+        },
+        "curiostack.scraping.content_extractor": {"filter": content_filter},
+        "curiostack.scraping.content_refresher": {"filter": content_filter},
+        "curiostack.utils.vector.vector_helper": {
+            "embeddings": embeddings,
+            "client": client,
+        },
+        "curiostack.preprocessing.content_writer": {"llm": llm},
+        "curiostack.preprocessing.content_processor": {
+            "llm": llm,
+            "SEARCH_URL": f"{server.base_url}/unsplash",
+        },
+    }
+
+    saved = []
+    try:
+        for module_name, attrs in patches.items():
+            module = importlib.import_module(module_name)
+            for attr, value in attrs.items():
+                saved.append((module, attr, getattr(module, attr)))
+                setattr(module, attr, value)
+        yield
+    finally:
+        for module, attr, value in reversed(saved):
+            setattr(module, attr, value)
+        client.close()
+
+
+def _measure(func, count_items) -> dict:
+    """Run one stage and collect wall time, latencies and peak memory."""
+    metrics.registry.reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        func()
+    finally:
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    items = count_items()
+    latencies = {}
+    for row in metrics.registry.snapshot():
+        if row["type"] != "histogram":
+            continue
+        labels = ",".join(f"{k}={v}" for k, v in row["labels"].items())
+        key = f"{row['name']}[{labels}]" if labels else row["name"]
+        latencies[key] = {"count": row["count"], "p50": row["p50"], "p99": row["p99"]}
+
+    return {
+        "items": items,
+        "seconds": round(seconds, 3),
+        "throughput": round(items / seconds, 3) if seconds else 0.0,
+        "peak_mb": round(peak / 1_000_000, 2),
+        "latency": latencies,
+    }
+
+
+def run_scale(scale: int, server: BenchServer, latency: dict) -> Dict[str, dict]:
+    """Run crawl -> extract -> write -> post-processing for ``scale`` articles."""
+    _reset_niche(NICHE)
+    sources = server.source_urls(math.ceil(scale / server.links_per_source))
+    db_path = get_db_path(NICHE)
+    output_dir = _output_dir(NICHE)
+
+    def count_rows(query):
+        def count():
+            if not os.path.exists(db_path):
+                return 0
+            with sqlite3.connect(db_path) as conn:
+                return conn.execute(query).fetchone()[0]
+
+        return count
+
+    def count_files():
+        if not os.path.isdir(output_dir):
+            return 0
+        return sum(1 for name in os.listdir(output_dir) if name.endswith(".json"))
+
+    results = {}
+    with offline(server, sources, latency):
+        results["crawl"] = _measure(
+            lambda: run_with_browser(Crawler(NICHE).start()),
+            count_rows("SELECT COUNT(*) FROM urls"),
+        )
+        results["extract"] = _measure(
+            lambda: run_with_browser(ContentExtractor(NICHE, limit=scale).start()),
+            count_rows("SELECT COUNT(*) FROM urls WHERE processed = 1"),
+        )
+        results["write"] = _measure(
+            lambda: ContentWriter(NICHE, limit=scale, pause=0).start(),
+            count_files,
+        )
+        results["postprocess"] = _measure(
+            lambda: (pre_pro(niche=NICHE), update_img_url(niche=NICHE)),
+            count_files,
+        )
+
+    _reset_niche(NICHE)
+    return results
+
+
+def run_benchmark(
+    scales=(10,),
+    pages_dir: Optional[str] = None,
+    llm_latency: float = 0.5,
+    filter_latency: float = 1.0,
+    extraction_latency: float = 0.5,
+    embed_latency: float = 0.05,
+) -> dict:
+    """Run the offline benchmark at each scale.
+
+    Args:
+        scales (tuple): Number of articles per run.
+        pages_dir (str, optional): Folder of recorded article HTML files.
+        llm_latency (float): Seconds per fake writer/category LLM call.
+        filter_latency (float): Seconds per fake LLM content filter call.
+        extraction_latency (float): Seconds per fake listing-page extraction.
+        embed_latency (float): Seconds per fake embedding request.
+
+    Returns:
+        dict: Report with per-scale, per-stage results.
+    """
+    latency = {
+        "llm": llm_latency,
+        "filter": filter_latency,
+        "extraction": extraction_latency,
+        "embed": embed_latency,
+    }
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "settings": {"pages_dir": pages_dir, "latency": latency},
+        "scales": {},
+    }
+
+    server = BenchServer(pages_dir=pages_dir).start()
+    try:
+        for scale in scales:
+            logger.info(f"Benchmark run at scale={scale}")
+            report["scales"][str(scale)] = run_scale(scale, server, latency)
+    finally:
+        server.stop()
+    return report
+
+
+def save_report(report: dict, path: str = BASELINE_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: str = BASELINE_PATH) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.10) -> List[dict]:
+    """Compare a report with a baseline, stage by stage.
+
+    Args:
+        report (dict): Fresh benchmark report.
+        baseline (dict): Stored report to compare against.
+        tolerance (float): Relative change allowed before flagging a regression.
+
+    Returns:
+        list: One row per compared value with the relative change and a
+        ``regression`` flag.
+    """
+    rows = []
+    for scale, stages in report["scales"].items():
+        base_stages = baseline.get("scales", {}).get(scale)
+        if not base_stages:
+            continue
+        for stage, result in stages.items():
+            base = base_stages.get(stage)
+            if not base:
+                continue
+            values = {k: result[k] for k in ("seconds", "throughput", "peak_mb")}
+            base_values = {k: base.get(k) for k in values}
+            for name, lat in result["latency"].items():
+                base_lat = base.get("latency", {}).get(name, {})
+                for q in ("p50", "p99"):
+                    values[f"{name}.{q}"] = lat[q]
+                    base_values[f"{name}.{q}"] = base_lat.get(q)
+
+            for key, current in values.items():
+                previous = base_values.get(key)
+                if not previous:
+                    continue
+                change = (current - previous) / previous
+                worse = key.endswith(LOWER_IS_BETTER) and change > tolerance
+                worse = worse or (key == "throughput" and change < -tolerance)
+                rows.append(
+                    {
+                        "scale": scale,
+                        "stage": stage,
+                        "metric": key,
+                        "baseline": previous,
+                        "current": current,
+                        "change": round(change, 4),
+                        "regression": worse,
+                    }
+                )
+    return rows
@@ -0,0 +1,140 @@
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+WORDS = (
+    "model training data neural network gradient transformer attention layer "
+    "dataset inference latency vector embedding security threat cloud pipeline "
+    "benchmark feature accuracy python cluster kernel token prompt agent"
+).split()
+
+NAV = (
+    '<nav><a href="/">Home</a> <a href="/about">About</a> '
+    '<a href="/subscribe">Subscribe</a> <a href="/login">Log in</a></nav>'
+)
+FOOTER = "<footer>Cookie settings | Privacy | Terms | &copy; Bench Media</footer>"
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_article(article_id: int, paragraphs: int = 12) -> str:
+    """A server-rendered blog post with headings, code and a table."""
+    rng = random.Random(article_id)
+    title = f"Article {article_id}: " + " ".join(rng.choice(WORDS) for _ in range(5))
+    body = [f"<h1>{title}</h1>"]
+    for i in range(paragraphs):
+        if i % 4 == 0:
+            body.append(f"<h2>Section {i // 4 + 1}</h2>")
+        body.append(f"<p>{' '.join(_sentence(rng) for _ in range(5))}</p>")
+    body.append("<pre><code>def score(x):\n    return x * 2\n</code></pre>")
+    body.append(
+        "<table><tr><th>Metric</th><th>Value</th></tr>"
+        "<tr><td>accuracy</td><td>0.91</td></tr></table>"
+    )
+    return (
+        f"<html><head><title>{title}</title>"
+        f'<meta name="author" content="Bench Author {article_id % 7}">'
+        f"</head><body>{NAV}<article>{''.join(body)}</article>{FOOTER}</body></html>"
+    )
+
+
+class BenchServer:
+    """Local HTTP server standing in for source sites and the Unsplash API.
+
+    Routes:
+        /source/<i>     listing page linking ``links_per_source`` articles
+        /article/<j>    article page, from ``pages_dir`` if given (recorded
+                        HTML files, served round-robin) or generated
+        /unsplash       Unsplash search response with local image URLs
+    """
+
+    def __init__(self, pages_dir: Optional[str] = None, links_per_source: int = 10):
+        self.links_per_source = links_per_source
+        self.recorded: List[str] = []
+        if pages_dir:
+            for name in sorted(os.listdir(pages_dir)):
+                if name.endswith((".html", ".htm")):
+                    with open(os.path.join(pages_dir, name), encoding="utf-8") as f:
+                        self.recorded.append(f.read())
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def source_urls(self, count: int) -> List[str]:
+        return [f"{self.base_url}/source/{i}" for i in range(count)]
+
+    def article(self, article_id: int) -> str:
+        if self.recorded:
+            return self.recorded[article_id % len(self.recorded)]
+        return synthetic_article(article_id)
+
+    def listing(self, source_id: int) -> str:
+        rng = random.Random(source_id)
+        items = []
+        for n in range(self.links_per_source):
+            article_id = source_id * self.links_per_source + n
+            teaser = _sentence(rng, 24)
+            items.append(
+                f'<li><a href="{self.base_url}/article/{article_id}">'
+                f"Article {article_id} headline about {rng.choice(WORDS)}</a>"
+                f"<p>{teaser}</p><time>2025-01-{n % 28 + 1:02d}</time></li>"
+            )
+        return (
+            f"<html><head><title>Source {source_id}</title></head><body>{NAV}"
+            f"<h1>Latest posts</h1><ul>{''.join(items)}</ul>{FOOTER}</body></html>"
+        )
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body: str, content_type: str = "text/html"):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                path = self.path.split("?")[0].rstrip("/")
+                parts = path.split("/")
+                try:
+                    if path.startswith("/source/"):
+                        return self._send(server.listing(int(parts[2])))
+                    if path.startswith("/article/"):
+                        return self._send(server.article(int(parts[2])))
+                    if path == "/unsplash":
+                        results = [
+                            {"urls": {"regular": f"{server.base_url}/img/{i}.jpg"}}
+                            for i in range(10)
+                        ]
+                        return self._send(
+                            json.dumps({"results": results}), "application/json"
+                        )
+                except (IndexError, ValueError):
+                    pass
+                self.send_error(404)
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,19 +1,34 @@
 import cmd
-import asyncio
 import argparse
 import shlex
 import sys
-from typing import Optional, List
+import time
+from typing import Dict, List
 from datetime import datetime
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from rich.live import Live
 from rich.prompt import Confirm
 from pathlib import Path
-from .scraping import Crawler, ContentExtractor
-from .preprocessing import ContentWriter
+from .jobs import (
+    Job,
+    JobExecutor,
+    JobQueue,
+    RunLedger,
+    Worker,
+    STAGES,
+    build_stage,
+    run_pipeline,
+)
 from .logger import get_logger
-from .config import get_db_path
+from . import metrics
+from . import bench
+from .config import get_db_path, client, remote_client, QDRANT_MODE, QDRANT_PATH
+from .profiling import JobProfiler, format_profile, saved_profiles
+from .resilience import breakers
+from .search import run_server
+from .utils import SourceScheduler, compact_collection, sync_collections
 
 console = Console()
 
@@ -25,24 +40,12 @@ def format_status(status: str) -> str:
         "completed": "[blue]Completed[/blue]",
         "failed": "[red]Failed[/red]",
         "pending": "[yellow]Pending[/yellow]",
+        "cancelled": "[magenta]Cancelled[/magenta]",
+        "partial": "[yellow]Partial[/yellow]",
     }
     return status_colors.get(status.lower(), f"[white]{status}[/white]")
 
 
-class Job:
-    """Represents a background job in the system."""
-
-    def __init__(self, job_id: int, name: str, niche: str, job_type: str):
-        self.job_id = job_id
-        self.name = name
-        self.niche = niche
-        self.type = job_type
-        self.status = "pending"
-        self.start_time = datetime.now()
-        self.end_time: Optional[datetime] = None
-        self.error: Optional[str] = None
-
-
 def welcome_message():
     """Display a styled welcome message with system status."""
     date = datetime.now().strftime("%Y-%m-%d")
@@ -77,11 +80,16 @@ def welcome_message():
 class CShell(cmd.Cmd):
     """Enhanced command-line interface for CurioStack."""
 
-    def __init__(self):
+    def __init__(self, max_jobs: int = 2):
         super().__init__()
         self.jobs: List[Job] = []
         self.job_counter = 0
         self.logger = get_logger(__name__, debug=False)
+        self.executor = JobExecutor(max_jobs=max_jobs, on_finish=self._job_finished)
+        self.queue = JobQueue()
+        self.ledger = RunLedger()
+        # job_id -> name of its profile files; job ids restart every session
+        self.profiles: Dict[int, str] = {}
 
     @property
     def intro(self):
@@ -102,142 +110,565 @@ class CShell(cmd.Cmd):
         self.jobs.append(job)
         return job
 
-    def _update_job_status(self, job: Job, status: str, error: Optional[str] = None):
-        """Update job status and handle completion/failure."""
-        job.status = status
-        if status in ["completed", "failed"]:
-            job.end_time = datetime.now()
-        if error:
-            job.error = error
-            self.logger.error(f"Job {job.job_id} failed: {error}")
-
-    def do_crawl(self, args):
-        """
-        Start crawling process for a specific niche
-        Usage: crawl <niche> [--debug]
-        """
-        parser = argparse.ArgumentParser(description="Start crawling process")
-        parser.add_argument("niche", help="Niche to crawl")
-        parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    def _job_finished(self, job: Job):
+        """Report a finished background job (called from the loop thread)."""
+        if job.status == "completed":
+            console.print(
+                f"\n[green]{job.name} job {job.job_id} ({job.niche}) "
+                f"completed successfully[/green]"
+            )
+        elif job.status == "cancelled":
+            console.print(f"\n[magenta]{job.name} job {job.job_id} cancelled[/magenta]")
+        else:
+            console.print(
+                f"\n[red]{job.name} job {job.job_id} ({job.niche}) "
+                f"failed: {job.error}[/red]"
+            )
+        if job.job_id in self.profiles:
+            console.print(
+                f"Profile saved as [cyan]{self.profiles[job.job_id]}[/cyan] "
+                f"(show with [cyan]profile {job.job_id}[/cyan])"
+            )
 
+    def _parse(self, parser: argparse.ArgumentParser, args: str):
+        """Parse shell arguments, returning None on errors."""
         try:
-            parsed = parser.parse_args(shlex.split(args))
+            return parser.parse_args(shlex.split(args))
         except SystemExit:
-            return
+            return None
         except Exception as e:
             console.print(f"[red]Error parsing arguments: {str(e)}[/red]")
-            return
+            return None
 
-        job = self._create_job("Crawling", parsed.niche, "crawl")
-        console.print(
-            f"[green]Starting crawl job {job.job_id} "
-            f"for niche: {parsed.niche}[/green]"
+    def _stage_parser(self, prog: str, description: str) -> argparse.ArgumentParser:
+        """Argument parser with the options shared by the stage commands."""
+        parser = argparse.ArgumentParser(prog=prog, description=description)
+        parser.add_argument("niches", nargs="+", help="Niches to process")
+        parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Submit to the persistent job queue instead of running here",
+        )
+        parser.add_argument(
+            "--priority", type=int, default=0, help="Queue priority (higher first)"
+        )
+        parser.add_argument(
+            "--retries", type=int, default=2, help="Retries for queued jobs"
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Profile the job (show it with the profile command)",
+        )
+        parser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            help="Record the top memory allocations of the job",
         )
+        return parser
 
-        try:
-            crawl = Crawler(parsed.niche, debug=parsed.debug)
-            self._update_job_status(job, "running")
-            asyncio.run(crawl.start())
-            self._update_job_status(job, "completed")
+    def _launch(self, job_type: str, parsed: argparse.Namespace, params: dict):
+        """Run a stage for every requested niche, here or through the queue."""
+        name, _, on_loop = STAGES[job_type]
+        params = {"debug": parsed.debug, **params}
+        profiled = parsed.profile or parsed.trace_memory
+        if profiled and parsed.queue:
+            console.print("[red]--profile and --trace-memory need a local job[/red]")
+            return
+        # A niche given twice would be one unit twice in the ledger
+        parsed.niches = list(dict.fromkeys(parsed.niches))
+        if not parsed.queue:
+            # Jobs run here are recorded in the run ledger (queued jobs
+            # already have their record in the queue)
+            units = [(job_type, niche) for niche in parsed.niches]
+            run_id = self.ledger.start_run(job_type, units, resume=False)
+
+        for niche in parsed.niches:
+            if parsed.queue:
+                job_id = self.queue.submit(
+                    job_type,
+                    niche,
+                    params,
+                    priority=parsed.priority,
+                    max_attempts=parsed.retries + 1,
+                )
+                console.print(
+                    f"[green]Queued {job_type} job {job_id} for niche: {niche}"
+                    "[/green] (watch with [cyan]queue[/cyan])"
+                )
+                continue
+
+            job = self._create_job(name, niche, job_type)
+            stage = build_stage(job_type, niche, params, progress=job.report)
+            start = self._tracked(run_id, job_type, niche, stage.start, on_loop)
+            if profiled:
+                profile_id = f"run-{run_id}-{job_type}-{niche}"
+                self.profiles[job.job_id] = profile_id
+                profiler = JobProfiler(
+                    profile_id, cpu=parsed.profile, memory=parsed.trace_memory
+                )
+                start = profiler.wrap(start, on_loop)
+            # The writer is synchronous, so it goes to the worker pool
+            self.executor.submit(job, start, blocking=not on_loop)
             console.print(
-                f"[green]Crawl job {job.job_id} completed successfully[/green]"
+                f"[green]Started {job_type} job {job.job_id} "
+                f"for niche: {niche}[/green]"
             )
-        except Exception as e:
-            self._update_job_status(job, "failed", str(e))
-            console.print(f"[red]Crawl job {job.job_id} failed: {str(e)}[/red]")
 
-    def do_extract(self, args):
+    def _tracked(self, run_id: int, stage: str, niche: str, start, on_loop: bool):
+        """Wrap a stage entry point so its unit, with the outcome counts the
+        stage returns, is recorded in the ledger."""
+        if on_loop:
+
+            async def run():
+                async with self.ledger.aunit(run_id, stage, niche) as outcomes:
+                    outcomes.update(await start() or {})
+
+        else:
+
+            # Already on a worker thread, off the event loop
+            def run():
+                with self.ledger.unit(run_id, stage, niche) as outcomes:
+                    outcomes.update(start() or {})
+
+        return run
+
+    def do_pipeline(self, args):
         """
-        Extract content from crawled data
-        Usage: extract <niche> [--debug] [--limit N]
+        Crawl, extract, write and post-process niches, resuming the last
+        interrupted pipeline run with the same niches
+        Usage: pipeline <niche> [<niche> ...] [--limit N] [--new] [--debug]
         """
-        parser = argparse.ArgumentParser(description="Start content extraction")
-        parser.add_argument("niche", help="Niche to extract content from")
+        parser = argparse.ArgumentParser(
+            prog="pipeline", description="Run the pipeline"
+        )
+        parser.add_argument("niches", nargs="+", help="Niches to process, in order")
+        parser.add_argument(
+            "--limit", type=int, default=10, help="Items to extract and write per niche"
+        )
+        parser.add_argument(
+            "--new", action="store_true", help="Start over instead of resuming"
+        )
         parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
+        parsed.niches = list(dict.fromkeys(parsed.niches))
+
+        params = {
+            "crawl": {"debug": parsed.debug},
+            "extract": {"limit": parsed.limit, "debug": parsed.debug},
+            "write": {"limit": parsed.limit, "debug": parsed.debug},
+        }
+        job = self._create_job("Pipeline", ", ".join(parsed.niches), "pipeline")
+
+        async def start():
+            await run_pipeline(
+                parsed.niches,
+                params,
+                resume=not parsed.new,
+                progress=job.report,
+                ledger=self.ledger,
+            )
+
+        self.executor.submit(job, start)
+        console.print(
+            f"[green]Started pipeline job {job.job_id} for: "
+            f"{', '.join(parsed.niches)}[/green] (history with [cyan]runs[/cyan])"
+        )
+
+    def do_runs(self, args):
+        """
+        Show recorded runs, the units of one run, or one stage's durations
+        Usage: runs [--name NAME] [--limit N]
+               runs <run_id>
+               runs --stage STAGE [--niche NICHE] [--limit N]
+        """
+        argv = shlex.split(args)
+        if len(argv) == 1 and argv[0].isdigit():
+            self._show_run(int(argv[0]))
+            return
+
+        parser = argparse.ArgumentParser(prog="runs", description="Show run history")
+        parser.add_argument("--name", help="Only runs of this kind, e.g. pipeline")
+        parser.add_argument("--stage", help="Show durations of this stage instead")
+        parser.add_argument("--niche", help="With --stage: only this niche")
+        parser.add_argument("--limit", type=int, default=20, help="Rows to show")
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
+
+        if parsed.stage:
+            rows = self.ledger.unit_history(parsed.stage, parsed.niche, parsed.limit)
+            table = Table(title=f"Durations: {parsed.stage}")
+            table.add_column("Run", style="cyan")
+            table.add_column("Niche", style="green")
+            table.add_column("Finished", style="cyan")
+            table.add_column("Seconds", style="yellow", justify="right")
+            table.add_column("vs previous", justify="right")
+            # Rows are newest first; compare each with the older one after it
+            for row, older in zip(rows, rows[1:] + [None]):
+                change = ""
+                same_niche = older is not None and older["niche"] == row["niche"]
+                if same_niche and older["seconds"]:
+                    ratio = row["seconds"] / older["seconds"] - 1
+                    color = "red" if ratio > 0.2 else "green"
+                    change = f"[{color}]{ratio:+.0%}[/{color}]"
+                table.add_row(
+                    str(row["run_id"]),
+                    row["niche"],
+                    row["finished_at"] or "",
+                    f"{row['seconds']:.1f}",
+                    change,
+                )
+            console.print(table)
+            return
+
+        table = Table(title="Runs")
+        table.add_column("ID", style="cyan")
+        table.add_column("Name", style="blue")
+        table.add_column("Status", style="yellow")
+        table.add_column("Units", style="magenta")
+        table.add_column("Started", style="cyan")
+        table.add_column("Duration", style="green", justify="right")
+        table.add_column("Resumes", justify="right")
+        for row in self.ledger.history(parsed.name, parsed.limit):
+            table.add_row(
+                str(row["id"]),
+                row["name"],
+                format_status(row["status"]),
+                f"{row['completed'] or 0}/{row['units']}",
+                row["started_at"] or "",
+                f"{row['seconds'] or 0:.1f}s",
+                str(row["resumes"]),
+            )
+        console.print(table)
+
+    def _show_run(self, run_id: int):
+        units = self.ledger.units(run_id)
+        if not units:
+            console.print(f"[red]No run with ID {run_id}[/red]")
+            return
+        table = Table(title=f"Run {run_id}")
+        table.add_column("Stage", style="blue")
+        table.add_column("Niche", style="green")
+        table.add_column("Status", style="yellow")
+        table.add_column("Started", style="cyan")
+        table.add_column("Seconds", style="magenta", justify="right")
+        table.add_column("Error", style="red")
+        for unit in units:
+            table.add_row(
+                unit["stage"],
+                unit["niche"],
+                format_status(unit["status"]),
+                unit["started_at"] or "",
+                f"{unit['seconds']:.1f}" if unit["seconds"] is not None else "-",
+                (unit["error"] or "")[:60],
+            )
+        console.print(table)
+
+    def do_crawl(self, args):
+        """
+        Start crawling process for one or more niches in the background
+        Usage: crawl <niche> [<niche> ...] [--debug] [--force] [--queue]
+                     [--profile] [--trace-memory]
+        """
+        parser = self._stage_parser("crawl", "Start crawling process")
         parser.add_argument(
-            "--limit", type=int, default=5, help="Limit the number of items to extract"
+            "--force",
+            action="store_true",
+            help="Crawl every source, including those not due yet",
         )
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
 
-        try:
-            parsed = parser.parse_args(shlex.split(args))
-        except SystemExit:
+        self._launch("crawl", parsed, {"force": parsed.force} if parsed.force else {})
+
+    def do_profile(self, args):
+        """
+        Show the saved profile of a job run with --profile or --trace-memory
+        Usage: profile [<job_id>|<profile_id>|--run RUN_ID]
+                       [--sort cumulative|tottime|calls] [--limit N]
+        Without a job or profile, lists the saved profiles.
+        """
+        parser = argparse.ArgumentParser(prog="profile", description="Show a profile")
+        parser.add_argument(
+            "target",
+            nargs="?",
+            help="Job ID of this session, or a profile ID from the list",
+        )
+        parser.add_argument(
+            "--run", type=int, help="Show the profiles of a run (see runs)"
+        )
+        parser.add_argument(
+            "--sort",
+            choices=["cumulative", "tottime", "calls"],
+            default="cumulative",
+            help="Order of the hottest functions",
+        )
+        parser.add_argument("--limit", type=int, default=25, help="Rows to show")
+        parsed = self._parse(parser, args)
+        if parsed is None:
             return
-        except Exception as e:
-            console.print(f"[red]Error parsing arguments: {str(e)}[/red]")
+
+        if parsed.run is not None:
+            # Profile ids start with the run id, see _launch()
+            profiles = saved_profiles(f"run-{parsed.run}-")
+            if not profiles:
+                console.print(f"[red]No profiles saved for run {parsed.run}[/red]")
+            for profile_id, _ in profiles:
+                self._print_profile(profile_id, parsed.sort, parsed.limit)
+            return
+        if parsed.target is None:
+            profiles = saved_profiles()
+            if not profiles:
+                console.print("[yellow]No profiles saved yet[/yellow]")
+                return
+            table = Table(title="Saved profiles")
+            table.add_column("Profile", style="cyan")
+            table.add_column("Saved at", style="green")
+            for profile_id, saved_at in profiles:
+                table.add_row(
+                    profile_id,
+                    datetime.fromtimestamp(saved_at).strftime("%Y-%m-%d %H:%M:%S"),
+                )
+            console.print(table)
+            return
+
+        profile_id = parsed.target
+        if parsed.target.isdigit():
+            job_id = int(parsed.target)
+            job = next((j for j in self.jobs if j.job_id == job_id), None)
+            if job is not None and job.status in ("pending", "running"):
+                console.print(
+                    f"[yellow]Job {job.job_id} is {job.status}; "
+                    "its profile is saved when it ends[/yellow]"
+                )
+                return
+            profile_id = self.profiles.get(job_id)
+            if profile_id is None:
+                console.print(
+                    f"[red]Job {job_id} was not profiled in this session; "
+                    "run profile without arguments to list saved profiles[/red]"
+                )
+                return
+        self._print_profile(profile_id, parsed.sort, parsed.limit)
+
+    def _print_profile(self, profile_id: str, sort: str, limit: int):
+        text = format_profile(profile_id, sort=sort, limit=limit)
+        if text is None:
+            console.print(f"[red]No profile saved as {profile_id}[/red]")
+            return
+        console.print(f"[bold]{profile_id}[/bold]")
+        console.print(text, markup=False, highlight=False)
+
+    def do_sources(self, args):
+        """
+        Show the recrawl schedule of a niche's source pages
+        Usage: sources <niche>
+        """
+        argv = shlex.split(args)
+        if len(argv) != 1:
+            console.print("[red]Usage: sources <niche>[/red]")
+            return
+
+        now = time.time()
+        table = Table(title=f"Sources: {argv[0]}")
+        table.add_column("URL", style="cyan")
+        table.add_column("Due in", style="yellow")
+        table.add_column("Interval", style="magenta")
+        table.add_column("Crawls", style="blue")
+        table.add_column("New URLs (last/total)", style="green")
+        table.add_column("Failures", style="red")
+        for row in SourceScheduler(argv[0]).summary():
+            due_in = max(row["next_due_at"] - now, 0) / 3600
+            failures = str(row["failures"])
+            if row["last_error"]:
+                failures += f" ({row['last_error']})"
+            table.add_row(
+                row["url"],
+                f"{due_in:.1f}h" if due_in else "now",
+                f"{(row['interval'] or 0) / 3600:.1f}h",
+                str(row["crawls"]),
+                f"{row['last_new_urls']}/{row['new_urls_total']}",
+                failures,
+            )
+        console.print(table)
+
+    def do_extract(self, args):
+        """
+        Extract content from crawled data in the background
+        Usage: extract <niche> [<niche> ...] [--debug] [--limit N] [--processes N]
+                       [--queue] [--profile] [--trace-memory]
+        """
+        parser = self._stage_parser("extract", "Start content extraction")
+        parser.add_argument(
+            "--limit", type=int, default=5, help="Limit the number of items to extract"
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            help="Processes for page parsing and chunking (0: none)",
+        )
+        parsed = self._parse(parser, args)
+        if parsed is None:
             return
 
         if parsed.debug:
             self.logger = get_logger(__name__, debug=True)
             self.logger.info("Debug mode enabled for extraction")
 
-        job = self._create_job("Extraction", parsed.niche, "extract")
-        console.print(
-            f"[green]Starting extraction job {job.job_id} "
-            f"for niche: {parsed.niche}[/green]"
+        params = {"limit": parsed.limit}
+        if parsed.processes is not None:
+            params["processes"] = parsed.processes
+        self._launch("extract", parsed, params)
+
+    def do_refresh(self, args):
+        """
+        Re-check extracted articles and update only the chunks that changed
+        Usage: refresh <niche> [<niche> ...] [--debug] [--limit N] [--max-age HOURS]
+                       [--queue [--every HOURS]] [--profile] [--trace-memory]
+        """
+        parser = self._stage_parser("refresh", "Refresh extracted articles")
+        parser.add_argument(
+            "--limit", type=int, default=50, help="Documents to check per run"
         )
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            default=24,
+            help="Re-check documents not checked for this many hours",
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            help="With --queue: queue the next run this many hours after each run",
+        )
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
+        if parsed.every and not parsed.queue:
+            console.print("[red]--every needs --queue (the worker schedules it)[/red]")
+            return
 
-        try:
-            extractor = ContentExtractor(
-                parsed.niche, limit=parsed.limit, debug=parsed.debug
-            )
-            self._update_job_status(job, "running")
-            asyncio.run(extractor.start())
-            self._update_job_status(job, "completed")
-            console.print(
-                f"[green]Extraction job {job.job_id} completed successfully[/green]"
-            )
-        except Exception as e:
-            self._update_job_status(job, "failed", str(e))
-            console.print(f"[red]Extraction job {job.job_id} failed: {str(e)}[/red]")
+        if parsed.debug:
+            self.logger = get_logger(__name__, debug=True)
+            self.logger.info("Debug mode enabled for refresh")
+
+        params = {"limit": parsed.limit, "max_age_hours": parsed.max_age}
+        if parsed.every:
+            params["every"] = parsed.every * 3600
+        self._launch("refresh", parsed, params)
 
     def do_write(self, args):
         """
-        Write processed content
-        Usage: write <niche> [--debug] [--limit N]
+        Write processed content in the background
+        Usage: write <niche> [<niche> ...] [--debug] [--limit N] [--similarity S]
+                     [--queue] [--profile] [--trace-memory]
         """
-        parser = argparse.ArgumentParser(description="Start content writing")
-        parser.add_argument("niche", help="Niche to write content for")
-        parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+        parser = self._stage_parser("write", "Start content writing")
         parser.add_argument(
             "--limit", type=int, default=2, help="Limit the number of items to write"
         )
-
-        try:
-            parsed = parser.parse_args(shlex.split(args))
-        except SystemExit:
-            return
-        except Exception as e:
-            console.print(f"[red]Error parsing arguments: {str(e)}[/red]")
+        parser.add_argument(
+            "--similarity",
+            type=float,
+            default=0.9,
+            help="Write titles at least this similar as one post (above 1: never)",
+        )
+        parsed = self._parse(parser, args)
+        if parsed is None:
             return
 
-        print(parsed.limit)
         if parsed.debug:
             self.logger = get_logger(__name__, debug=True)
             self.logger.info("Debug mode enabled for writing")
 
-        job = self._create_job("Writing", parsed.niche, "write")
-        console.print(
-            f"[green]Starting writing job {job.job_id} "
-            f"for niche: {parsed.niche}[/green]"
+        params = {"limit": parsed.limit, "similarity": parsed.similarity}
+        self._launch("write", parsed, params)
+
+    def do_queue(self, args):
+        """
+        Show or manage jobs in the persistent queue
+        Usage: queue [--status S] [--limit N] [--watch]
+               queue cancel <job_id>
+        """
+        argv = shlex.split(args)
+        if argv[:1] == ["cancel"]:
+            if len(argv) != 2 or not argv[1].isdigit():
+                console.print("[red]Usage: queue cancel <job_id>[/red]")
+            elif self.queue.cancel(int(argv[1])):
+                console.print(f"[yellow]Cancelled queued job {argv[1]}[/yellow]")
+            else:
+                console.print(f"[red]No pending queued job with ID {argv[1]}[/red]")
+            return
+
+        parser = argparse.ArgumentParser(prog="queue", description="Show queued jobs")
+        parser.add_argument("--status", help="Only show jobs with this status")
+        parser.add_argument("--limit", type=int, default=20, help="Rows to show")
+        parser.add_argument(
+            "--watch", action="store_true", help="Refresh until interrupted"
         )
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
+
+        def render():
+            table = Table(title="Job Queue")
+            table.add_column("ID", style="cyan")
+            table.add_column("Type", style="blue")
+            table.add_column("Niche", style="green")
+            table.add_column("Priority", style="magenta")
+            table.add_column("Status", style="yellow")
+            table.add_column("Attempts", style="cyan")
+            table.add_column("Progress", style="magenta")
+            table.add_column("Created", style="cyan")
+            table.add_column("Worker", style="green")
+            table.add_column("Error", style="red")
+            for row in self.queue.list(status=parsed.status, limit=parsed.limit):
+                table.add_row(
+                    str(row["id"]),
+                    row["job_type"],
+                    row["niche"],
+                    str(row["priority"]),
+                    format_status(row["status"]),
+                    f"{row['attempts']}/{row['max_attempts']}",
+                    f"{row['done']}/{row['total']}" if row["total"] else "-",
+                    row["created_at"] or "",
+                    row["worker"] or "",
+                    (row["error"] or "")[:60],
+                )
+            return table
+
+        if not parsed.watch:
+            console.print(render())
+            return
 
         try:
-            writer = ContentWriter(parsed.niche, limit=parsed.limit, debug=parsed.debug)
-            self._update_job_status(job, "running")
-            if parsed.debug:
-                self.logger.info(f"Starting content writing for {parsed.niche}")
-            writer.start()
-            self._update_job_status(job, "completed")
-            msg = f"Writing job {job.job_id} completed successfully"
-            console.print(f"[green]{msg}[/green]")
-            if parsed.debug:
-                self.logger.info(msg)
-        except Exception as e:
-            self._update_job_status(job, "failed", str(e))
-            error_msg = f"Writing job {job.job_id} failed: {str(e)}"
-            console.print(f"[red]{error_msg}[/red]")
-            if parsed.debug:
-                self.logger.error(error_msg)
+            with Live(render(), console=console, refresh_per_second=1) as live:
+                while True:
+                    time.sleep(2)
+                    live.update(render())
+        except KeyboardInterrupt:
+            pass
+
+    def do_kill(self, args):
+        """
+        Cancel a pending or running job
+        Usage: kill <job_id>
+        """
+        try:
+            job_id = int(args.strip())
+        except ValueError:
+            console.print("[red]Usage: kill <job_id>[/red]")
+            return
+
+        if self.executor.cancel(job_id):
+            console.print(f"[yellow]Cancelling job {job_id}...[/yellow]")
+        else:
+            console.print(f"[red]No pending or running job with ID {job_id}[/red]")
 
     def do_jobs(self, _):
         """Display status of all jobs."""
@@ -251,6 +682,7 @@ class CShell(cmd.Cmd):
         table.add_column("Niche", style="green")
         table.add_column("Type", style="blue")
         table.add_column("Status", style="yellow")
+        table.add_column("Progress", style="magenta")
         table.add_column("Start Time", style="cyan")
         table.add_column("Duration", style="green")
 
@@ -264,12 +696,310 @@ class CShell(cmd.Cmd):
                 job.niche,
                 job.type,
                 format_status(job.status),
+                job.progress,
                 job.start_time.strftime("%H:%M:%S"),
                 duration_str,
             )
 
         console.print(table)
 
+    def do_stats(self, args):
+        """
+        Show pipeline metrics collected in this process
+        Usage: stats [--format table|prometheus|jsonl] [--out FILE] [--reset]
+        """
+        parser = argparse.ArgumentParser(prog="stats", description="Show metrics")
+        parser.add_argument(
+            "--format",
+            choices=["table", "prometheus", "jsonl"],
+            default="table",
+            help="Output format",
+        )
+        parser.add_argument("--out", help="Write the export to this file")
+        parser.add_argument(
+            "--reset", action="store_true", help="Clear metrics after showing them"
+        )
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
+
+        if parsed.format == "table":
+            rows = metrics.registry.snapshot()
+            if not rows:
+                console.print("[yellow]No metrics recorded yet[/yellow]")
+            else:
+                table = Table(title="Pipeline Metrics")
+                table.add_column("Metric", style="cyan")
+                table.add_column("Labels", style="green")
+                table.add_column("Count/Value", style="yellow", justify="right")
+                table.add_column("Total (s)", justify="right")
+                table.add_column("p50 (s)", justify="right")
+                table.add_column("p99 (s)", justify="right")
+                table.add_column("Max (s)", justify="right")
+                for row in rows:
+                    labels = ", ".join(f"{k}={v}" for k, v in row["labels"].items())
+                    if row["type"] == "counter":
+                        table.add_row(row["name"], labels, f"{row['value']:g}")
+                    else:
+                        table.add_row(
+                            row["name"],
+                            labels,
+                            str(row["count"]),
+                            f"{row['sum']:.2f}",
+                            f"{row['p50']:.3f}",
+                            f"{row['p99']:.3f}",
+                            f"{row['max']:.3f}",
+                        )
+                console.print(table)
+        else:
+            if parsed.format == "prometheus":
+                text = metrics.registry.to_prometheus()
+            else:
+                text = metrics.registry.to_jsonl()
+            if parsed.out:
+                Path(parsed.out).write_text(text, encoding="utf-8")
+                console.print(f"[green]Metrics written to {parsed.out}[/green]")
+            else:
+                console.print(text, markup=False, highlight=False)
+
+        if parsed.reset:
+            metrics.registry.reset()
+
+    def do_compact(self, args):
+        """
+        Remove orphaned, superseded, duplicate or expired points of a niche
+        Usage: compact <niche> [--max-age-days N] [--legacy] [--apply [--optimize]]
+        """
+        parser = argparse.ArgumentParser(
+            prog="compact", description="Compact a niche collection"
+        )
+        parser.add_argument("niche", help="Niche whose collection is compacted")
+        parser.add_argument(
+            "--max-age-days", type=float, help="Expire articles older than this"
+        )
+        parser.add_argument(
+            "--legacy",
+            action="store_true",
+            help="Also remove points stored before the documents table existed",
+        )
+        parser.add_argument(
+            "--apply", action="store_true", help="Delete; without it only report"
+        )
+        parser.add_argument(
+            "--optimize",
+            action="store_true",
+            help="Have Qdrant vacuum the pruned segments after deleting",
+        )
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
+
+        try:
+            report = compact_collection(
+                parsed.niche,
+                max_age_days=parsed.max_age_days,
+                dry_run=not parsed.apply,
+                include_legacy=parsed.legacy,
+                optimize=parsed.optimize,
+            )
+        except Exception as e:
+            console.print(f"[red]Compaction failed: {e}[/red]")
+            return
+
+        title = "Compaction (dry run)" if report["dry_run"] else "Compaction"
+        table = Table(title=f"{title}: {parsed.niche}")
+        table.add_column("Reason", style="cyan")
+        table.add_column("Points", style="yellow", justify="right")
+        for reason, count in report["delete"].items():
+            table.add_row(reason, str(count))
+        table.add_row("[bold]total[/bold]", str(sum(report["delete"].values())))
+        console.print(table)
+        console.print(
+            f"Scanned {report['scanned']} points, "
+            f"~{report['reclaim_bytes'] / 1_000_000:.2f} MB "
+            f"{'reclaimable' if report['dry_run'] else 'reclaimed'}"
+        )
+        if report["dry_run"]:
+            console.print("[yellow]Nothing deleted; run with --apply[/yellow]")
+        elif report.get("optimized"):
+            console.print("Qdrant optimizers will vacuum the pruned segments")
+
+    def do_sync(self, args):
+        """
+        Copy niche collections between the local vector store and the remote
+        cluster (QDRANT_MODE=local)
+        Usage: sync push|pull [<niche> ...] [--prune [--yes]] [--batch-size N]
+        """
+        parser = argparse.ArgumentParser(
+            prog="sync", description="Sync local and remote collections"
+        )
+        parser.add_argument(
+            "direction",
+            choices=["push", "pull"],
+            help="push: local to remote; pull: remote to local",
+        )
+        parser.add_argument("niches", nargs="*", help="Collections (default: all)")
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete points of the destination that the source does not have",
+        )
+        parser.add_argument("--yes", action="store_true", help="Prune without asking")
+        parser.add_argument(
+            "--batch-size", type=int, default=256, help="Points per request"
+        )
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
+        if QDRANT_MODE != "local":
+            console.print("[red]sync needs QDRANT_MODE=local (embedded store)[/red]")
+            return
+
+        remote = remote_client()
+        source, target = client, remote
+        if parsed.direction == "pull":
+            source, target = remote, client
+        status = console.status(f"Syncing ({parsed.direction})...")
+
+        def confirm(collection, count):
+            # The spinner would draw over the prompt
+            status.stop()
+            try:
+                return Confirm.ask(
+                    f"Delete {count} point(s) of {collection} that the source "
+                    "does not have?",
+                    default=False,
+                )
+            finally:
+                status.start()
+
+        try:
+            with status:
+                reports = sync_collections(
+                    source,
+                    target,
+                    collections=parsed.niches or None,
+                    batch_size=parsed.batch_size,
+                    prune=parsed.prune,
+                    confirm=None if parsed.yes else confirm,
+                )
+        except Exception as e:
+            console.print(f"[red]Sync failed: {e}[/red]")
+            return
+        finally:
+            remote.close()
+
+        table = Table(title=f"Sync ({parsed.direction})")
+        table.add_column("Collection", style="cyan")
+        table.add_column("Copied", style="green", justify="right")
+        table.add_column("Pruned", style="yellow", justify="right")
+        for report in reports:
+            table.add_row(
+                report["collection"], str(report["copied"]), str(report["pruned"])
+            )
+        console.print(table)
+
+    def do_bench(self, args):
+        """
+        Run the offline benchmark and compare it with the stored baseline
+        Usage: bench [--scales N [N ...]] [--pages DIR] [--baseline FILE]
+                     [--save-baseline] [--tolerance F] [--llm-latency S]
+                     [--filter-latency S] [--embed-latency S]
+        """
+        parser = argparse.ArgumentParser(
+            prog="bench", description="Offline benchmark with local fakes"
+        )
+        parser.add_argument(
+            "--scales", type=int, nargs="+", default=[10], help="Articles per run"
+        )
+        parser.add_argument("--pages", help="Folder with recorded article HTML")
+        parser.add_argument(
+            "--baseline", default=bench.BASELINE_PATH, help="Baseline report file"
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store this run as the new baseline",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.10,
+            help="Relative change flagged as a regression",
+        )
+        parser.add_argument("--llm-latency", type=float, default=0.5)
+        parser.add_argument("--filter-latency", type=float, default=1.0)
+        parser.add_argument("--extraction-latency", type=float, default=0.5)
+        parser.add_argument("--embed-latency", type=float, default=0.05)
+        parsed = self._parse(parser, args)
+        if parsed is None:
+            return
+
+        # The benchmark swaps module-level clients, so run it alone
+        if self.executor.running():
+            console.print("[red]Wait for running jobs to finish first[/red]")
+            return
+
+        console.print("[green]Running offline benchmark...[/green]")
+        report = bench.run_benchmark(
+            scales=parsed.scales,
+            pages_dir=parsed.pages,
+            llm_latency=parsed.llm_latency,
+            filter_latency=parsed.filter_latency,
+            extraction_latency=parsed.extraction_latency,
+            embed_latency=parsed.embed_latency,
+        )
+
+        table = Table(title="Benchmark")
+        table.add_column("Scale", style="cyan")
+        table.add_column("Stage", style="magenta")
+        table.add_column("Items", justify="right")
+        table.add_column("Seconds", justify="right")
+        table.add_column("Items/s", justify="right")
+        table.add_column("Peak MB", justify="right")
+        for scale, stages in report["scales"].items():
+            for stage, result in stages.items():
+                table.add_row(
+                    scale,
+                    stage,
+                    str(result["items"]),
+                    f"{result['seconds']:.2f}",
+                    f"{result['throughput']:.2f}",
+                    f"{result['peak_mb']:.1f}",
+                )
+        console.print(table)
+
+        baseline = bench.load_report(parsed.baseline)
+        if baseline is None:
+            console.print(f"[yellow]No baseline at {parsed.baseline}[/yellow]")
+        else:
+            rows = bench.compare(report, baseline, tolerance=parsed.tolerance)
+            table = Table(title=f"Against baseline from {baseline.get('created')}")
+            table.add_column("Scale", style="cyan")
+            table.add_column("Stage", style="magenta")
+            table.add_column("Metric")
+            table.add_column("Baseline", justify="right")
+            table.add_column("Current", justify="right")
+            table.add_column("Change", justify="right")
+            for row in rows:
+                color = "red" if row["regression"] else "green"
+                table.add_row(
+                    row["scale"],
+                    row["stage"],
+                    row["metric"],
+                    f"{row['baseline']:g}",
+                    f"{row['current']:g}",
+                    f"[{color}]{row['change']:+.1%}[/{color}]",
+                )
+            console.print(table)
+            regressions = sum(1 for row in rows if row["regression"])
+            if regressions:
+                console.print(f"[red]{regressions} regression(s) found[/red]")
+
+        if parsed.save_baseline:
+            bench.save_report(report, parsed.baseline)
+            console.print(f"[green]Baseline saved to {parsed.baseline}[/green]")
+
     def do_status(self, _):
         """Display system status and configuration."""
         table = Table(title="System Status")
@@ -282,10 +1012,25 @@ class CShell(cmd.Cmd):
             "[green]Connected[/green]" if db_path.exists() else "[red]Not Found[/red]"
         )
         table.add_row("Database", db_status)
+        store = f"local ({QDRANT_PATH})" if QDRANT_MODE == "local" else QDRANT_MODE
+        table.add_row("Vector Store", store)
 
         # Add active jobs count
-        active_jobs = sum(1 for job in self.jobs if job.status == "running")
-        table.add_row("Active Jobs", f"[blue]{active_jobs}[/blue]")
+        active_jobs = self.executor.running()
+        pending_jobs = sum(1 for job in self.jobs if job.status == "pending")
+        table.add_row(
+            "Active Jobs", f"[blue]{active_jobs}[/blue] / {self.executor.max_jobs}"
+        )
+        table.add_row("Pending Jobs", f"[yellow]{pending_jobs}[/yellow]")
+
+        # Dependencies currently skipped by their circuit breaker
+        tripped = [
+            f"{breaker.name} ({breaker.state})"
+            for breaker in breakers().values()
+            if breaker.state != "closed"
+        ]
+        circuits = f"[red]{', '.join(tripped)}[/red]" if tripped else "none"
+        table.add_row("Open Circuits", circuits)
 
         console.print(table)
 
@@ -303,6 +1048,7 @@ class CShell(cmd.Cmd):
             )
             if not Confirm.ask(confirm_msg):
                 return False
+        self.executor.shutdown()
         console.print("[magenta]Goodbye![/magenta]")
         return True
 
@@ -312,9 +1058,54 @@ class CShell(cmd.Cmd):
         console.print("Type [cyan]help[/cyan] for a list of commands")
 
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(prog="curiostack")
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=2,
+        help="Maximum number of jobs running at the same time",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    worker_parser = subparsers.add_parser(
+        "worker", help="Run jobs from the persistent queue"
+    )
+    worker_parser.add_argument(
+        "--processes", type=int, default=None, help="Worker processes (default: CPUs)"
+    )
+    worker_parser.add_argument(
+        "--poll", type=float, default=2.0, help="Seconds between queue polls"
+    )
+    worker_parser.add_argument(
+        "--types",
+        nargs="+",
+        choices=sorted(STAGES),
+        help="Only run these job types",
+    )
+    search_parser = subparsers.add_parser(
+        "search-api", help="Serve semantic search over the niche collections"
+    )
+    search_parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    search_parser.add_argument("--port", type=int, default=8080, help="Port to bind")
+    search_parser.add_argument(
+        "--cors-origin", default="*", help="Origin allowed to call the API"
+    )
+    parsed = parser.parse_args()
+
+    if parsed.command == "search-api":
+        run_server(host=parsed.host, port=parsed.port, cors_origin=parsed.cors_origin)
+        return
+
+    if parsed.command == "worker":
+        Worker(
+            processes=parsed.processes,
+            poll_interval=parsed.poll,
+            job_types=parsed.types,
+        ).run()
+        return
+
     try:
-        CShell().cmdloop()
+        CShell(max_jobs=parsed.max_jobs).cmdloop()
     except KeyboardInterrupt:
         msg = "[yellow]Received keyboard interrupt. Exiting...[/yellow]"
         console.print(f"\n{msg}")
@@ -322,3 +1113,7 @@ if __name__ == "__main__":
     except Exception as e:
         console.print(f"[red]Fatal error: {str(e)}[/red]")
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import threading
 from dotenv import load_dotenv
 from crawl4ai import BrowserConfig, CrawlerRunConfig, CacheMode
 from crawl4ai.extraction_strategy import LLMExtractionStrategy
@@ -9,7 +10,7 @@ from langchain_google_genai import (
 )
 from crawl4ai import LLMConfig
 from crawl4ai.content_filter_strategy import LLMContentFilter
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.models import Distance, VectorParams
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_voyageai import VoyageAIEmbeddings
@@ -25,6 +26,13 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 VOYAGE_API_KEY = os.getenv("VOYAGE_API_KEY")
 QDRANT_CLIENT_URL = os.getenv("QDRANT_CLIENT_URL")
 
+# Vector storage: "remote" (the server at QDRANT_CLIENT_URL), "local" (embedded,
+# on disk at QDRANT_PATH) or "memory" (embedded, for tests)
+QDRANT_MODE = os.getenv("QDRANT_MODE", "remote").lower()
+QDRANT_PATH = os.getenv("QDRANT_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "database", "qdrant"
+)
+
 
 # Database path ###############
 def get_db_path(niche, script_dir=False):
@@ -45,6 +53,16 @@ def get_db_path(niche, script_dir=False):
         return db_path, base_dir
 
     return db_path
+
+
+def get_queue_db_path():
+    """Path of the job queue database shared by the CLI and the workers.
+
+    Returns:
+        _str_: path
+    """
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, "database", "jobs.db")
 # End #######################
 
 
@@ -61,8 +79,10 @@ embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
 #     api_key=VOYAGE_API_KEY,
 # )
 
+# A single attempt per call: retries go through resilience.call_with_retry,
+# which backs off, respects the retry budget and stops on an open circuit
 llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-pro", google_api_key=GOOGLE_API_KEY
+    model="gemini-2.5-pro", google_api_key=GOOGLE_API_KEY, max_retries=1
 )
 # END ####################################
 
@@ -92,11 +112,11 @@ def llm_strategy():
         extraction_type="schema",
         input_format="markdown",
         instruction=(
-            "You are an expert content extractor. From the provided page content (markdown), extract ONLY the fields defined in the provided JSON Schema.\n"
-            "- Map fields precisely: title, author (or null), date (YYYY-MM-DD or null), url, source.\n"
-            "- Ignore navigation, ads, cookie banners, comments, unrelated links, and UI elements.\n"
+            "You are an expert content extractor. The provided content lists candidate links from a source page, one per line as [anchor text](url) with an optional date hint. Extract ONLY the fields defined in the provided JSON Schema, one object per link that points to an article or blog post.\n"
+            "- Map fields precisely: title (from the anchor text), author (or null), date (YYYY-MM-DD from the date hint, or null), url, source (the source page).\n"
+            "- Skip links to category, tag, author, login, subscription or other non-article pages.\n"
             "- If a field is missing on the page, return null for that field.\n"
-            "- Return a single JSON object that strictly conforms to the schema. No code fences, no extra text."
+            "- Return JSON objects that strictly conform to the schema. No code fences, no extra text."
         ),
         llm_config=llm_conf,
     )
@@ -153,10 +173,78 @@ filter = LLMContentFilter(
 
 
 # Vector DB Config ####################
-client = QdrantClient(
-    url=QDRANT_CLIENT_URL,
-    api_key=QDRANT_API_KEY,
-)
+def remote_client():
+    """Client of the Qdrant server at ``QDRANT_CLIENT_URL``."""
+    return QdrantClient(url=QDRANT_CLIENT_URL, api_key=QDRANT_API_KEY)
+
+
+def qdrant_client(mode=None):
+    """Qdrant client for a storage mode.
+
+    Args:
+        mode (_str_, optional): "remote", "local" or "memory". Defaults to
+            ``QDRANT_MODE``.
+
+    Returns:
+        QdrantClient: client; an embedded one for "local" and "memory"
+    """
+    mode = mode or QDRANT_MODE
+    if mode == "local":
+        # Embedded storage is locked by the process that opens it
+        os.makedirs(QDRANT_PATH, exist_ok=True)
+        return QdrantClient(path=QDRANT_PATH)
+    if mode == "memory":
+        return QdrantClient(location=":memory:")
+    if mode != "remote":
+        raise ValueError(f"Unknown QDRANT_MODE: {mode}")
+    return remote_client()
+
+
+class _LazyClient:
+    """The configured Qdrant client, opened on first use.
+
+    Processes that never touch Qdrant (page parsing pools, the CLI before a
+    job runs) then never open, or lock, an embedded store. Calls to an
+    embedded client are serialized, as the stage threads share it.
+    """
+
+    def __init__(self, mode=None):
+        self.mode = mode or QDRANT_MODE
+        self._client = None
+        self._lock = threading.RLock()
+
+    def _get(self):
+        with self._lock:
+            if self._client is None:
+                self._client = qdrant_client(self.mode)
+            return self._client
+
+    def __getattr__(self, name):
+        attr = getattr(self._get(), name)
+        if self.mode == "remote" or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return call
+
+
+client = _LazyClient()
+
+
+def async_client():
+    """Async client of the configured storage, for the search API.
+
+    In "local" mode it opens the embedded store itself, so the search API
+    must be the only process using it; "memory" gives an empty store.
+    """
+    if QDRANT_MODE == "local":
+        return AsyncQdrantClient(path=QDRANT_PATH)
+    if QDRANT_MODE == "memory":
+        return AsyncQdrantClient(location=":memory:")
+    return AsyncQdrantClient(url=QDRANT_CLIENT_URL, api_key=QDRANT_API_KEY)
 
 
 def collection_name_creator(collection_name):
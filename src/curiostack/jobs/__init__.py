@@ -0,0 +1,6 @@
+from .executor import Job, JobExecutor, JobCancelled
+from .queue import JobQueue
+from .ledger import RunLedger
+from .stages import STAGES, build_stage, run_stage
+from .pipeline import PIPELINE_STAGES, run_pipeline
+from .worker import Worker
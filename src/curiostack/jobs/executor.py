@@ -0,0 +1,178 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from ..logger import get_logger
+from ..metrics import observe
+from ..utils import close_browser_session, close_http_session
+
+
+class JobCancelled(BaseException):
+    """Raised inside a running job after it was killed.
+
+    Derives from ``BaseException`` (like ``asyncio.CancelledError``) so the
+    broad ``except Exception`` blocks in the stages do not swallow it.
+    """
+
+
+class Job:
+    """Represents a background job in the system."""
+
+    def __init__(self, job_id: int, name: str, niche: str, job_type: str):
+        self.job_id = job_id
+        self.name = name
+        self.niche = niche
+        self.type = job_type
+        self.status = "pending"
+        self.start_time = datetime.now()
+        self.end_time: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.done = 0
+        self.total = 0
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def report(self, done: int, total: Optional[int] = None):
+        """Progress callback handed to the stages.
+
+        Args:
+            done (int): Units of work finished so far.
+            total (int, optional): Total units of work, if known.
+
+        Raises:
+            JobCancelled: If the job was killed in the meantime.
+        """
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    @property
+    def progress(self) -> str:
+        if not self.total:
+            return "-"
+        return f"{self.done}/{self.total}"
+
+
+class JobExecutor:
+    """Runs shell jobs in the background.
+
+    Coroutine stages (crawl, extract) run on one dedicated event loop
+    thread, blocking stages (write) run in a thread pool. At most
+    ``max_jobs`` jobs run at the same time, the rest wait as pending.
+    """
+
+    def __init__(
+        self,
+        max_jobs: int = 2,
+        workers: Optional[int] = None,
+        on_finish: Optional[Callable[[Job], None]] = None,
+    ):
+        self.max_jobs = max_jobs
+        self.on_finish = on_finish
+        self.logger = get_logger(__name__)
+        self.loop = asyncio.new_event_loop()
+        self.pool = ThreadPoolExecutor(
+            max_workers=workers or max_jobs, thread_name_prefix="curiostack-job"
+        )
+        self.jobs: Dict[int, Job] = {}
+        self._thread = threading.Thread(
+            target=self._run_loop, name="curiostack-loop", daemon=True
+        )
+        self._thread.start()
+        self._slots = asyncio.run_coroutine_threadsafe(
+            self._make_slots(), self.loop
+        ).result()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _make_slots(self):
+        # The semaphore must be created on the loop that uses it
+        return asyncio.Semaphore(self.max_jobs)
+
+    def submit(self, job: Job, func: Callable, blocking: bool = False) -> Job:
+        """Schedule a job without waiting for it.
+
+        Args:
+            job (Job): The job record to keep updated.
+            func (Callable): ``async`` stage entry point, or a plain callable
+                when ``blocking`` is True.
+            blocking (bool): Run ``func`` in the worker pool instead of the
+                event loop.
+
+        Returns:
+            Job: The submitted job.
+        """
+        self.jobs[job.job_id] = job
+        job.future = asyncio.run_coroutine_threadsafe(
+            self._run(job, func, blocking), self.loop
+        )
+        return job
+
+    async def _run(self, job: Job, func: Callable, blocking: bool):
+        try:
+            async with self._slots:
+                if job.cancel_event.is_set():
+                    raise JobCancelled(f"Job {job.job_id} was cancelled")
+                job.status = "running"
+                job.start_time = datetime.now()
+                if blocking:
+                    await self.loop.run_in_executor(self.pool, func)
+                else:
+                    await func()
+            job.status = "completed"
+        except (JobCancelled, asyncio.CancelledError):
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            self.logger.error(f"Job {job.job_id} failed: {e}")
+        finally:
+            job.end_time = datetime.now()
+            observe(
+                "job_seconds",
+                (job.end_time - job.start_time).total_seconds(),
+                type=job.type,
+                status=job.status,
+            )
+            if self.on_finish is not None:
+                self.on_finish(job)
+
+    def cancel(self, job_id: int) -> bool:
+        """Kill a pending or running job.
+
+        Async jobs are cancelled right away; jobs in the worker pool stop at
+        their next progress report.
+
+        Returns:
+            bool: False if the job is unknown or already finished.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in ("pending", "running"):
+            return False
+        job.cancel_event.set()
+        if job.future is not None:
+            job.future.cancel()
+        return True
+
+    def running(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "running")
+
+    def shutdown(self):
+        """Cancel outstanding jobs and stop the loop thread."""
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+        # The shared browser and HTTP pool live on this loop, close them first
+        for close in (close_browser_session, close_http_session):
+            try:
+                asyncio.run_coroutine_threadsafe(close(), self.loop).result(timeout=10)
+            except Exception as e:
+                self.logger.warning(f"Could not close {close.__name__}: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,324 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..config import get_queue_db_path
+from ..logger import get_logger
+from ..utils import run_db
+
+
+class RunLedger:
+    """Record of pipeline runs and of every unit of work inside them.
+
+    A unit is one stage for one niche (``("write", "ai_ml")``). Each run
+    keeps the status, timings and error of its units, so an interrupted run
+    can be resumed from its first incomplete unit, and the durations of past
+    runs can be compared. Stored next to the job queue, in SQLite.
+
+    Stages handle most failures per item (a page, a source, a topic) and
+    carry on; they return their outcome counts, and a unit whose counts
+    include ``failed`` or ``postponed`` items ends ``partial`` instead of
+    completed, so the run can be resumed.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or get_queue_db_path()
+        self.logger = get_logger(__name__)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    status TEXT DEFAULT 'running',
+                    started_at REAL,
+                    finished_at REAL,
+                    resumes INTEGER DEFAULT 0
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS run_units (
+                    run_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    stage TEXT NOT NULL,
+                    niche TEXT NOT NULL,
+                    status TEXT DEFAULT 'pending',
+                    started_at REAL,
+                    finished_at REAL,
+                    seconds REAL,
+                    error TEXT,
+                    outcomes TEXT,
+                    PRIMARY KEY (run_id, stage, niche)
+                );
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(run_units)")}
+            if "outcomes" not in columns:
+                conn.execute("ALTER TABLE run_units ADD COLUMN outcomes TEXT")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def start_run(
+        self, name: str, units: List[Tuple[str, str]], resume: bool = True
+    ) -> int:
+        """Open a run, or pick up the last unfinished run of the same name.
+
+        Args:
+            name (str): Kind of run, e.g. "pipeline" or a stage name.
+            units (list): ``(stage, niche)`` pairs in execution order.
+            resume (bool): Continue the latest unfinished run of ``name``
+                when it has the same units; completed units stay completed.
+
+        Returns:
+            int: The run id.
+        """
+        with self._connect() as conn:
+            if resume:
+                row = conn.execute(
+                    """
+                    SELECT id FROM runs
+                    WHERE name = ? AND status != 'completed'
+                    ORDER BY id DESC LIMIT 1
+                    """,
+                    (name,),
+                ).fetchone()
+                if row is not None and self._units_of(conn, row["id"]) == units:
+                    conn.execute(
+                        """
+                        UPDATE runs SET status = 'running', resumes = resumes + 1,
+                            finished_at = NULL
+                        WHERE id = ?
+                        """,
+                        (row["id"],),
+                    )
+                    self.logger.info(f"Resuming {name} run {row['id']}")
+                    return row["id"]
+
+            run_id = conn.execute(
+                "INSERT INTO runs (name, started_at) VALUES (?, ?)",
+                (name, time.time()),
+            ).lastrowid
+            conn.executemany(
+                """
+                INSERT INTO run_units (run_id, position, stage, niche)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (run_id, position, stage, niche)
+                    for position, (stage, niche) in enumerate(units)
+                ],
+            )
+        self.logger.info(f"Started {name} run {run_id} with {len(units)} units")
+        return run_id
+
+    @staticmethod
+    def _units_of(conn, run_id: int) -> List[Tuple[str, str]]:
+        rows = conn.execute(
+            "SELECT stage, niche FROM run_units WHERE run_id = ? ORDER BY position",
+            (run_id,),
+        )
+        return [(row["stage"], row["niche"]) for row in rows]
+
+    def pending_units(self, run_id: int) -> List[Tuple[str, str]]:
+        """Units of a run that have not completed yet, in order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT stage, niche FROM run_units
+                WHERE run_id = ? AND status != 'completed'
+                ORDER BY position
+                """,
+                (run_id,),
+            )
+            return [(row["stage"], row["niche"]) for row in rows]
+
+    @contextmanager
+    def unit(self, run_id: int, stage: str, niche: str):
+        """Mark a unit running for the duration of the block.
+
+        The block gets a dict to fill with the outcome counts of the stage
+        (the return value of its ``start()``). The unit ends completed,
+        partial when some items failed or were postponed, or failed (cancelled for
+        ``BaseException`` such as a killed job) with the error. The run
+        itself is settled once none of its units is left pending or running.
+        """
+        started = time.time()
+        outcomes: Dict[str, int] = {}
+        self._set_unit(run_id, stage, niche, "running", started_at=started)
+        try:
+            yield outcomes
+        except Exception as e:
+            self._end_unit(run_id, stage, niche, "failed", started, str(e))
+            raise
+        except BaseException as e:
+            self._end_unit(run_id, stage, niche, "cancelled", started, repr(e))
+            raise
+        status, error = _settle(outcomes)
+        self._end_unit(run_id, stage, niche, status, started, error, outcomes)
+
+    @asynccontextmanager
+    async def aunit(self, run_id: int, stage: str, niche: str):
+        """unit() for coroutines: the ledger writes run on the database
+        thread instead of blocking the event loop."""
+        started = time.time()
+        outcomes: Dict[str, int] = {}
+        await run_db(self._set_unit, run_id, stage, niche, "running", started)
+        try:
+            yield outcomes
+        except Exception as e:
+            await run_db(
+                self._end_unit, run_id, stage, niche, "failed", started, str(e)
+            )
+            raise
+        except BaseException as e:
+            # Shielded so a second cancellation cannot drop the record
+            await asyncio.shield(
+                run_db(
+                    self._end_unit, run_id, stage, niche, "cancelled", started, repr(e)
+                )
+            )
+            raise
+        status, error = _settle(outcomes)
+        await run_db(
+            self._end_unit, run_id, stage, niche, status, started, error, outcomes
+        )
+
+    def _set_unit(self, run_id, stage, niche, status, started_at):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE run_units
+                SET status = ?, started_at = ?, finished_at = NULL, error = NULL
+                WHERE run_id = ? AND stage = ? AND niche = ?
+                """,
+                (status, started_at, run_id, stage, niche),
+            )
+
+    def _end_unit(
+        self, run_id, stage, niche, status, started, error=None, outcomes=None
+    ):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE run_units
+                SET status = ?, finished_at = ?, seconds = ?, error = ?,
+                    outcomes = ?
+                WHERE run_id = ? AND stage = ? AND niche = ?
+                """,
+                (
+                    status,
+                    now,
+                    now - started,
+                    error,
+                    json.dumps(outcomes) if outcomes else None,
+                    run_id,
+                    stage,
+                    niche,
+                ),
+            )
+            open_units = conn.execute(
+                """
+                SELECT
+                    SUM(status IN ('pending', 'running')),
+                    SUM(status != 'completed')
+                FROM run_units WHERE run_id = ?
+                """,
+                (run_id,),
+            ).fetchone()
+            if not open_units[0]:
+                conn.execute(
+                    "UPDATE runs SET status = ?, finished_at = ? WHERE id = ?",
+                    ("failed" if open_units[1] else "completed", now, run_id),
+                )
+
+    def fail_run(self, run_id: int):
+        """Close a run that stopped before reaching all of its units."""
+        with self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE runs SET status = 'failed', finished_at = ?
+                WHERE id = ? AND status = 'running'
+                """,
+                (time.time(), run_id),
+            )
+
+    def history(self, name: Optional[str] = None, limit: int = 20):
+        """Recent runs with their duration and unit counts, newest first.
+
+        The duration is the sum of the unit durations, so time spent between
+        an interruption and the resume is not counted.
+        """
+        query = """
+            SELECT r.*, COUNT(u.stage) AS units,
+                SUM(u.status = 'completed') AS completed,
+                SUM(u.seconds) AS seconds
+            FROM runs r LEFT JOIN run_units u ON u.run_id = r.id
+        """
+        args = []
+        if name:
+            query += " WHERE r.name = ?"
+            args.append(name)
+        query += " GROUP BY r.id ORDER BY r.id DESC LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            return [_with_dates(row) for row in conn.execute(query, args)]
+
+    def units(self, run_id: int):
+        """All units of a run, in execution order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM run_units WHERE run_id = ? ORDER BY position",
+                (run_id,),
+            )
+            return [_with_dates(row) for row in rows]
+
+    def unit_history(self, stage: str, niche: Optional[str] = None, limit: int = 20):
+        """Durations of one stage over its completed runs, newest first."""
+        query = """
+            SELECT u.*, r.name FROM run_units u JOIN runs r ON r.id = u.run_id
+            WHERE u.stage = ? AND u.status = 'completed'
+        """
+        args = [stage]
+        if niche:
+            query += " AND u.niche = ?"
+            args.append(niche)
+        query += " ORDER BY u.finished_at DESC LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            return [_with_dates(row) for row in conn.execute(query, args)]
+
+
+def _settle(outcomes: Dict[str, int]) -> Tuple[str, Optional[str]]:
+    # Status and error of a unit that returned without raising; postponed
+    # items (an open circuit) are left for a resume, like failed ones
+    left = [
+        f"{outcomes[outcome]} {outcome}"
+        for outcome in ("failed", "postponed")
+        if outcomes.get(outcome)
+    ]
+    if not left:
+        return "completed", None
+    return "partial", f"{' and '.join(left)} of {sum(outcomes.values())} item(s)"
+
+
+def _with_dates(row) -> dict:
+    # Epoch columns as readable local times for the CLI
+    row = dict(row)
+    for key in ("started_at", "finished_at"):
+        if row.get(key):
+            row[key] = datetime.fromtimestamp(row[key]).strftime("%Y-%m-%d %H:%M:%S")
+    return row
@@ -0,0 +1,85 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from .ledger import RunLedger
+from .stages import STAGES, build_stage
+from ..preprocessing import pre_pro, update_img_url
+from ..utils import run_db
+from ..logger import get_logger
+
+# Units a pipeline run goes through for every niche, in order
+PIPELINE_STAGES = ("crawl", "extract", "write", "postprocess")
+
+logger = get_logger(__name__)
+
+
+def _postprocess(niche: str):
+    pre_pro(niche=niche)
+    update_img_url(niche=niche)
+
+
+async def _run_unit(stage: str, niche: str, params: Optional[dict]) -> dict:
+    # Coroutine stages share the caller's loop (and browser); blocking ones
+    # go to a thread. Returns the outcome counts of the stage.
+    if stage == "postprocess":
+        await asyncio.to_thread(_postprocess, niche)
+        return {}
+    unit = build_stage(stage, niche, params)
+    if STAGES[stage][2]:
+        return await unit.start() or {}
+    return await asyncio.to_thread(unit.start) or {}
+
+
+async def run_pipeline(
+    niches: List[str],
+    params: Optional[Dict[str, dict]] = None,
+    resume: bool = True,
+    pause: float = 3,
+    progress: Optional[Callable] = None,
+    ledger: Optional[RunLedger] = None,
+) -> int:
+    """Run every stage for every niche, picking up an interrupted run.
+
+    Completed units of the last unfinished run with the same niches are
+    skipped; the first failing unit stops the run, and the next call starts
+    again from that unit. Units where some items failed are recorded as
+    partial and run again on resume. Run it with ``run_with_browser`` so crawl and
+    extract share one browser.
+
+    Args:
+        niches (list): Niches to process, in order.
+        params (dict, optional): Stage -> keyword arguments for that stage,
+            e.g. ``{"write": {"limit": 10}}``.
+        resume (bool): Continue the last unfinished run instead of starting
+            a new one.
+        pause (float): Seconds to wait between units.
+        progress (callable, optional): Progress callback ``(done, total)``
+            counted in units.
+        ledger (RunLedger, optional): Ledger to record the run in.
+
+    Returns:
+        int: The run id.
+    """
+    ledger = ledger or RunLedger()
+    params = params or {}
+    niches = list(dict.fromkeys(niches))
+    units = [(stage, niche) for niche in niches for stage in PIPELINE_STAGES]
+    run_id = await run_db(ledger.start_run, "pipeline", units, resume=resume)
+    pending = await run_db(ledger.pending_units, run_id)
+    skipped = len(units) - len(pending)
+    if skipped:
+        logger.info(f"Run {run_id}: skipping {skipped} completed units")
+
+    try:
+        for done, (stage, niche) in enumerate(pending, start=skipped):
+            if progress:
+                progress(done, len(units))
+            async with ledger.aunit(run_id, stage, niche) as outcomes:
+                outcomes.update(await _run_unit(stage, niche, params.get(stage)))
+            await asyncio.sleep(pause)
+    except BaseException:
+        await asyncio.shield(run_db(ledger.fail_run, run_id))
+        raise
+    if progress:
+        progress(len(units), len(units))
+    return run_id
@@ -0,0 +1,266 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from ..config import get_queue_db_path
+from ..logger import get_logger
+
+
+class JobQueue:
+    """Durable job queue stored in SQLite.
+
+    Jobs are claimed highest priority first, then oldest first. Failed jobs
+    are retried with exponential backoff until ``max_attempts`` is reached.
+    Several workers can share one queue; claiming happens inside an
+    ``IMMEDIATE`` transaction so a job is only handed out once.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or get_queue_db_path()
+        self.logger = get_logger(__name__)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_type TEXT NOT NULL,
+                    niche TEXT NOT NULL,
+                    params TEXT,
+                    status TEXT DEFAULT 'pending',
+                    priority INTEGER DEFAULT 0,
+                    attempts INTEGER DEFAULT 0,
+                    max_attempts INTEGER DEFAULT 3,
+                    retry_delay REAL DEFAULT 60,
+                    run_after REAL DEFAULT 0,
+                    done INTEGER DEFAULT 0,
+                    total INTEGER DEFAULT 0,
+                    worker TEXT,
+                    heartbeat_at REAL,
+                    created_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    error TEXT
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_jobs_claim
+                ON jobs (status, priority DESC, id)
+                """
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _now():
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def submit(
+        self,
+        job_type: str,
+        niche: str,
+        params: Optional[dict] = None,
+        priority: int = 0,
+        max_attempts: int = 3,
+        retry_delay: float = 60,
+        delay: float = 0,
+    ) -> int:
+        """Queue a job for the workers.
+
+        Args:
+            job_type (str): "crawl", "extract", "refresh" or "write".
+            niche (str): example: ai_ml, data science, cybersecurity
+            params (dict, optional): Keyword arguments for the stage.
+            priority (int): Higher runs first.
+            max_attempts (int): Attempts before the job is marked failed.
+            retry_delay (float): Seconds before the first retry, doubled on
+                every following attempt.
+            delay (float): Seconds before the job becomes due.
+
+        Returns:
+            int: The job id.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO jobs (
+                    job_type, niche, params, priority,
+                    max_attempts, retry_delay, run_after, created_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job_type,
+                    niche,
+                    json.dumps(params or {}),
+                    priority,
+                    max_attempts,
+                    retry_delay,
+                    time.time() + delay,
+                    self._now(),
+                ),
+            )
+            job_id = cursor.lastrowid
+        self.logger.info(f"Queued {job_type} job {job_id} for niche={niche}")
+        return job_id
+
+    def claim(self, worker: str, job_types: Optional[List[str]] = None):
+        """Take the next due job and mark it running.
+
+        Args:
+            worker (str): Name of the claiming worker.
+            job_types (list, optional): Only claim these job types.
+
+        Returns:
+            sqlite3.Row | None: The claimed job, or None if nothing is due.
+        """
+        query = "SELECT id FROM jobs WHERE status = 'pending' AND run_after <= ?"
+        args = [time.time()]
+        if job_types:
+            query += f" AND job_type IN ({','.join('?' for _ in job_types)})"
+            args.extend(job_types)
+        query += " ORDER BY priority DESC, id LIMIT 1"
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(query, args).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1, worker = ?,
+                    started_at = ?, heartbeat_at = ?, error = NULL
+                WHERE id = ?
+                """,
+                (worker, self._now(), time.time(), row["id"]),
+            )
+            conn.execute("COMMIT")
+            return conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (row["id"],)
+            ).fetchone()
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'completed', finished_at = ?, done = total
+                WHERE id = ? AND status = 'running'
+                """,
+                (self._now(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str):
+        """Record a failed attempt, scheduling a retry if any are left."""
+        with self._connect() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None or job["status"] != "running":
+                return
+            if job["attempts"] < job["max_attempts"]:
+                delay = job["retry_delay"] * 2 ** (job["attempts"] - 1)
+                conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'pending', run_after = ?, worker = NULL, error = ?
+                    WHERE id = ?
+                    """,
+                    (time.time() + delay, error, job_id),
+                )
+                self.logger.warning(
+                    f"Job {job_id} failed (attempt {job['attempts']}), "
+                    f"retrying in {delay:.0f}s: {error}"
+                )
+            else:
+                conn.execute(
+                    """
+                    UPDATE jobs SET status = 'failed', finished_at = ?, error = ?
+                    WHERE id = ?
+                    """,
+                    (self._now(), error, job_id),
+                )
+                self.logger.error(f"Job {job_id} failed permanently: {error}")
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a job that has not been claimed yet."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = 'cancelled', finished_at = ?
+                WHERE id = ? AND status = 'pending'
+                """,
+                (self._now(), job_id),
+            )
+            return cursor.rowcount > 0
+
+    def progress(self, job_id: int, done: int, total: Optional[int] = None):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE jobs SET done = ?, total = COALESCE(?, total), heartbeat_at = ?
+                WHERE id = ?
+                """,
+                (done, total, time.time(), job_id),
+            )
+
+    def heartbeat(self, job_ids: List[int]):
+        if not job_ids:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? "
+                f"WHERE id IN ({','.join('?' for _ in job_ids)})",
+                [time.time(), *job_ids],
+            )
+
+    def requeue_stale(self, timeout: float = 300) -> int:
+        """Give jobs of dead workers back to the queue.
+
+        Args:
+            timeout (float): Seconds without a heartbeat before a running job
+                is considered abandoned.
+
+        Returns:
+            int: Number of requeued jobs.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = 'pending', worker = NULL,
+                    error = 'worker lost'
+                WHERE status = 'running' AND heartbeat_at < ?
+                """,
+                (time.time() - timeout,),
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: int):
+        with self._connect() as conn:
+            return conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def list(self, status: Optional[str] = None, limit: int = 20):
+        query = "SELECT * FROM jobs"
+        args = []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            return conn.execute(query, args).fetchall()
@@ -0,0 +1,40 @@
+from ..scraping import Crawler, ContentExtractor, ContentRefresher
+from ..preprocessing import ContentWriter
+from ..utils import run_with_browser
+
+# Job type -> (display name, stage class, runs on the event loop)
+STAGES = {
+    "crawl": ("Crawling", Crawler, True),
+    "extract": ("Extraction", ContentExtractor, True),
+    "refresh": ("Refreshing", ContentRefresher, True),
+    "write": ("Writing", ContentWriter, False),
+}
+
+
+def build_stage(job_type, niche, params=None, progress=None):
+    """Instantiate the stage behind a job type.
+
+    Args:
+        job_type (str): "crawl", "extract", "refresh" or "write".
+        niche (str): example: ai_ml, data science, cybersecurity
+        params (dict, optional): Extra keyword arguments (debug, limit, ...).
+        progress (callable, optional): Progress callback ``(done, total)``.
+
+    Returns:
+        The stage object; call ``start()`` on it to run the job.
+    """
+    if job_type not in STAGES:
+        raise ValueError(f"Unknown job type: {job_type}")
+    _, stage_cls, _ = STAGES[job_type]
+    # "every" is read by the worker to schedule the next run, not by the stage
+    params = {k: v for k, v in (params or {}).items() if k != "every"}
+    return stage_cls(niche, progress=progress, **params)
+
+
+def run_stage(job_type, niche, params=None, progress=None):
+    """Build and run a stage to completion on the calling thread."""
+    stage = build_stage(job_type, niche, params, progress)
+    if STAGES[job_type][2]:
+        run_with_browser(stage.start())
+    else:
+        stage.start()
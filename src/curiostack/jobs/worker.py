@@ -0,0 +1,158 @@
+import json
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from .queue import JobQueue
+from .stages import run_stage
+from ..config import QDRANT_MODE
+from ..logger import get_logger
+
+
+# One queue handle per worker process, reused by every job it runs
+_queues: Dict[str, JobQueue] = {}
+
+
+def _queue(db_path: str) -> JobQueue:
+    if db_path not in _queues:
+        _queues[db_path] = JobQueue(db_path)
+    return _queues[db_path]
+
+
+class QueueProgress:
+    """Picklable progress callback that writes counters back to the queue.
+
+    Updates are throttled so long stages do not hammer the database.
+    """
+
+    def __init__(self, db_path: str, job_id: int, interval: float = 2.0):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, done: int, total: Optional[int] = None):
+        now = time.monotonic()
+        if now - self._last < self.interval and done != total:
+            return
+        self._last = now
+        _queue(self.db_path).progress(self.job_id, done, total)
+
+
+def _init_process():
+    # Ctrl+C goes to the whole process group; let the parent decide
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def execute_job(db_path: str, job_id: int, job_type: str, niche: str, params: str):
+    """Entry point of a queued job inside a worker process."""
+    progress = QueueProgress(db_path, job_id)
+    run_stage(job_type, niche, json.loads(params or "{}"), progress=progress)
+
+
+class Worker:
+    """Daemon that takes jobs from the queue and runs them in a process pool.
+
+    Run several workers side by side against the same queue database to
+    spread jobs over more cores or machines sharing the file system. An
+    embedded Qdrant store (``QDRANT_MODE`` local or memory) belongs to one
+    process, so the pool then has a single process.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        poll_interval: float = 2.0,
+        job_types: Optional[List[str]] = None,
+        db_path: Optional[str] = None,
+        stale_timeout: float = 300,
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self.job_types = job_types
+        self.stale_timeout = stale_timeout
+        self.queue = JobQueue(db_path)
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.logger = get_logger(__name__)
+        self._stopping = False
+        if QDRANT_MODE != "remote" and self.processes > 1:
+            self.logger.warning(
+                f"QDRANT_MODE={QDRANT_MODE} keeps Qdrant inside one process, "
+                f"running with 1 process instead of {self.processes}"
+            )
+            self.processes = 1
+
+    def stop(self, *_):
+        """Stop claiming new jobs; running ones are allowed to finish."""
+        if not self._stopping:
+            self.logger.info(f"Worker {self.name} stopping after running jobs")
+        self._stopping = True
+
+    def _reschedule(self, job):
+        """Queue the next run of a repeating job (``every`` seconds param)."""
+        params = json.loads(job["params"] or "{}")
+        if not params.get("every"):
+            return
+        job_id = self.queue.submit(
+            job["job_type"],
+            job["niche"],
+            params,
+            priority=job["priority"],
+            max_attempts=job["max_attempts"],
+            retry_delay=job["retry_delay"],
+            delay=params["every"],
+        )
+        self.logger.info(f"Next {job['job_type']} run is job {job_id}")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        requeued = self.queue.requeue_stale(self.stale_timeout)
+        if requeued:
+            self.logger.warning(f"Requeued {requeued} abandoned job(s)")
+        self.logger.info(
+            f"Worker {self.name} started with {self.processes} process(es)"
+        )
+
+        running = {}
+        with ProcessPoolExecutor(
+            max_workers=self.processes, initializer=_init_process
+        ) as pool:
+            while not self._stopping or running:
+                # Claim as many jobs as there are free processes
+                while not self._stopping and len(running) < self.processes:
+                    job = self.queue.claim(self.name, self.job_types)
+                    if job is None:
+                        break
+                    self.logger.info(
+                        f"Running {job['job_type']} job {job['id']} "
+                        f"(niche={job['niche']}, attempt {job['attempts']})"
+                    )
+                    future = pool.submit(
+                        execute_job,
+                        self.queue.db_path,
+                        job["id"],
+                        job["job_type"],
+                        job["niche"],
+                        job["params"],
+                    )
+                    running[future] = job
+
+                for future in [f for f in running if f.done()]:
+                    job = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self.queue.complete(job["id"])
+                        self.logger.info(f"Job {job['id']} completed")
+                        self._reschedule(job)
+                    else:
+                        self.queue.fail(job["id"], str(error) or type(error).__name__)
+
+                self.queue.heartbeat([job["id"] for job in running.values()])
+                time.sleep(self.poll_interval)
+
+        self.logger.info(f"Worker {self.name} stopped")
@@ -1,17 +1,76 @@
+import atexit
 import logging
+import multiprocessing.util
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process lock, single writer assumed
+    fcntl = None
 
-def get_logger(name: str, debug: bool = False) -> logging.Logger:
-    """_summary_
+# Every logger under this name shares the handlers set up below
+ROOT_LOGGER = "curiostack"
 
-    Args:
-        name (str): _description_
+_lock = threading.Lock()
+_state = {"pid": None, "queue": None, "listener": None}
+_console_loggers = set()
 
-    Returns:
-        logging.Logger: _description_
+
+class LockedRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that is safe with several processes on one file.
+
+    Writes and rotations happen under an ``flock`` on a sidecar lock file,
+    and the stream is reopened when another process has rotated the file.
+    """
+
+    def __init__(self, filename, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self._lock_file = open(f"{self.baseFilename}.lock", "a")
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self.stream.fileno()).st_ino:
+            self.stream.close()
+            self.stream = self._open()
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            self._reopen_if_rotated()
+            super().emit(record)
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def close(self):
+        super().close()
+        self._lock_file.close()
+
+
+class _ConsoleFilter(logging.Filter):
+    # Only loggers requested with debug=True print to the console
+    def filter(self, record):
+        return record.name in _console_loggers
+
+
+def _setup():
+    """Create the queue, handlers and listener once per process.
+
+    A forked worker process inherits the parent's state but not its listener
+    thread, so the pid is checked and everything is rebuilt after a fork.
     """
+    if _state["pid"] == os.getpid():
+        return
+
     # File will save to the root directory
     log_dir = os.path.join(os.path.dirname(__file__), "..", "..", "logs")
     os.makedirs(log_dir, exist_ok=True)
@@ -19,37 +78,90 @@ def get_logger(name: str, debug: bool = False) -> logging.Logger:
     # Log file name
     log_file = os.path.join(log_dir, "curiostack.log")
 
-    # Create logger
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    # Prevent duplicate logs
-    if logger.hasHandlers():
-        logger.handlers.clear()
-
-    # Console handler
-    if debug:
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-
-    # File handler (with rotation)
-    file_handler = RotatingFileHandler(log_file, maxBytes=5_000_000, backupCount=5)
-    file_handler.setLevel(logging.DEBUG)
-
     # Formatter
     formatter = logging.Formatter(
         "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
-    # Setting formatter
-    if debug:
-        console_handler.setFormatter(formatter)
+    # File handler (with rotation)
+    file_handler = LockedRotatingFileHandler(
+        log_file, maxBytes=5_000_000, backupCount=5
+    )
+    file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
 
-    # Add handlers
-    if debug:
-        logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(formatter)
+    console_handler.addFilter(_ConsoleFilter())
+
+    # Loggers only enqueue records; the listener thread does the I/O
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(logging.DEBUG)
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    _state.update(pid=os.getpid(), queue=log_queue, listener=listener)
+
+    # Pool processes leave through os._exit() and skip atexit handlers, but
+    # multiprocessing finalizers still run, so the queue gets drained
+    multiprocessing.util.Finalize(None, _stop_listener, exitpriority=10)
+
+
+def _stop_listener():
+    listener = _state["listener"]
+    if listener is not None and _state["pid"] == os.getpid():
+        listener.stop()
+        _state["listener"] = None
+
+
+atexit.register(_stop_listener)
+
+
+def get_logger(name: str, debug: bool = False) -> logging.Logger:
+    """Return a logger writing to ``logs/curiostack.log``.
+
+    Handlers are created on the first call in a process and shared by all
+    loggers afterwards, so calling this in hot paths is cheap.
+
+    Args:
+        name (str): Logger name, usually ``__name__``
+        debug (bool): Also print INFO and above from this logger to the
+            console; False stops printing it
+
+    Returns:
+        logging.Logger: The configured logger
+    """
+    with _lock:
+        _setup()
+        # The latest call decides, as with a logger created by a stage
+        # run with --debug and a later run without it
+        if debug:
+            _console_loggers.add(name)
+        else:
+            _console_loggers.discard(name)
+
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.DEBUG)
+
+        # Loggers outside the package (e.g. "__main__") get the queue directly
+        if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+            for handler in list(logger.handlers):
+                if isinstance(handler, QueueHandler):
+                    if handler.queue is _state["queue"]:
+                        return logger
+                    logger.removeHandler(handler)
+            logger.addHandler(QueueHandler(_state["queue"]))
+            logger.propagate = False
 
     return logger
@@ -1,9 +1,7 @@
-import asyncio
-from .scraping import Crawler, ContentExtractor
-from .preprocessing import ContentWriter, pre_pro, update_img_url
+from .jobs import run_pipeline
+from .utils import run_with_browser
 
 # from .logger import get_logger
-import time
 
 # logger = get_logger(__name__, debug=True)
 
@@ -55,19 +53,15 @@ import time
 
 niches = ["ai_ml", "cybersecurity", "common_technology", "data_science"]
 
-for niche in niches:
-
-    crawler = Crawler(niche=niche, debug=True)
-    extracter = ContentExtractor(niche=niche, limit=10)
-    writer = ContentWriter(niche=niche, limit=10, debug=True)
-
-    asyncio.run(crawler.start())
-    time.sleep(3)
-    asyncio.run(extracter.start())
-    time.sleep(3)
-    writer.start()
-    time.sleep(3)
-    pre_pro(niche=niche)
-    update_img_url(niche=niche)
-    print("COMPLETED 🚨")
-
+# Picks up where the last interrupted run stopped; see `runs` in the CLI
+run_with_browser(
+    run_pipeline(
+        niches,
+        params={
+            "crawl": {"debug": True},
+            "extract": {"limit": 10},
+            "write": {"limit": 10, "debug": True},
+        },
+    )
+)
+print("COMPLETED 🚨")
@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+PREFIX = "curiostack_"
+
+# Latency buckets in seconds, from fast cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300
+)
+
+# Recent observations kept per histogram for percentile estimates
+SAMPLE_SIZE = 2048
+
+
+def _escape(value) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Bucketed latency histogram with a window of recent samples."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Registry:
+    """Thread-safe store of counters and histograms keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, tuple], float] = {}
+        self.histograms: Dict[Tuple[str, tuple], Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self) -> List[dict]:
+        """All series as plain dicts, sorted by name."""
+        rows = []
+        with self._lock:
+            for (name, labels), value in self.counters.items():
+                rows.append(
+                    {
+                        "name": name,
+                        "type": "counter",
+                        "labels": dict(labels),
+                        "value": value,
+                    }
+                )
+            for (name, labels), hist in self.histograms.items():
+                rows.append(
+                    {
+                        "name": name,
+                        "type": "histogram",
+                        "labels": dict(labels),
+                        "count": hist.count,
+                        "sum": round(hist.sum, 6),
+                        "max": round(hist.max, 6),
+                        "p50": round(hist.quantile(0.5), 6),
+                        "p99": round(hist.quantile(0.99), 6),
+                        "buckets": dict(zip(map(str, hist.buckets), hist.counts)),
+                    }
+                )
+        return sorted(rows, key=lambda r: (r["name"], sorted(r["labels"].items())))
+
+    def to_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format."""
+
+        def fmt_labels(labels: dict, **extra) -> str:
+            items = {**labels, **extra}
+            if not items:
+                return ""
+            body = ",".join(f'{k}="{_escape(v)}"' for k, v in items.items())
+            return "{" + body + "}"
+
+        lines = []
+        typed = set()
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda kv: kv[0])
+            for (name, labels), value in counters:
+                metric = PREFIX + name
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{fmt_labels(dict(labels))} {value}")
+            for (name, labels), hist in histograms:
+                metric = PREFIX + name
+                labels = dict(labels)
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(
+                        f"{metric}_bucket{fmt_labels(labels, le=bound)} {cumulative}"
+                    )
+                lines.append(
+                    f"{metric}_bucket{fmt_labels(labels, le='+Inf')} {hist.count}"
+                )
+                lines.append(f"{metric}_sum{fmt_labels(labels)} {hist.sum}")
+                lines.append(f"{metric}_count{fmt_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_jsonl(self) -> str:
+        """Render all series as JSON lines, one series per line."""
+        now = time.time()
+        return "".join(
+            json.dumps({"ts": now, **row}) + "\n" for row in self.snapshot()
+        )
+
+
+registry = Registry()
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Increment a counter, e.g. ``inc("crawl_pages_total", niche="ai_ml")``."""
+    registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    """Record one observation (seconds, usually) in a histogram."""
+    registry.observe(name, value, **labels)
+
+
+@contextmanager
+def timer(name: str, **labels):
+    """Time the enclosed block into the histogram ``name``.
+
+    The ``status`` label is set to ``ok`` or ``error`` depending on whether
+    the block raised.
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        registry.observe(name, time.perf_counter() - start, status=status, **labels)
+
+
+def record_tokens(component: str, prompt: int, completion: int):
+    """Add LLM token usage for a component (filter, extraction, writer...)."""
+    if prompt:
+        registry.inc("llm_tokens_total", prompt, component=component, kind="prompt")
+    if completion:
+        registry.inc(
+            "llm_tokens_total", completion, component=component, kind="completion"
+        )
+
+
+def usage_of(strategy) -> Tuple[int, int, int]:
+    """Read ``(prompt_tokens, completion_tokens, calls)`` from a crawl4ai LLM
+    strategy or filter, which keep running totals in ``total_usage``/``usages``.
+    """
+    total = getattr(strategy, "total_usage", None)
+    return (
+        getattr(total, "prompt_tokens", 0) or 0,
+        getattr(total, "completion_tokens", 0) or 0,
+        len(getattr(strategy, "usages", None) or []),
+    )
+
+
+def record_usage_delta(component: str, strategy, before: Tuple[int, int, int]):
+    """Record tokens and API calls a crawl4ai strategy used since ``before``."""
+    prompt, completion, calls = usage_of(strategy)
+    record_tokens(component, prompt - before[0], completion - before[1])
+    if calls - before[2]:
+        registry.inc("api_calls_total", calls - before[2], api=component)
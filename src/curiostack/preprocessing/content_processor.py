@@ -2,6 +2,7 @@ import os
 import json
 from datetime import datetime
 from ..config import llm, UNSPLASH_ACCESS_KEY
+from ..metrics import inc, timer, record_tokens
 import requests
 import random
 
@@ -47,7 +48,16 @@ def pre_pro(niche):
                     Map this topic to the most relevant category from this list: {main_categories}.
                     Only respond with one category name from the list.
                     """
-                    new_category = llm.invoke(prompt).content.strip()
+                    with timer("postprocess_seconds", step="category"):
+                        response = llm.invoke(prompt)
+                    inc("api_calls_total", api="gemini_category")
+                    usage = getattr(response, "usage_metadata", None) or {}
+                    record_tokens(
+                        "category",
+                        usage.get("input_tokens", 0),
+                        usage.get("output_tokens", 0),
+                    )
+                    new_category = response.content.strip()
                 else:
                     new_category = old_category
 
@@ -69,7 +79,9 @@ def pre_pro(niche):
 
 def search_unsplash_images(query, per_page=10):
     params = {"query": query, "per_page": per_page, "client_id": UNSPLASH_ACCESS_KEY}
-    response = requests.get(SEARCH_URL, params=params)
+    with timer("postprocess_seconds", step="image_search"):
+        response = requests.get(SEARCH_URL, params=params)
+    inc("api_calls_total", api="unsplash")
     response.raise_for_status()  # Raise an exception for bad status codes
     return response.json()
 
@@ -2,42 +2,177 @@ import json
 import re
 from datetime import datetime
 from typing import List, Optional
-from langchain_qdrant import QdrantVectorStore, RetrievalMode
-from langchain.chains import RetrievalQA
-from ..config import embeddings, client, llm, collection_name_creator
-from ..utils import get_titles, content_save
+from langchain_core.callbacks import BaseCallbackHandler
+from ..config import llm, collection_name_creator
+from ..utils import (
+    get_titles,
+    content_save,
+    get_documents,
+    repair_json,
+    search_batch,
+    topic_urls,
+    mark_written,
+    title_vectors,
+    written_posts,
+    cluster_topics,
+    link_sources,
+)
 from pydantic import BaseModel, Field, ValidationError
 from ..logger import get_logger
+from ..metrics import inc, timer, record_tokens
+from ..resilience import CircuitOpen, call_with_retry, is_transient
 import time
 
+# Gemini's JSON mode: the response body is a JSON document, not prose
+JSON_MODE = {"response_mime_type": "application/json"}
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Records token usage of the writer LLM calls in the metrics registry."""
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                record_tokens(
+                    "writer",
+                    usage.get("input_tokens", 0),
+                    usage.get("output_tokens", 0),
+                )
+
+
+def format_context(hits, documents):
+    """Retrieved chunks as one context block, each under its source line.
+
+    Chunk payloads only hold ``doc_id``, ``position`` and ``section``; the
+    article metadata is joined back from the documents table.
+    """
+    blocks = []
+    for text, meta in hits:
+        meta = {**documents.get(meta.get("doc_id"), {}), **meta}
+        source = " | ".join(
+            str(meta[key])
+            for key in ("title", "url", "author", "published_date", "section")
+            if meta.get(key)
+        )
+        blocks.append(f"[{source}]\n{text}" if source else text)
+    return "\n\n".join(blocks)
+
 
 class ContentWriter:
-    def __init__(self, niche, limit=None, debug=False):
+    def __init__(
+        self, niche, limit=None, debug=False, progress=None, pause=5, similarity=0.9
+    ):
         self.niche = niche
         self.limit = limit
         self.debug = debug
+        self.progress = progress
+        # Seconds to wait between posts, keeps us under the Gemini rate limit
+        self.pause = pause
+        # Titles at least this similar (cosine) are written as one post
+        self.similarity = similarity
         self.logger = get_logger(__name__, debug=self.debug)
 
-    def start(self):
-        # Ensure collection exists before creating vector store
-        collection_name_creator(collection_name=self.niche)
+    def _plan(self, titles):
+        # Near-duplicate titles become one post; titles a written post already
+        # covers are linked to it as extra sources instead of written again
+        with timer("writer_clustering_seconds", niche=self.niche):
+            posts = written_posts(self.niche)
+            vectors = title_vectors(self.niche, titles + list(posts))
+            clusters, covered = cluster_topics(
+                titles,
+                vectors[: len(titles)],
+                list(posts),
+                vectors[len(titles) :],
+                self.similarity,
+            )
 
-        # Vector Store
-        vector_store = QdrantVectorStore(
-            client=client,
-            collection_name=self.niche,
-            embedding=embeddings,
-            retrieval_mode=RetrievalMode.DENSE,
+        if covered:
+            urls = topic_urls(self.niche, covered)
+            by_post = {}
+            for title, post in covered.items():
+                by_post.setdefault(post, []).append(urls.get(title))
+            for post, post_urls in by_post.items():
+                link_sources(posts[post], post_urls)
+            mark_written(self.niche, covered)
+
+        merged = sum(len(cluster.members) for cluster in clusters)
+        inc("writer_topics_total", merged, niche=self.niche, outcome="merged")
+        inc("writer_topics_total", len(covered), niche=self.niche, outcome="covered")
+        self.logger.info(
+            f"{len(titles)} titles -> {len(clusters)} posts "
+            f"({merged} merged, {len(covered)} already covered)"
         )
+        return clusters
+
+    def _retrieve(self, vectors):
+        # All topics are searched up front, in batches; the contexts are
+        # kept so regenerations never retrieve again
+        with timer("writer_retrieval_seconds", niche=self.niche):
+            results = search_batch(
+                self.niche, vectors, k=6, fetch_k=32, lambda_mult=0.7
+            )
+        doc_ids = [meta.get("doc_id") for hits in results for _, meta in hits]
+        documents = get_documents(self.niche, doc_ids)
+        return [format_context(hits, documents) for hits in results]
 
-        # RAG
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            retriever=vector_store.as_retriever(
-                search_type="mmr",
-                search_kwargs={"k": 6, "fetch_k": 32, "lambda_mult": 0.7},
-            ),
+    def _invoke(self, model, prompt):
+        # One generation round trip, timed and token-counted
+        with timer("writer_llm_seconds", niche=self.niche):
+            answer = call_with_retry(
+                model.invoke,
+                prompt,
+                circuit="gemini",
+                config={"callbacks": [TokenUsageCallback()]},
+            )
+        inc("api_calls_total", api="gemini_writer")
+        return answer.content
+
+    def _generate(self, model, query):
+        """Generate a post, regenerating once if its JSON cannot be repaired.
+
+        Returns:
+            _tuple_: The post (None if both outputs were invalid) and the raw
+            outputs
+        """
+        raw_result = self._invoke(model, query)
+        result = self._parse(raw_result)
+        if result is not None:
+            return result, [raw_result]
+        # Regenerate once from the same context if repair failed
+        retry_query = (
+            "Return ONLY a valid JSON object per the schema. No prose, no code fences, no comments. "
+            + query
         )
+        raw_retry = self._invoke(model, retry_query)
+        return self._parse(raw_retry), [raw_result, raw_retry]
+
+    def _parse(self, raw):
+        # Strict parse first, then the local repair; None means regenerate
+        try:
+            result = json.loads(raw)
+            outcome = "valid"
+        except json.JSONDecodeError:
+            try:
+                result = repair_json(raw)
+                outcome = "repaired"
+            except ValueError:
+                result, outcome = None, "invalid"
+        inc("writer_json_total", niche=self.niche, outcome=outcome)
+        return result if isinstance(result, dict) else None
+
+    def start(self):
+        """Write posts for the unwritten topics of the niche.
+
+        Returns:
+            _dict_: Topics per outcome (written, postponed, failed)
+        """
+        # Ensure collection exists before searching it
+        collection_name_creator(collection_name=self.niche)
+
+        # RAG: retrieval and generation are separate steps
+        model = llm.bind(generation_config=JSON_MODE)
         titles = get_titles(niche=self.niche, debug=self.debug)
 
         # Questions or query
@@ -89,10 +224,25 @@ class ContentWriter:
 
             return payload
 
+        clusters = self._plan(titles) if titles else []
         if self.limit is not None:
-            titles = titles[:self.limit]
+            clusters = clusters[:self.limit]
+        vectors = [cluster.vector for cluster in clusters]
+        contexts = self._retrieve(vectors) if clusters else []
+        outcomes = {}
 
-        for top in titles:
+        def count(outcome, n=1):
+            outcomes[outcome] = outcomes.get(outcome, 0) + n
+
+        urls = topic_urls(self.niche, [t for c in clusters for t in c.members])
+
+        for done, (cluster, context) in enumerate(zip(clusters, contexts)):
+            if self.progress:
+                self.progress(done, len(clusters))
+            top = cluster.title
+            topic = top
+            if cluster.members:
+                topic += f" (also reported as: {'; '.join(cluster.members)})"
             query = f"""
             You are a precise content writer. Using only retrieved context, produce a STRICT JSON object with fields below. Do not include code fences or any extra text.
 
@@ -116,34 +266,35 @@ class ContentWriter:
             - End content with a section: "## Key Takeaways" listing 4–8 bullets.
             - Keep all prose strictly inside the content field.
 
-            Topic: {top}
-            """
+            Context:
+            {context}
 
-            answer = qa_chain.invoke({"query": query})
-            raw_result = answer["result"]
-            clean_result = re.sub(r"```(?:json)?|```", "", raw_result).strip()
+            Topic: {topic}
+            """
 
             try:
-                result = json.loads(clean_result)
-            except json.JSONDecodeError:
-                # Retry once with stricter instruction if parsing failed
-                retry_query = (
-                    "Return ONLY a valid JSON object per the schema. No prose, no code fences, no comments. "
-                    + query
+                result, outputs = self._generate(model, query)
+            except CircuitOpen as e:
+                # Gemini keeps failing; the remaining topics stay unwritten
+                # and are picked up by the next run
+                self.logger.warning(f"Stopping after {done} post(s): {e}")
+                count("postponed", len(clusters) - done)
+                break
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                self.logger.warning(f"Skipping topic '{top}' for now: {e}")
+                count("failed")
+                continue
+            if result is None:
+                self.logger.warning(
+                    f"Skipping topic '{top}' due to invalid JSON after retry."
                 )
-                answer = qa_chain.invoke({"query": retry_query})
-                raw_retry = answer.get("result", "")
-                clean_retry = re.sub(r"```(?:json)?|```", "", raw_retry).strip()
-                try:
-                    result = json.loads(clean_retry)
-                except json.JSONDecodeError:
-                    self.logger.warning(
-                        f"Skipping topic '{top}' due to invalid JSON after retry."
-                    )
-                    self.logger.debug(
-                        f"First output: {raw_result}\nRetry output: {raw_retry}"
-                    )
-                    continue
+                self.logger.debug(
+                    f"First output: {outputs[0]}\nRetry output: {outputs[1]}"
+                )
+                count("failed")
+                continue
 
             # Normalize and validate
             result = normalize_payload(result)
@@ -152,7 +303,23 @@ class ContentWriter:
                 result = validated.model_dump()
             except ValidationError as ve:
                 self.logger.warning(f"Validation failed for topic '{top}': {ve}")
+                count("failed")
+                continue
+
+            # The rest of the cluster is linked, not written again
+            sources = [urls[title] for title in cluster.members if urls.get(title)]
+            if sources:
+                result["sources"] = sources
+            if not content_save(
+                top=top, final_data=result, niche=self.niche, debug=self.debug
+            ):
+                # The topics stay unwritten and get another try next run
+                count("failed")
                 continue
+            mark_written(self.niche, cluster.members)
+            count("written")
+            time.sleep(self.pause)
 
-            content_save(top=top, final_data=result, niche=self.niche, debug=self.debug)
-            time.sleep(5)
+        if self.progress:
+            self.progress(len(clusters), len(clusters))
+        return outcomes
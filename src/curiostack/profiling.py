@@ -0,0 +1,281 @@
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Callable, List, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "database", "profiles"
+)
+
+# tracemalloc is process-wide; it runs while any job asks for it
+_tracing = {"lock": threading.Lock(), "users": 0}
+
+# Allocations of the profiler itself are left out of the memory report
+OWN_ALLOCATIONS = [
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+]
+
+
+# File name endings of a profile, by kind
+SUFFIXES = {"cpu": ".pstats", "tasks": "-tasks.json", "memory": "-memory.txt"}
+
+
+def profile_paths(profile_id: str) -> dict:
+    """Files holding a profile, by kind."""
+    base = os.path.join(PROFILE_DIR, profile_id)
+    return {kind: f"{base}{suffix}" for kind, suffix in SUFFIXES.items()}
+
+
+def saved_profiles(prefix: str = "") -> List[Tuple[str, float]]:
+    """Profiles in PROFILE_DIR whose id starts with ``prefix``, as
+    ``(profile_id, saved_at)`` pairs, most recently saved first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    saved = {}
+    for entry in os.scandir(PROFILE_DIR):
+        for suffix in SUFFIXES.values():
+            if entry.name.endswith(suffix):
+                profile_id = entry.name[: -len(suffix)]
+                if profile_id.startswith(prefix):
+                    mtime = entry.stat().st_mtime
+                    saved[profile_id] = max(saved.get(profile_id, 0.0), mtime)
+                break
+    return sorted(saved.items(), key=lambda item: item[1], reverse=True)
+
+
+def _code_name(code) -> str:
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def _awaiting(task) -> str:
+    """Where a task is suspended: its innermost three coroutines and what
+    the last one awaits (a Future means a thread, process or socket)."""
+    names = []
+    coro = task.get_coro()
+    while coro is not None:
+        code = getattr(coro, "cr_code", None) or getattr(coro, "ag_code", None)
+        if code is None:
+            names.append(f"<{type(coro).__name__}>")
+            break
+        names.append(_code_name(code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None)
+    return " > ".join(names[-3:])
+
+
+def _stack(frame, depth=3) -> str:
+    names = []
+    while frame is not None and len(names) < depth:
+        code = frame.f_code
+        where = f"{os.path.basename(code.co_filename)}:{frame.f_lineno}"
+        names.append(f"{_code_name(code)} ({where})")
+        frame = frame.f_back
+    return " < ".join(names)
+
+
+class JobProfiler:
+    """Profiles one CLI job and saves the results under ``database/profiles``.
+
+    - cpu: cProfile of the thread the job runs on. For coroutine jobs this is
+      the shared event loop thread, so other jobs running at the same time
+      show up as well; only one job can be CPU-profiled at a time.
+    - tasks: every ``interval`` seconds, where each task on the loop is
+      suspended (coroutine jobs) or the top of the job thread's stack
+      (blocking jobs), plus how late the event loop woke the sampler up.
+      Samples times the interval approximate the time spent there.
+    - memory: tracemalloc allocations made during the job, by line.
+
+    Args:
+        profile_id (str): Name of the profile files. Job ids restart in every
+            shell, so it has to be unique across sessions, e.g. the ledger
+            run id and the niche.
+        cpu (bool): Run cProfile and sample the job
+        memory (bool): Trace allocations
+        interval (float): Seconds between samples
+    """
+
+    def __init__(
+        self,
+        profile_id: str,
+        cpu: bool = True,
+        memory: bool = False,
+        interval: float = 0.02,
+    ):
+        self.profile_id = profile_id
+        self.cpu = cpu
+        self.memory = memory
+        self.interval = interval
+        self.samples = Counter()
+        self.ticks = 0
+        self.loop_lag = {"total": 0.0, "max": 0.0}
+        self._profile = None
+        self._before = None
+
+    def wrap(self, start: Callable, on_loop: bool) -> Callable:
+        """Return a job entry point that runs ``start`` under the profiler."""
+        if on_loop:
+
+            async def run():
+                sampler = None
+                self._begin()
+                if self.cpu:
+                    sampler = asyncio.ensure_future(self._sample_tasks())
+                try:
+                    await start()
+                finally:
+                    if sampler is not None:
+                        sampler.cancel()
+                    self._end()
+
+        else:
+
+            def run():
+                stop = threading.Event()
+                if self.cpu:
+                    threading.Thread(
+                        target=self._sample_thread,
+                        args=(threading.get_ident(), stop),
+                        daemon=True,
+                    ).start()
+                self._begin()
+                try:
+                    start()
+                finally:
+                    stop.set()
+                    self._end()
+
+        return run
+
+    def _begin(self):
+        # Files of an earlier profile with this id would be shown as part of
+        # this one when this one does not write them
+        for path in profile_paths(self.profile_id).values():
+            if os.path.exists(path):
+                os.remove(path)
+        if self.memory:
+            with _tracing["lock"]:
+                if not _tracing["users"]:
+                    tracemalloc.start(10)
+                _tracing["users"] += 1
+            self._before = tracemalloc.take_snapshot().filter_traces(OWN_ALLOCATIONS)
+        if self.cpu:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Another job holds the profiler hook (Python 3.12+)
+                logger.warning(f"CPU profile {self.profile_id} skipped: {e}")
+            else:
+                self._profile = profile
+
+    def _end(self):
+        if self._profile is not None:
+            self._profile.disable()
+        try:
+            self.save()
+        except Exception as e:
+            logger.warning(f"Could not save profile {self.profile_id}: {e}")
+        if self.memory:
+            with _tracing["lock"]:
+                _tracing["users"] -= 1
+                if not _tracing["users"]:
+                    tracemalloc.stop()
+
+    async def _sample_tasks(self):
+        loop = asyncio.get_running_loop()
+        me = asyncio.current_task()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - before - self.interval, 0.0)
+            self.loop_lag["total"] += lag
+            self.loop_lag["max"] = max(self.loop_lag["max"], lag)
+            self.ticks += 1
+            for task in asyncio.all_tasks(loop):
+                if task is not me:
+                    self.samples[_awaiting(task)] += 1
+
+    def _sample_thread(self, ident, stop):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(ident)
+            if frame is not None:
+                self.ticks += 1
+                self.samples[_stack(frame)] += 1
+
+    def save(self):
+        """Write the collected profile files of the job."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        paths = profile_paths(self.profile_id)
+        if self._profile is not None:
+            self._profile.dump_stats(paths["cpu"])
+        if self.cpu:
+            top = [
+                {"where": where, "samples": n, "seconds": round(n * self.interval, 3)}
+                for where, n in self.samples.most_common(50)
+            ]
+            with open(paths["tasks"], "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "interval": self.interval,
+                        "ticks": self.ticks,
+                        "loop_lag": self.loop_lag,
+                        "top": top,
+                    },
+                    f,
+                    indent=2,
+                )
+        if self.memory and self._before is not None:
+            snapshot = tracemalloc.take_snapshot().filter_traces(OWN_ALLOCATIONS)
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [
+                f"Traced memory: {current / 1e6:.1f} MB now, {peak / 1e6:.1f} MB peak",
+                "Top allocations during the job:",
+            ]
+            changes = snapshot.compare_to(self._before, "lineno")
+            lines += [str(stat) for stat in changes[:25]]
+            with open(paths["memory"], "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        logger.info(f"Profile {self.profile_id} saved to {PROFILE_DIR}")
+
+
+def format_profile(
+    profile_id: str, sort: str = "cumulative", limit: int = 25
+) -> Optional[str]:
+    """A saved profile as text: hottest functions, where tasks waited, and
+    top allocations. None if nothing was saved under ``profile_id``."""
+    paths = profile_paths(profile_id)
+    parts = []
+    if os.path.exists(paths["cpu"]):
+        stream = io.StringIO()
+        stats = pstats.Stats(paths["cpu"], stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        parts.append(stream.getvalue().strip())
+    if os.path.exists(paths["tasks"]):
+        with open(paths["tasks"], encoding="utf-8") as f:
+            tasks = json.load(f)
+        lag = tasks["loop_lag"]
+        lines = [
+            f"Sampled every {tasks['interval']}s, {tasks['ticks']} samples; "
+            f"event loop lag {lag['total']:.2f}s total, {lag['max']:.3f}s max",
+        ]
+        lines += [
+            f"{row['seconds']:>9.2f}s  {row['where']}" for row in tasks["top"][:limit]
+        ]
+        parts.append("\n".join(lines))
+    if os.path.exists(paths["memory"]):
+        with open(paths["memory"], encoding="utf-8") as f:
+            parts.append("".join(f.readlines()[: limit + 2]).strip())
+    return "\n\n".join(parts) if parts else None
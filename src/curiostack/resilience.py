@@ -0,0 +1,292 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Union
+from urllib.parse import urlparse
+
+from .logger import get_logger
+from .metrics import inc
+
+logger = get_logger(__name__)
+
+# Failures worth retrying: rate limits, overloaded or unreachable services and
+# timeouts. Anything else (a 404, a rejected prompt) fails straight away.
+TRANSIENT_TEXT = re.compile(
+    r"\b(?:429|500|502|503|504)\b|rate.?limit|quota|resource.?exhausted|overloaded"
+    r"|unavailable|timed? ?out|timeout|temporar|connection|net::ERR_",
+    re.IGNORECASE,
+)
+TRANSIENT_TYPES = (TimeoutError, ConnectionError, asyncio.TimeoutError)
+
+# Circuit settings by kind: a source domain is given up on sooner and for
+# longer than an API, which recovers from a 429 within seconds
+DOMAIN_SETTINGS = {"failure_threshold": 3, "reset_timeout": 300.0}
+API_SETTINGS = {"failure_threshold": 5, "reset_timeout": 30.0}
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit {name} is open, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def is_transient(error) -> bool:
+    """Whether an exception or error message looks like a temporary outage."""
+    if isinstance(error, CircuitOpen):
+        return False
+    if isinstance(error, TRANSIENT_TYPES):
+        return True
+    text = f"{type(error).__name__}: {error}" if isinstance(error, Exception) else error
+    return bool(TRANSIENT_TEXT.search(text or ""))
+
+
+class CircuitBreaker:
+    """Stops calling a dependency that keeps failing.
+
+    - closed: calls go through; ``failure_threshold`` transient failures in
+      a row open the circuit.
+    - open: calls are refused for ``reset_timeout`` seconds.
+    - half-open: one probe call goes through. Success closes the circuit,
+      failure opens it again for twice as long, up to ``max_reset_timeout``.
+
+    Thread-safe: the event loop and the worker threads share breakers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_reset_timeout: float = 900.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._open_for = reset_timeout
+        self._opened_at = 0.0
+        self._probe_at = None
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a call through again."""
+        if self.state != "open":
+            return 0.0
+        return max(self._opened_at + self._open_for - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; its outcome must be recorded."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state == "open":
+                if now - self._opened_at < self._open_for:
+                    return False
+                self._set_state("half_open")
+            # One probe at a time; a probe that never reported is replaced
+            if self._probe_at is not None and now - self._probe_at < self._open_for:
+                return False
+            self._probe_at = now
+            return True
+
+    def check(self):
+        """Raise CircuitOpen unless a call may go through now."""
+        if not self.allow():
+            inc("circuit_rejected_total", circuit=self.name)
+            raise CircuitOpen(self.name, self.retry_in() or self._open_for)
+
+    def record_success(self):
+        """The dependency answered (even with a non-transient error)."""
+        with self._lock:
+            self.failures = 0
+            self._probe_at = None
+            if self.state != "closed":
+                self._open_for = self.reset_timeout
+                self._set_state("closed")
+
+    def record_failure(self):
+        with self._lock:
+            self._probe_at = None
+            self.failures += 1
+            if self.state == "half_open":
+                self._open_for = min(self._open_for * 2, self.max_reset_timeout)
+                self._open()
+            elif self.state == "closed" and self.failures >= self.failure_threshold:
+                self._open()
+
+    def record_error(self, error):
+        """Record the outcome of a call that failed with ``error``."""
+        if is_transient(error):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._set_state("open")
+        logger.warning(
+            f"Circuit {self.name} opened after {self.failures} failure(s), "
+            f"retrying in {self._open_for:.0f}s"
+        )
+
+    def _set_state(self, state: str):
+        self.state = state
+        inc("circuit_transitions_total", circuit=self.name, state=state)
+
+
+class RetryBudget:
+    """Caps retries at a share of the calls made to a dependency.
+
+    Every call adds ``ratio`` of a token and every retry spends one, up to
+    ``max_tokens`` saved. During an outage most calls fail, and the budget
+    keeps retries from multiplying the load on top of them.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+_registry_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_budgets: Dict[str, RetryBudget] = {}
+
+
+def get_breaker(name: str, **settings) -> CircuitBreaker:
+    """The process-wide breaker of ``name``, created with ``settings``."""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **(settings or API_SETTINGS))
+        return _breakers[name]
+
+
+def get_budget(name: str) -> RetryBudget:
+    """The process-wide retry budget of ``name``."""
+    with _registry_lock:
+        return _budgets.setdefault(name, RetryBudget())
+
+
+def domain_breaker(url: str) -> CircuitBreaker:
+    """Breaker of the domain serving ``url``."""
+    netloc = urlparse(url).netloc.lower()
+    domain = netloc[4:] if netloc.startswith("www.") else netloc
+    return get_breaker(f"domain:{domain}", **DOMAIN_SETTINGS)
+
+
+def breakers() -> Dict[str, CircuitBreaker]:
+    """Snapshot of all breakers created in this process."""
+    with _registry_lock:
+        return dict(_breakers)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter: a random wait up to
+    ``base * 2 ** attempt`` seconds, so callers that failed together do not
+    retry together."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def _retry_wait(breaker, budget, error, attempt, attempts, base_delay, max_delay):
+    # Record a failed attempt; the wait before the next one, or None to give up
+    if not is_transient(error):
+        breaker.record_success()
+        return None
+    breaker.record_failure()
+    if attempt + 1 >= attempts or not budget.withdraw():
+        return None
+    inc("retries_total", circuit=breaker.name)
+    delay = backoff_delay(attempt, base_delay, max_delay)
+    logger.info(f"{breaker.name}: retry {attempt + 1} in {delay:.1f}s after: {error}")
+    return delay
+
+
+def call_with_retry(
+    func: Callable,
+    *args,
+    circuit: Union[str, CircuitBreaker],
+    attempts: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    **kwargs,
+):
+    """Call ``func`` behind a circuit breaker, retrying transient failures.
+
+    Retries wait with jittered exponential backoff and are drawn from the
+    retry budget of the circuit. Non-transient errors are raised at once.
+
+    Args:
+        func (callable): Blocking function to call
+        circuit (str | CircuitBreaker): Breaker or name of an API breaker,
+            e.g. "gemini"
+        attempts (int): Calls at most, including the first one
+
+    Raises:
+        CircuitOpen: The circuit is open; postpone the work
+    """
+    breaker = circuit if isinstance(circuit, CircuitBreaker) else get_breaker(circuit)
+    budget = get_budget(breaker.name)
+    budget.deposit()
+    for attempt in range(attempts):
+        breaker.check()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            delay = _retry_wait(
+                breaker, budget, e, attempt, attempts, base_delay, max_delay
+            )
+            if delay is None:
+                raise
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+async def acall_with_retry(
+    func: Callable,
+    *args,
+    circuit: Union[str, CircuitBreaker],
+    attempts: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    **kwargs,
+):
+    """Coroutine version of :func:`call_with_retry` for async ``func``."""
+    breaker = circuit if isinstance(circuit, CircuitBreaker) else get_breaker(circuit)
+    budget = get_budget(breaker.name)
+    budget.deposit()
+    for attempt in range(attempts):
+        breaker.check()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            delay = _retry_wait(
+                breaker, budget, e, attempt, attempts, base_delay, max_delay
+            )
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
@@ -1,2 +1,3 @@
 from .crawler import Crawler
-from .content_extractor import ContentExtractor
\ No newline at end of file
+from .content_extractor import ContentExtractor
+from .content_refresher import ContentRefresher
@@ -1,91 +1,290 @@
 import asyncio
-from crawl4ai import (
-    AsyncWebCrawler,
-    BrowserConfig,
-    CrawlerRunConfig,
-    DefaultMarkdownGenerator,
-)
-from langchain_qdrant import QdrantVectorStore, RetrievalMode
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from crawl4ai import CrawlerRunConfig, DefaultMarkdownGenerator
 
 from ..utils import (
     get_unprocessed_urls,
     mark_url_processed,
-    extract_metadata_and_content,
+    process_html,
+    process_markdown,
+    save_documents,
+    upsert_chunks,
+    point_id,
+    delete_points,
+    set_chunk_payloads,
+    get_browser_session,
+    run_with_browser,
+    StaticFetcher,
+    run_db,
+    BatchedWrites,
 )
-from ..config import filter, embeddings, client, collection_name_creator
+from ..config import filter, collection_name_creator
 from ..logger import get_logger
+from ..metrics import inc, observe, timer, usage_of, record_usage_delta
+from ..resilience import CircuitOpen, call_with_retry, domain_breaker
 
 
 class ContentExtractor:
-    def __init__(self, niche, limit, debug=False):
+    def __init__(
+        self,
+        niche,
+        limit,
+        debug=False,
+        progress=None,
+        concurrency=5,
+        min_score=0.75,
+        processes=None,
+        chunk_tokens=300,
+    ):
         self.niche = niche
         self.limit = limit
         self.debug = debug
+        self.progress = progress
+        # Pages fetched at the same time
+        self.concurrency = concurrency
+        # Local extraction below this score goes through the LLM filter
+        self.min_score = min_score
+        # Processes for parsing and chunking; 0 keeps it on the event loop
+        self.processes = min(4, os.cpu_count() or 1) if processes is None else processes
+        self.chunk_tokens = chunk_tokens
         self.logger = get_logger(__name__, debug=self.debug)
         self.logger.info(f"Content Extractor intialized with niche: {self.niche}")
 
     async def start(self):
+        """Extract and store the unprocessed pages of the niche.
+
+        Returns:
+            _dict_: Pages per outcome (success, postponed, failed)
+        """
         url_id, urls = await get_unprocessed_urls(niche=self.niche, limit=self.limit, debug=self.debug)
 
-        # MD generator
-        md_generator = DefaultMarkdownGenerator(
-            content_filter=filter, options={"ignore_links": True}
-        )
+        # MD generator; the LLM filter is only applied to pages the local
+        # extraction cannot handle, see _process()
+        md_generator = DefaultMarkdownGenerator(options={"ignore_links": True})
 
         # Crawler Config
         config = CrawlerRunConfig(
             markdown_generator=md_generator,
         )
 
-        # Text Splitter
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, chunk_overlap=100
-        )
-
         # Checking the collection name exists or not
         collection_name_creator(collection_name=self.niche)
 
-        vector_store = QdrantVectorStore(
-            client=client,
-            collection_name=self.niche,
-            embedding=embeddings,
-            retrieval_mode=RetrievalMode.DENSE,
-        )
+        # Crawling scraping data
+        session = get_browser_session()
+        fetcher = await run_db(StaticFetcher, self.niche)
+        documents = BatchedWrites(partial(save_documents, self.niche))
+        slots = asyncio.Semaphore(self.concurrency)
+        pool = ProcessPoolExecutor(self.processes) if self.processes else None
+        # (url_id, url) pairs: the same URL can be stored under two ids
+        pages = list(zip(url_id, urls))
+        # url_ids left unprocessed for a later run
+        postponed = set()
+        outcomes = {}
 
-        # Browser config
-        browser_config = BrowserConfig(headless=True, verbose=True)
+        def count(outcome):
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
 
-        # Crawling scraping data
-        try:
-            async with AsyncWebCrawler(config=browser_config) as crawler:
-                results = await crawler.arun_many(urls, config=config)
-                for result in results:
-                    if result.success:
-                        # print(result.markdown.fit_markdown)  # Debug only
-                        metadata, cleaned_markdown = extract_metadata_and_content(
-                            result.markdown.fit_markdown
+        async def handle(doc_id, url):
+            try:
+                # Plain GET first; the browser only for JS-rendered pages
+                async with slots:
+                    breaker = domain_breaker(url)
+                    breaker.check()
+                    with timer("fetch_page_seconds", niche=self.niche):
+                        page_html = await fetcher.fetch(url)
+                        result = await self._crawl(
+                            session, breaker, url, config, page_html
                         )
+                return doc_id, url, await self._process(result, md_generator, pool)
+            except CircuitOpen:
+                # Left unprocessed, a later run picks the page up
+                postponed.add(doc_id)
+                raise
 
-                    # print(metadata) # Debug only
-                    text_chunk = text_splitter.split_text(cleaned_markdown)
-                    try:
-                        vector_store.add_texts(
-                            texts=text_chunk, metadatas=[metadata] * len(text_chunk)
-                        )
+        usage_before = usage_of(filter)
+        try:
+            pending = [handle(doc_id, url) for doc_id, url in pages]
+            for done, next_page in enumerate(asyncio.as_completed(pending), start=1):
+                if self.progress:
+                    self.progress(done, len(urls))
+                try:
+                    doc_id, url, page = await next_page
+                except CircuitOpen as e:
+                    inc("extract_pages_total", niche=self.niche, status="postponed")
+                    count("postponed")
+                    self.logger.info(f"Page postponed: {e}")
+                    continue
+                except Exception as e:
+                    inc("extract_pages_total", niche=self.niche, status="failed")
+                    count("failed")
+                    print("Error:", e)
+                    continue
 
-                    except Exception as e:
-                        print("Embedding/Storage Error:", e)
+                inc("extract_pages_total", niche=self.niche, status="success")
+                # print(page.metadata) # Debug only
+                inc("chunks_total", len(page.chunks), niche=self.niche)
+                try:
+                    validators = fetcher.validators.get(url, (None, None))
+                    # Embedding and Qdrant calls block, run them off the loop
+                    document = await asyncio.to_thread(
+                        call_with_retry,
+                        self._store,
+                        doc_id,
+                        url,
+                        page,
+                        validators,
+                        circuit="vector_store",
+                    )
+                    await documents.add(document)
+                    count("success")
 
-                else:
-                    print("Error:", result.error_message)
+                except CircuitOpen as e:
+                    postponed.add(doc_id)
+                    count("postponed")
+                    self.logger.info(f"Page postponed: {e}")
+                except Exception as e:
+                    count("failed")
+                    print("Embedding/Storage Error:", e)
         except Exception as e:
-            self.logger.info(f"Error during content extraction: {e}")
+            # Pages are marked processed only after a complete pass; raised
+            # so a queued job is retried
+            self.logger.exception(f"Error during content extraction: {e}")
+            raise
+        finally:
+            record_usage_delta("llm_filter", filter, usage_before)
+            await documents.flush()
+            await run_db(fetcher.save)
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
 
-        mark_url_processed(url_ids=url_id, niche=self.niche, debug=False)
+        url_id = [doc_id for doc_id, _ in pages if doc_id not in postponed]
+        await run_db(mark_url_processed, url_ids=url_id, niche=self.niche, debug=False)
         self.logger.info("Saved to Database Qdrant")
+        return outcomes
+
+    def _store(self, doc_id, url, page, validators=(None, None), previous=None):
+        """Write a page's chunks to Qdrant.
+
+        Metadata is stored once per document; chunks only point to it. With
+        ``previous`` (the chunk hashes stored for the document) only the
+        difference is written: chunks that disappeared are deleted, new ones
+        are embedded, and moved ones get their new position in place.
+
+        Returns:
+            _tuple_: The documents row to save with save_documents()
+        """
+        hashes = [chunk_hash for _, _, chunk_hash in page.chunks]
+        ids = [point_id(doc_id, chunk_hash) for chunk_hash in hashes]
+        payloads = [
+            {"doc_id": doc_id, "position": position, "section": section}
+            for position, (_, section, _) in enumerate(page.chunks)
+        ]
+
+        new = list(range(len(hashes)))
+        if previous is not None and not previous:
+            # Stored before chunks had stable ids, so start over
+            delete_points(self.niche, doc_id=doc_id)
+        elif previous:
+            old_positions = {chunk_hash: i for i, chunk_hash in enumerate(previous)}
+            removed = set(previous) - set(hashes)
+            delete_points(self.niche, ids=[point_id(doc_id, h) for h in removed])
+            new = [i for i, h in enumerate(hashes) if h not in old_positions]
+            moved = {
+                ids[i]: payloads[i]
+                for i, h in enumerate(hashes)
+                if h in old_positions and old_positions[h] != i
+            }
+            set_chunk_payloads(self.niche, moved)
+            inc("chunks_deleted_total", len(removed), niche=self.niche)
+            inc("chunks_moved_total", len(moved), niche=self.niche)
+
+        upsert_chunks(
+            collection_name=self.niche,
+            texts=[page.chunks[i][0] for i in new],
+            metadatas=[payloads[i] for i in new],
+            ids=[ids[i] for i in new],
+        )
+        inc("chunks_embedded_total", len(new), niche=self.niche)
+        return (doc_id, url, page.metadata, hashes, *validators, page.source_hash)
+
+    async def _crawl(self, session, breaker, url, config, page_html=None):
+        """Crawl a page (or render fetched HTML) and record the outcome on the
+        circuit breaker of its domain.
+
+        Raises:
+            RuntimeError: The crawl failed
+        """
+        try:
+            if page_html is not None:
+                result = await session.arun_raw(page_html, url, config)
+            else:
+                result = await session.arun(url, config)
+        except Exception as e:
+            breaker.record_error(e)
+            raise
+        if not result.success:
+            breaker.record_error(result.error_message)
+            raise RuntimeError(result.error_message)
+        breaker.record_success()
+        return result
+
+    async def _cpu(self, pool, func, *args):
+        """Run CPU-bound page work in the process pool, or inline without one."""
+        if pool is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+    async def _process(self, result, md_generator, pool, known_hash=None):
+        """Metadata and chunks of a crawled page.
+
+        Readability-style extraction runs first; the Gemini content filter is
+        only called when its score is below ``min_score``. Parsing and
+        chunking happen in the process pool, and only the metadata and chunk
+        texts come back. When the readability output hashes to
+        ``known_hash`` the page has not changed and is returned as it is,
+        without calling the filter.
+        """
+        with timer("page_processing_seconds", niche=self.niche):
+            page = await self._cpu(
+                pool,
+                process_html,
+                result.html,
+                result.url,
+                self.min_score,
+                self.chunk_tokens,
+            )
+        observe("readability_score", page.score, niche=self.niche)
+        if known_hash is not None and page.source_hash == known_hash:
+            return page
+        if page.score >= self.min_score:
+            inc("extract_engine_total", niche=self.niche, engine="readability")
+            return page
+
+        inc("extract_engine_total", niche=self.niche, engine="llm_filter")
+        self.logger.info(
+            f"Low readability score {page.score} for {result.url}, using LLM"
+        )
+        # The filter blocks on Gemini calls, keep it off the event loop
+        filtered = await asyncio.to_thread(
+            call_with_retry,
+            md_generator.generate_markdown,
+            circuit="gemini",
+            input_html=result.cleaned_html,
+            base_url=result.url,
+            content_filter=filter,
+        )
+        # print(filtered.fit_markdown)  # Debug only
+        with timer("page_processing_seconds", niche=self.niche):
+            filtered_page = await self._cpu(
+                pool, process_markdown, filtered.fit_markdown, self.chunk_tokens
+            )
+        return filtered_page._replace(source_hash=page.source_hash)
 
 
 if __name__ == "__main__":
-    con_scrap = ContentExtractor(niche="ai_ml")
-    asyncio.run(con_scrap.start())
+    con_scrap = ContentExtractor(niche="ai_ml", limit=5)
+    run_with_browser(con_scrap.start())
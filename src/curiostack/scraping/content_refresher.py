@@ -0,0 +1,181 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from crawl4ai import CrawlerRunConfig, DefaultMarkdownGenerator
+
+from .content_extractor import ContentExtractor
+from ..utils import (
+    due_documents,
+    save_documents,
+    touch_documents,
+    conditional_get,
+    get_browser_session,
+    run_with_browser,
+    StaticFetcher,
+    run_db,
+    BatchedWrites,
+)
+from ..config import filter, collection_name_creator
+from ..metrics import inc, timer, usage_of, record_usage_delta
+from ..resilience import CircuitOpen, call_with_retry, domain_breaker
+
+
+class ContentRefresher(ContentExtractor):
+    """Re-checks already extracted articles and rewrites only what changed.
+
+    Each due document is fetched with ``If-None-Match``/``If-Modified-Since``.
+    A 304 or an identical content hash only records the check; a changed
+    article has its chunk hashes diffed against the stored ones, so Qdrant
+    work is proportional to the chunks that actually changed. Only a 200 is
+    re-extracted: a 404/410 records the article as gone and keeps its
+    chunks, any other status counts as a failed check.
+
+    A 200 goes through the same static-or-browser decision as extraction,
+    and its readability output is hashed before the LLM filter is
+    considered, so an unchanged article never costs a Gemini call.
+    """
+
+    def __init__(
+        self, niche, limit=50, debug=False, progress=None, max_age_hours=24, **kwargs
+    ):
+        super().__init__(niche, limit, debug=debug, progress=progress, **kwargs)
+        # Documents checked more recently than this are left alone
+        self.max_age_hours = max_age_hours
+
+    async def start(self):
+        """Re-check the due documents of the niche.
+
+        Returns:
+            _dict_: Documents per outcome (changed, unchanged, not_modified,
+            gone, empty, postponed, failed)
+        """
+        documents = await run_db(
+            due_documents, self.niche, self.max_age_hours, self.limit
+        )
+        if not documents:
+            self.logger.info(f"No documents due for a refresh in {self.niche}")
+            return {}
+
+        md_generator = DefaultMarkdownGenerator(options={"ignore_links": True})
+        config = CrawlerRunConfig(markdown_generator=md_generator)
+        collection_name_creator(collection_name=self.niche)
+
+        session = get_browser_session()
+        fetcher = await run_db(StaticFetcher, self.niche)
+        slots = asyncio.Semaphore(self.concurrency)
+        pool = ProcessPoolExecutor(self.processes) if self.processes else None
+        changed = BatchedWrites(partial(save_documents, self.niche))
+        checked = BatchedWrites(partial(touch_documents, self.niche))
+
+        async def check(doc):
+            async with slots:
+                breaker = domain_breaker(doc["url"])
+                breaker.check()
+                with timer("fetch_page_seconds", niche=self.niche):
+                    status, page_html, etag, last_modified = await conditional_get(
+                        doc["url"], doc["etag"], doc["last_modified"]
+                    )
+                    if status in (304, 404, 410):
+                        breaker.record_success()
+                        return doc, None, (etag, last_modified), status
+                    if status != 200:
+                        error = f"HTTP {status or 'connection failed'} for {doc['url']}"
+                        breaker.record_error(error)
+                        raise RuntimeError(error)
+                    # The browser renders pages whose static HTML is a shell
+                    page_html = fetcher.accept(doc["url"], page_html)
+                    result = await self._crawl(
+                        session, breaker, doc["url"], config, page_html
+                    )
+            page = await self._process(
+                result, md_generator, pool, known_hash=doc["source_hash"]
+            )
+            return doc, page, (etag, last_modified), status
+
+        outcomes = {}
+
+        def count(outcome):
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        usage_before = usage_of(filter)
+        try:
+            pending = [check(doc) for doc in documents]
+            for done, next_check in enumerate(asyncio.as_completed(pending), start=1):
+                if self.progress:
+                    self.progress(done, len(documents))
+                try:
+                    doc, page, validators, status = await next_check
+                except CircuitOpen as e:
+                    # Not touched, so the document stays due for the next run
+                    outcome = "postponed"
+                    inc("refresh_documents_total", niche=self.niche, outcome=outcome)
+                    count(outcome)
+                    self.logger.info(f"Refresh postponed: {e}")
+                    continue
+                except Exception as e:
+                    inc("refresh_documents_total", niche=self.niche, outcome="failed")
+                    count("failed")
+                    self.logger.warning(f"Refresh check failed: {e}")
+                    continue
+
+                if status in (404, 410):
+                    # Recorded as checked so it is not fetched again every run
+                    outcome = "gone"
+                    self.logger.info(f"Article gone ({status}): {doc['url']}")
+                elif page is None:
+                    outcome = "not_modified"
+                elif (
+                    page.source_hash == doc["source_hash"]
+                    or page.content_hash == doc["content_hash"]
+                ):
+                    outcome = "unchanged"
+                elif not page.chunks:
+                    # Likely a broken fetch; keep what we have
+                    outcome = "empty"
+                else:
+                    outcome = "changed"
+                inc("refresh_documents_total", niche=self.niche, outcome=outcome)
+
+                try:
+                    if outcome == "changed":
+                        self.logger.info(f"Article changed: {doc['url']}")
+                        document = await asyncio.to_thread(
+                            call_with_retry,
+                            self._store,
+                            doc["id"],
+                            doc["url"],
+                            page,
+                            validators,
+                            doc["chunk_hashes"],
+                            circuit="vector_store",
+                        )
+                        await changed.add(document)
+                    else:
+                        source_hash = page.source_hash if page else None
+                        await checked.add((doc["id"], *validators, source_hash))
+                    count(outcome)
+                except CircuitOpen as e:
+                    count("postponed")
+                    self.logger.info(f"Refresh postponed: {e}")
+                except Exception as e:
+                    count("failed")
+                    self.logger.error(f"Storing {doc['url']} failed: {e}")
+        except Exception as e:
+            self.logger.exception(f"Error during content refresh: {e}")
+            raise
+        finally:
+            record_usage_delta("llm_filter", filter, usage_before)
+            await changed.flush()
+            await checked.flush()
+            await run_db(fetcher.save)
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        self.logger.info(f"Refreshed {len(documents)} documents in {self.niche}")
+        return outcomes
+
+
+if __name__ == "__main__":
+    refresher = ContentRefresher(niche="ai_ml", limit=5)
+    run_with_browser(refresher.start())
@@ -1,58 +1,193 @@
-import json
 import asyncio
-from crawl4ai import AsyncWebCrawler
-from ..config import browser_conf, run_config
-from ..utils import save_data, niches_urls
+from ..config import run_config
+from ..utils import (
+    save_data,
+    niches_urls,
+    known_urls,
+    rejected_links,
+    save_rejected_links,
+    listing_links,
+    compact_listing,
+    get_browser_session,
+    run_with_browser,
+    SourceScheduler,
+    run_db,
+)
 from ..logger import get_logger
+from ..metrics import inc, observe, timer, usage_of, record_usage_delta
+from ..resilience import CircuitOpen, call_with_retry, domain_breaker
 
 
 class Crawler:
-    def __init__(self, niche, debug=False):
+    def __init__(self, niche, debug=False, progress=None, force=False):
         self.logger = get_logger(__name__, debug=debug)
         self.niche = niche
+        self.progress = progress
+        # Crawl every source, not only the ones the scheduler says are due
+        self.force = force
         self.logger.info(f"Crawler initialized with niche={niche}")
 
     async def start(self):
+        """Crawl the due sources of the niche.
+
+        Returns:
+            _dict_: Sources per outcome (new_urls, no_new_urls, postponed,
+            failed)
+        """
         # Load URLs
         self.logger.info(f"Starting crawl for niche={self.niche}")
 
-        self.urls = niches_urls(niche=self.niche)
+        # SQLite work goes to the database thread, off the event loop
+        scheduler = await run_db(SourceScheduler, self.niche)
+        sources = niches_urls(niche=self.niche)
+        self.urls = sources if self.force else await run_db(scheduler.due, sources)
+        skipped = len(sources) - len(self.urls)
+        inc("crawl_sources_skipped_total", skipped, niche=self.niche)
+        if not self.urls:
+            self.logger.info(f"No sources due for niche={self.niche}")
+            return {}
+        self.logger.info(f"{len(self.urls)}/{len(sources)} sources due")
+
+        # Sources on a domain that keeps failing wait for its circuit instead
+        # of timing out again
+        self.urls = await self._skip_open_domains(scheduler, self.urls)
+        if not self.urls:
+            return {}
 
-        # Crawl config
+        # Crawl config; the LLM extraction runs on the compacted page instead
+        # of the page markdown, so the crawl itself does not extract
         self.run_conf = run_config()
+        strategy = self.run_conf.extraction_strategy
+        crawl_conf = self.run_conf.clone(extraction_strategy=None)
+        known = await run_db(known_urls, self.niche)
 
-        self.browser_conf = browser_conf()
-        final_filtered_data = []
+        outcomes = {}
+        usage_before = usage_of(strategy)
 
         try:
-            # Crawl and extract using recommended loop
-            async with AsyncWebCrawler(config=self.browser_conf) as crawler:
-                results = await crawler.arun_many(urls=self.urls, config=self.run_conf)
-                for result in results:
-                    if result.success and result.extracted_content:
-                        blog = result.extracted_content
-
-                        # print(blog)  # For Debug
-
-                        raw_json_string = blog  # your entire JSON string goes here
-                        try:
-                            blog_data = json.loads(raw_json_string)
-                        except json.JSONDecodeError:
-                            print("Invalid JSON string.")
-                            blog_data = []
-
-                        # Optional: filter out error entries
-                        filtered_data = [
-                            item for item in blog_data if not item.get("error", False)
-                        ]
-
-                        final_filtered_data.extend(filtered_data)
-
-            save_data(final_filtered_data, niche=self.niche)
+            # Results are handled as they stream in, and every source is
+            # saved and recorded on its own: a failure loses only that source
+            session = get_browser_session()
+            with timer("crawl_batch_seconds", niche=self.niche):
+                done = 0
+                async for result in session.stream_many(self.urls, crawl_conf):
+                    done += 1
+                    if self.progress:
+                        self.progress(done, len(self.urls))
+                    self._record_page(result)
+                    try:
+                        new_urls = await self._save_source(result, strategy, known)
+                    except CircuitOpen as e:
+                        # The LLM is unavailable; try the source again later
+                        self.logger.info(f"Source postponed: {result.url}: {e}")
+                        await run_db(scheduler.postpone, result.url, e.retry_in)
+                        outcome = "postponed"
+                    except Exception as e:
+                        self.logger.warning(f"Source failed: {result.url}: {e}")
+                        await run_db(scheduler.record, result.url, False, error=str(e))
+                        outcome = "failed"
+                    else:
+                        await run_db(
+                            scheduler.record, result.url, True, new_urls=new_urls
+                        )
+                        outcome = "new_urls" if new_urls else "no_new_urls"
+                    outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                    inc("crawl_sources_total", niche=self.niche, outcome=outcome)
         except Exception as e:
+            # Fatal for the stage (the browser died, the database is gone):
+            # raised so a queued job is retried
             self.logger.exception(f"Crawling failed for niche={self.niche}: {e}")
+            raise
+        finally:
+            record_usage_delta("llm_extraction", strategy, usage_before)
+        self.logger.info(f"Crawled {self.niche}: {outcomes}")
+        return outcomes
+
+    async def _save_source(self, result, strategy, known):
+        """Extract and store the new article links of one source page.
+
+        Returns:
+            _int_: Number of URLs that were not in the database yet
+        """
+        breaker = domain_breaker(result.url)
+        if not result.success:
+            breaker.record_error(result.error_message)
+            raise RuntimeError(result.error_message)
+        breaker.record_success()
+
+        # Only links that are neither stored nor rejected before go to the LLM
+        rejected = await run_db(rejected_links, self.niche, result.url)
+        links = listing_links(result.html, result.url, known, rejected)
+        if not links:
+            return 0
+        listing = compact_listing(result.url, links)
+        self._record_compaction(result, listing)
+        blog_data = await asyncio.to_thread(
+            call_with_retry,
+            _extract_links,
+            strategy,
+            result.url,
+            listing,
+            circuit="gemini",
+        )
+
+        # Optional: filter out error entries
+        filtered_data = [item for item in blog_data if not item.get("error", False)]
+        inc("crawl_links_found_total", len(filtered_data), niche=self.niche)
+
+        # One small transaction per source
+        new_urls = await run_db(save_data, filtered_data, niche=self.niche)
+        inc("crawl_new_urls_total", new_urls, niche=self.niche)
+        accepted = {item.get("url") for item in filtered_data}
+        known.update(accepted)
+        # Navigation or category links the model passed over are not sent
+        # again on the next crawl of this source
+        skipped = [link.url for link in links if link.url not in accepted]
+        await run_db(save_rejected_links, self.niche, result.url, skipped)
+        inc("crawl_links_rejected_total", len(skipped), niche=self.niche)
+        return new_urls
+
+    async def _skip_open_domains(self, scheduler, urls):
+        due = []
+        for url in urls:
+            breaker = domain_breaker(url)
+            if breaker.state == "open" and breaker.retry_in():
+                await run_db(scheduler.postpone, url, breaker.retry_in())
+                inc("crawl_sources_total", niche=self.niche, outcome="postponed")
+            else:
+                due.append(url)
+        skipped = len(urls) - len(due)
+        if skipped:
+            self.logger.info(f"Postponed {skipped} source(s) on open circuits")
+        return due
+
+    def _record_compaction(self, result, listing):
+        # Prompt size before (page markdown) and after the link reduction
+        page_chars = len(result.markdown or "")
+        inc("listing_chars_total", page_chars, niche=self.niche, stage="page")
+        inc("listing_chars_total", len(listing), niche=self.niche, stage="compact")
+
+    def _record_page(self, result):
+        status = "success" if result.success else "failed"
+        inc("crawl_pages_total", niche=self.niche, status=status)
+        # crawl4ai attaches per-URL timings when dispatching with arun_many
+        dispatch = getattr(result, "dispatch_result", None)
+        if dispatch is not None and dispatch.start_time and dispatch.end_time:
+            elapsed = dispatch.end_time - dispatch.start_time
+            if hasattr(elapsed, "total_seconds"):
+                elapsed = elapsed.total_seconds()
+            observe("crawl_page_seconds", elapsed, niche=self.niche, status=status)
+
+
+def _extract_links(strategy, url, listing):
+    blocks = strategy.run(url, [listing])
+    errors = [block for block in blocks if block.get("error", False)]
+    if blocks and len(errors) == len(blocks):
+        # crawl4ai reports a failed LLM call as error blocks instead of raising
+        raise RuntimeError(errors[0].get("content") or "LLM extraction failed")
+    return blocks
 
 
 if __name__ == "__main__":
     ai_ml = Crawler(niche="ai_ml")
-    asyncio.run(ai_ml.start())
+    run_with_browser(ai_ml.start())
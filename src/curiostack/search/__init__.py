@@ -0,0 +1,2 @@
+from .service import LRUCache, SearchService, normalize_query
+from .server import create_app, run_server
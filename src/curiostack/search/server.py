@@ -0,0 +1,109 @@
+from typing import Optional
+
+from aiohttp import web
+
+from .service import SearchService
+from .. import metrics
+from ..logger import get_logger
+from ..metrics import inc
+from ..resilience import CircuitOpen
+
+logger = get_logger(__name__)
+
+MAX_RESULTS = 50
+
+SERVICE = web.AppKey("service", SearchService)
+
+
+@web.middleware
+async def _cors(request, handler):
+    # Read-only public data: the website may call the API from the browser
+    response = await handler(request)
+    response.headers["Access-Control-Allow-Origin"] = request.app["cors_origin"]
+    return response
+
+
+async def search(request: web.Request) -> web.Response:
+    """GET /search?q=<query>[&niche=<niche>...][&k=<documents>]"""
+    query = request.query.get("q", "")
+    niches = request.query.getall("niche", [])
+    try:
+        k = min(max(int(request.query.get("k", 10)), 1), MAX_RESULTS)
+    except ValueError:
+        return _error(400, "k must be an integer")
+
+    try:
+        result = await request.app[SERVICE].search(query, niches, k)
+    except ValueError as e:
+        return _error(400, str(e))
+    except CircuitOpen as e:
+        response = _error(503, str(e))
+        response.headers["Retry-After"] = str(max(int(e.retry_in), 1))
+        return response
+    except Exception as e:
+        logger.exception(f"Search failed for {query!r}: {e}")
+        return _error(502, "Search backend unavailable")
+    inc("search_requests_total", status=200, cached=result["cached"])
+    return web.json_response(result)
+
+
+async def niches(request: web.Request) -> web.Response:
+    """GET /niches: the searchable collections."""
+    return web.json_response({"niches": await request.app[SERVICE].niches()})
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+async def prometheus(request: web.Request) -> web.Response:
+    return web.Response(
+        text=metrics.registry.to_prometheus(), content_type="text/plain"
+    )
+
+
+def _error(status: int, message: str) -> web.Response:
+    inc("search_requests_total", status=status, cached=False)
+    return web.json_response({"error": message}, status=status)
+
+
+def create_app(
+    service: Optional[SearchService] = None, cors_origin: str = "*"
+) -> web.Application:
+    """The search API application.
+
+    Args:
+        service (SearchService, optional): Service to serve; one on the
+            configured Qdrant server by default. Pass one with a local or
+            in-memory client to test the API.
+        cors_origin (str): Value of Access-Control-Allow-Origin
+    """
+    app = web.Application(middlewares=[_cors])
+    app["cors_origin"] = cors_origin
+
+    async def start(app):
+        # Created on the serving loop; the async Qdrant client binds to it
+        app[SERVICE] = service or SearchService()
+
+    async def stop(app):
+        await app[SERVICE].close()
+
+    app.on_startup.append(start)
+    app.on_cleanup.append(stop)
+    app.router.add_get("/search", search)
+    app.router.add_get("/niches", niches)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", prometheus)
+    return app
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8080, cors_origin: str = "*"):
+    """Serve the search API until interrupted."""
+    logger.info(f"Search API listening on http://{host}:{port}")
+    web.run_app(
+        create_app(cors_origin=cors_origin),
+        host=host,
+        port=port,
+        access_log=None,
+        print=None,
+    )
@@ -0,0 +1,272 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from ..config import embeddings as default_embeddings, async_client
+from ..utils import get_documents, run_db
+from ..utils.vector.vector_helper import CONTENT_KEY, METADATA_KEY
+from ..logger import get_logger
+from ..metrics import inc, timer
+from ..resilience import acall_with_retry
+
+
+class LRUCache:
+    """Least-recently-used cache with an optional time to live.
+
+    Only touched from the event loop, so it needs no lock.
+
+    Args:
+        name (str): Label of the cache in the metrics
+        maxsize (int): Entries kept
+        ttl (float, optional): Seconds an entry stays valid; forever if None
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: Optional[float] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is not None and (self.ttl is None or entry[1] > time.monotonic()):
+            self._entries.move_to_end(key)
+            inc("search_cache_total", cache=self.name, outcome="hit")
+            return entry[0]
+        if entry is not None:
+            del self._entries[key]
+        inc("search_cache_total", cache=self.name, outcome="miss")
+        return None
+
+    def set(self, key: Hashable, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: case and whitespace do not change the vector."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchService:
+    """Semantic search over the niche collections in Qdrant.
+
+    A query is embedded once (query vectors are kept in an LRU cache), the
+    requested niche collections are searched concurrently, and the chunks
+    found are grouped by document, ranked by their best chunk and joined
+    with the document metadata. Whole responses are cached for ``ttl``
+    seconds, except degraded ones (a niche failed), and concurrent requests
+    for the same uncached query share one embedding call and one search.
+
+    Args:
+        client: ``AsyncQdrantClient``; a local or ``:memory:`` client works
+            for tests. Defaults to the configured server.
+        embeddings: LangChain embeddings used for the queries
+        documents (callable): ``(niche, doc_ids) -> {doc_id: metadata}``,
+            blocking; runs on the database thread
+        ttl (float): Seconds a response stays cached
+        chunks_per_document (int): Matching chunks returned per document
+    """
+
+    def __init__(
+        self,
+        client=None,
+        embeddings=None,
+        documents: Callable = get_documents,
+        ttl: float = 60.0,
+        query_cache_size: int = 10_000,
+        response_cache_size: int = 2_048,
+        chunks_per_document: int = 3,
+    ):
+        self.client = client or async_client()
+        self.embeddings = embeddings or default_embeddings
+        self.documents = documents
+        self.chunks_per_document = chunks_per_document
+        self.logger = get_logger(__name__)
+        self.vectors = LRUCache("query_vectors", query_cache_size)
+        self.responses = LRUCache("responses", response_cache_size, ttl=ttl)
+        self.metadata = LRUCache("documents", 20_000, ttl=10 * ttl)
+        self.collections = LRUCache("collections", 1, ttl=ttl)
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+    async def close(self):
+        await self.client.close()
+
+    async def _once(
+        self,
+        cache: LRUCache,
+        key: Hashable,
+        compute: Callable,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ):
+        # Cached value of key; concurrent misses await the same computation,
+        # which a disconnecting client does not cancel. Results rejected by
+        # cacheable are shared with those waiters but not stored
+        value = cache.get(key)
+        if value is not None:
+            return value, True
+        task = self._inflight.get((cache.name, key))
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[(cache.name, key)] = task
+
+            def done(finished):
+                self._inflight.pop((cache.name, key), None)
+                if finished.cancelled() or finished.exception() is not None:
+                    return
+                if cacheable is None or cacheable(finished.result()):
+                    cache.set(key, finished.result())
+
+            task.add_done_callback(done)
+        return await asyncio.shield(task), False
+
+    async def niches(self) -> List[str]:
+        """Names of the niche collections, refreshed every ``ttl`` seconds."""
+
+        async def fetch():
+            response = await acall_with_retry(
+                self.client.get_collections, circuit="vector_store", attempts=2
+            )
+            return sorted(collection.name for collection in response.collections)
+
+        names, _ = await self._once(self.collections, "all", fetch)
+        return names
+
+    async def _embed(self, query: str) -> List[float]:
+        aembed = getattr(self.embeddings, "aembed_query", None)
+        with timer("search_embedding_seconds"):
+            if aembed is not None:
+                vector = await acall_with_retry(
+                    aembed, query, circuit="embeddings", attempts=2, max_delay=1.0
+                )
+            else:
+                vector = await asyncio.to_thread(self.embeddings.embed_query, query)
+        inc("api_calls_total", api="embeddings")
+        return vector
+
+    async def _metadata(self, niche: str, doc_ids: List) -> Dict:
+        found, missing = {}, []
+        for doc_id in set(doc_ids):
+            meta = self.metadata.get((niche, doc_id))
+            if meta is None:
+                missing.append(doc_id)
+            else:
+                found[doc_id] = meta
+        if missing:
+            loaded = await run_db(self.documents, niche, missing)
+            for doc_id in missing:
+                meta = loaded.get(doc_id, {})
+                self.metadata.set((niche, doc_id), meta)
+                found[doc_id] = meta
+        return found
+
+    async def _search_niche(
+        self, niche: str, vector: List[float], k: int
+    ) -> List[dict]:
+        # Enough chunks that k documents can each show a few of them
+        limit = k * self.chunks_per_document * 2
+        with timer("qdrant_search_seconds", collection=niche):
+            response = await acall_with_retry(
+                self.client.query_points,
+                collection_name=niche,
+                query=vector,
+                limit=limit,
+                with_payload=True,
+                circuit="vector_store",
+                attempts=2,
+                max_delay=0.5,
+            )
+        inc("qdrant_search_calls_total", collection=niche)
+
+        # Points come best first, so the first chunk of a document is its best
+        by_document: "OrderedDict[object, dict]" = OrderedDict()
+        for point in response.points:
+            payload = point.payload or {}
+            meta = payload.get(METADATA_KEY) or {}
+            doc_id = meta.get("doc_id", point.id)
+            document = by_document.setdefault(
+                doc_id,
+                {"niche": niche, "doc_id": doc_id, "score": point.score, "chunks": []},
+            )
+            if len(document["chunks"]) < self.chunks_per_document:
+                document["chunks"].append(
+                    {
+                        "text": payload.get(CONTENT_KEY, ""),
+                        "section": meta.get("section"),
+                        "position": meta.get("position"),
+                        "score": point.score,
+                    }
+                )
+
+        documents = list(by_document.values())[:k]
+        metadata = await self._metadata(niche, [doc["doc_id"] for doc in documents])
+        for document in documents:
+            document["metadata"] = metadata.get(document["doc_id"], {})
+        return documents
+
+    async def search(
+        self, query: str, niches: Optional[List[str]] = None, k: int = 10
+    ) -> dict:
+        """Documents matching ``query``, best first.
+
+        Args:
+            query (str): Free-text query
+            niches (list, optional): Collections to search; all when empty
+            k (int): Documents returned
+
+        Returns:
+            dict: ``results`` (documents with their score, metadata and best
+            chunks), the niches searched, per-niche ``errors`` and whether
+            the response came from the cache.
+
+        Raises:
+            ValueError: Empty query, or a niche that has no collection
+        """
+        text = normalize_query(query)
+        if not text:
+            raise ValueError("Empty query")
+        available = await self.niches()
+        unknown = sorted(set(niches or ()) - set(available))
+        if unknown:
+            raise ValueError(f"Unknown niche(s): {', '.join(unknown)}")
+        targets = sorted(set(niches)) if niches else available
+
+        async def compute():
+            vector, _ = await self._once(self.vectors, text, lambda: self._embed(text))
+            found = await asyncio.gather(
+                *(self._search_niche(niche, vector, k) for niche in targets),
+                return_exceptions=True,
+            )
+            results, errors = [], {}
+            for niche, documents in zip(targets, found):
+                if isinstance(documents, BaseException):
+                    # One failing collection does not fail the whole search
+                    self.logger.warning(f"Search in {niche} failed: {documents}")
+                    errors[niche] = str(documents)
+                else:
+                    results.extend(documents)
+            if errors and len(errors) == len(targets):
+                raise next(d for d in found if isinstance(d, BaseException))
+            results.sort(key=lambda document: document["score"], reverse=True)
+            return {"results": results[:k], "niches": targets, "errors": errors}
+
+        with timer("search_seconds"):
+            # A response missing a failed niche is not kept for ttl seconds
+            response, cached = await self._once(
+                self.responses,
+                (text, tuple(targets), k),
+                compute,
+                cacheable=lambda response: not response["errors"],
+            )
+        return {"query": query, **response, "cached": cached}
@@ -1,7 +1,57 @@
-from .crawler import save_data, niches_urls
+from .crawler import (
+    save_data,
+    niches_urls,
+    known_urls,
+    rejected_links,
+    save_rejected_links,
+    SourceScheduler,
+    listing_links,
+    compact_listing,
+)
 from .content import (
     get_unprocessed_urls,
     mark_url_processed,
     extract_metadata_and_content,
+    readability_extract,
+    MarkdownChunker,
+    process_html,
+    process_markdown,
+    save_document,
+    save_documents,
+    get_documents,
+    due_documents,
+    touch_document,
+    touch_documents,
+    repair_json,
+)
+from .content.writer_helper import get_titles, content_save, topic_urls, mark_written
+from .content.topic_helper import (
+    TopicCluster,
+    title_vectors,
+    written_posts,
+    cluster_topics,
+    link_sources,
+)
+from .vector import (
+    upsert_chunks,
+    point_id,
+    delete_points,
+    set_chunk_payloads,
+    embed_queries,
+    search_batch,
+    compact_collection,
+    sync_collections,
+)
+from .browser import (
+    BrowserSession,
+    get_browser_session,
+    close_browser_session,
+    run_with_browser,
+)
+from .fetch import (
+    StaticFetcher,
+    conditional_get,
+    get_http_session,
+    close_http_session,
 )
-from .content.writer_helper import get_titles, content_save
+from .db import run_db, BatchedWrites
@@ -0,0 +1,6 @@
+from .browser_helper import (
+    BrowserSession,
+    get_browser_session,
+    close_browser_session,
+    run_with_browser,
+)
@@ -0,0 +1,221 @@
+import asyncio
+from contextlib import asynccontextmanager
+from crawl4ai import AsyncWebCrawler
+from ..fetch import close_http_session
+from ...config import browser_conf
+from ...logger import get_logger
+from ...metrics import inc
+
+logger = get_logger(__name__, debug=False)
+
+# Errors Playwright raises once Chromium has crashed or been closed
+CRASH_MARKERS = ("has been closed", "target closed", "crash", "disconnected")
+
+
+class BrowserSession:
+    """One long-lived headless browser per process.
+
+    Wraps a started ``AsyncWebCrawler`` shared by the crawl and extract
+    stages. Single-page work (redirect resolution, ...) goes through a pool
+    of crawl4ai sessions so pages are reused; a page is recycled after
+    ``max_page_uses`` uses. A crashed browser is restarted and the call
+    retried once.
+    """
+
+    def __init__(self, browser_config=None, pages=4, max_page_uses=50):
+        self.browser_config = browser_config or browser_conf()
+        self.pages = pages
+        self.max_page_uses = max_page_uses
+        self.loop = asyncio.get_running_loop()
+        self._crawler = None
+        # Bumped on every browser start, so callers that saw the same crash
+        # restart it only once
+        self.generation = 0
+        self._lock = asyncio.Lock()
+        self._idle = asyncio.Queue()
+        self._uses = {}
+        for n in range(pages):
+            session_id = f"curiostack-page-{n}"
+            self._uses[session_id] = 0
+            self._idle.put_nowait(session_id)
+
+    def _is_alive(self):
+        if self._crawler is None:
+            return False
+        # Reach into crawl4ai's browser manager when it exposes one
+        manager = getattr(self._crawler.crawler_strategy, "browser_manager", None)
+        browser = getattr(manager, "browser", None)
+        if browser is not None and hasattr(browser, "is_connected"):
+            return browser.is_connected()
+        return True
+
+    async def get_crawler(self):
+        """Return the shared crawler, starting or restarting it if needed."""
+        async with self._lock:
+            return await self._ensure_crawler()
+
+    async def _ensure_crawler(self):
+        # Called with the lock held
+        if not self._is_alive():
+            if self._crawler is not None:
+                logger.warning("Shared browser is gone, restarting it")
+                inc("browser_restarts_total")
+                await self._close_crawler()
+            self._crawler = AsyncWebCrawler(config=self.browser_config)
+            await self._crawler.start()
+            self.generation += 1
+            inc("browser_starts_total")
+            for session_id in self._uses:
+                self._uses[session_id] = 0
+        return self._crawler
+
+    async def _close_crawler(self):
+        crawler, self._crawler = self._crawler, None
+        if crawler is not None:
+            try:
+                await crawler.close()
+            except Exception as e:
+                logger.debug(f"Error closing browser: {e}")
+
+    async def restart(self, generation=None):
+        """Restart the browser after a crash and return the new crawler.
+
+        Args:
+            generation (int, optional): ``self.generation`` when the caller
+                got the crawler that failed. If the browser was restarted
+                since, the current crawler is returned instead of killing
+                it again together with the pages of other callers.
+        """
+        async with self._lock:
+            if generation is None or generation == self.generation:
+                await self._close_crawler()
+            return await self._ensure_crawler()
+
+    @staticmethod
+    def _crashed(error):
+        message = str(error).lower()
+        return any(marker in message for marker in CRASH_MARKERS)
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrow a pooled page, identified by its crawl4ai session id."""
+        session_id = await self._idle.get()
+        try:
+            crawler = await self.get_crawler()
+            if self._uses[session_id] >= self.max_page_uses:
+                await crawler.crawler_strategy.kill_session(session_id)
+                self._uses[session_id] = 0
+                inc("browser_page_recycles_total")
+            self._uses[session_id] += 1
+            yield session_id
+        finally:
+            self._idle.put_nowait(session_id)
+
+    async def arun(self, url, config):
+        """Crawl one URL on a pooled page."""
+        async with self.page() as session_id:
+            config = config.clone(session_id=session_id)
+            crawler = await self.get_crawler()
+            generation = self.generation
+            try:
+                return await crawler.arun(url, config=config)
+            except Exception as e:
+                if not self._crashed(e):
+                    raise
+                crawler = await self.restart(generation)
+                return await crawler.arun(url, config=config)
+
+    async def arun_raw(self, html, url, config):
+        """Run crawl4ai's scraping and markdown pipeline on HTML we already
+        fetched. ``raw:`` input does not open a page in the browser.
+        """
+        crawler = await self.get_crawler()
+        result = await crawler.arun(url="raw:" + html, config=config)
+        result.url = url
+        return result
+
+    async def arun_many(self, urls, config):
+        """Crawl many URLs with crawl4ai's dispatcher on the shared browser."""
+        crawler = await self.get_crawler()
+        generation = self.generation
+        try:
+            return await crawler.arun_many(urls=urls, config=config)
+        except Exception as e:
+            if not self._crashed(e):
+                raise
+            crawler = await self.restart(generation)
+            return await crawler.arun_many(urls=urls, config=config)
+
+    async def stream_many(self, urls, config):
+        """Crawl many URLs and yield each result as soon as it is ready.
+
+        If the browser crashes mid-batch it is restarted once and only the
+        URLs without a result yet are crawled again.
+        """
+        config = config.clone(stream=True)
+        done = set()
+        for attempt in range(2):
+            pending = [url for url in urls if url not in done]
+            if not pending:
+                return
+            crawler = await self.get_crawler()
+            generation = self.generation
+            try:
+                async for result in await crawler.arun_many(
+                    urls=pending, config=config
+                ):
+                    done.add(result.url)
+                    yield result
+                return
+            except Exception as e:
+                if attempt or not self._crashed(e):
+                    raise
+                await self.restart(generation)
+
+    async def close(self):
+        async with self._lock:
+            await self._close_crawler()
+
+
+_session = None
+
+
+def get_browser_session():
+    """Return the process-wide browser session for the running event loop.
+
+    Must be called from a coroutine. A session belongs to the loop it was
+    created on, so a new one is made when called from another loop.
+    """
+    global _session
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.loop is not loop:
+        if _session is not None and not _session.loop.is_closed():
+            logger.warning("Browser session created on another event loop")
+        _session = BrowserSession()
+    return _session
+
+
+async def close_browser_session():
+    """Shut the shared browser down (call before the event loop ends)."""
+    global _session
+    session, _session = _session, None
+    if session is not None and session.loop is asyncio.get_running_loop():
+        await session.close()
+
+
+def run_with_browser(coro):
+    """``asyncio.run`` that closes the shared browser (and the pooled HTTP
+    session) before the loop ends.
+
+    Use this instead of ``asyncio.run`` for crawl/extract stages so
+    Chromium is not left running after the loop is gone.
+    """
+
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await close_browser_session()
+            await close_http_session()
+
+    return asyncio.run(runner())
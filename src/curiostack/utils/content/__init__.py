@@ -3,4 +3,23 @@ from .extractor_helper import (
     mark_url_processed,
     extract_metadata_and_content,
 )
-from .writer_helper import get_titles, content_save
+from .document_helper import (
+    save_document,
+    save_documents,
+    get_documents,
+    due_documents,
+    touch_document,
+    touch_documents,
+)
+from .chunk_helper import MarkdownChunker, Chunk, count_tokens
+from .page_helper import ProcessedPage, process_html, process_markdown
+from .readability_helper import readability_extract, page_metadata
+from .writer_helper import get_titles, content_save, topic_urls, mark_written
+from .json_repair_helper import repair_json
+from .topic_helper import (
+    TopicCluster,
+    title_vectors,
+    written_posts,
+    cluster_topics,
+    link_sources,
+)
@@ -0,0 +1,206 @@
+import re
+from typing import List, NamedTuple
+
+# Rough sub-word count: every word and every punctuation mark is one token
+TOKEN = re.compile(r"\w+|[^\w\s]")
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text):
+    return len(TOKEN.findall(text))
+
+
+class Chunk(NamedTuple):
+    text: str
+    headings: List[str]
+    tokens: int
+
+
+class _Block(NamedTuple):
+    kind: str  # "heading", "code", "table" or "text"
+    lines: List[str]
+    headings: List[str]
+    tokens: int
+
+
+class MarkdownChunker:
+    """Split markdown into chunks of at most ``max_tokens`` tokens.
+
+    Fenced code and tables are never cut in the middle of a line, and a
+    block too big for one chunk is split along its own structure (code and
+    table rows, sentences, words) with fences and table headers repeated.
+    Sections start a new chunk unless the current one is still smaller
+    than ``min_tokens``. Every chunk keeps the heading path it sits under.
+
+    The document is read once, line by line, and every line is tokenized
+    once, so the cost is linear in the document size.
+    """
+
+    def __init__(self, max_tokens=300, min_tokens=60):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+
+    # Parsing ##########################
+    def _blocks(self, markdown):
+        path = []
+        lines, kind, tokens = [], None, 0
+        fence = None
+
+        for line in markdown.splitlines():
+            line_tokens = count_tokens(line)
+
+            if fence:
+                lines.append(line)
+                tokens += line_tokens
+                if line.strip().startswith(fence):
+                    yield _Block("code", lines, list(path), tokens)
+                    lines, kind, tokens, fence = [], None, 0, None
+                continue
+
+            fence_match = FENCE.match(line)
+            heading = HEADING.match(line)
+            is_row = line.lstrip().startswith("|")
+            new_kind = (
+                "code"
+                if fence_match
+                else "heading" if heading else "table" if is_row else "text"
+            )
+
+            # A blank line, a heading, a fence or a switch between table and
+            # text closes the block being collected
+            if lines and (not line.strip() or new_kind != kind or heading):
+                yield _Block(kind, lines, list(path), tokens)
+                lines, kind, tokens = [], None, 0
+            if not line.strip():
+                continue
+
+            if heading:
+                level = len(heading.group(1))
+                path = path[: level - 1] + [heading.group(2)]
+                yield _Block("heading", [line], list(path), line_tokens)
+                continue
+            if fence_match:
+                fence = fence_match.group(1)
+            lines.append(line)
+            kind = new_kind
+            tokens += line_tokens
+
+        if lines:
+            yield _Block(kind, lines, list(path), tokens)
+
+    # Splitting oversized blocks ############
+    def _split_lines(self, lines, budget, head=(), tail=()):
+        """Pack lines into pieces, repeating ``head``/``tail`` in every piece."""
+        budget -= sum(count_tokens(line) for line in (*head, *tail))
+        piece, size = [], 0
+        for line in lines:
+            line_tokens = count_tokens(line)
+            if piece and size + line_tokens > budget:
+                yield [*head, *piece, *tail]
+                piece, size = [], 0
+            piece.append(line)
+            size += line_tokens
+        if piece:
+            yield [*head, *piece, *tail]
+
+    def _split_text(self, text, budget):
+        parts = []
+        for sentence in SENTENCE_END.split(text):
+            if count_tokens(sentence) <= budget:
+                parts.append(sentence)
+                continue
+            words = sentence.split()
+            parts.extend(" ".join(piece) for piece in self._split_lines(words, budget))
+        return [" ".join(piece) for piece in self._split_lines(parts, budget)]
+
+    def _split(self, block, budget):
+        if block.kind == "code":
+            head, body = block.lines[:1], block.lines[1:]
+            tail = body[-1:] if body and FENCE.match(body[-1]) else []
+            body = body[: len(body) - len(tail)] if tail else body
+            pieces = self._split_lines(body, budget, head, tail or ["```"])
+            return ["\n".join(piece) for piece in pieces]
+        if block.kind == "table":
+            # Header and separator rows go with every piece
+            head = block.lines[:2] if len(block.lines) > 2 else []
+            pieces = self._split_lines(block.lines[len(head) :], budget, head)
+            return ["\n".join(piece) for piece in pieces]
+        # Paragraphs and lists go line by line, long lines by sentence
+        lines = []
+        for line in block.lines:
+            if count_tokens(line) <= budget:
+                lines.append(line)
+            else:
+                lines.extend(self._split_text(line, budget))
+        return ["\n".join(piece) for piece in self._split_lines(lines, budget)]
+
+    # Packing ##########################
+    def split(self, markdown) -> List[Chunk]:
+        """Chunk a markdown document.
+
+        Args:
+            markdown (_str_): Cleaned article markdown.
+
+        Returns:
+            _list_: ``Chunk(text, headings, tokens)`` in document order.
+        """
+        chunks = []
+        parts, size = [], 0
+
+        def flush(carry_heading=False):
+            nonlocal parts, size
+            # A heading is never left at the end of a chunk, away from its text
+            carried = []
+            while carry_heading and parts and parts[-1][2] == "heading":
+                carried.insert(0, parts.pop())
+            if parts:
+                text = "\n\n".join(part[0] for part in parts)
+                tokens = sum(part[1] for part in parts)
+                chunks.append(Chunk(text, _common([p[3] for p in parts]), tokens))
+            parts = carried
+            size = sum(part[1] for part in parts)
+
+        for block in self._blocks(markdown):
+            if block.kind == "heading" and size >= self.min_tokens:
+                flush()
+
+            if block.tokens > self.max_tokens:
+                # Leave room for headings waiting at the end of the chunk
+                waiting = 0
+                for part in reversed(parts):
+                    if part[2] != "heading":
+                        break
+                    waiting += part[1]
+                budget = self.max_tokens - waiting
+                pieces = [
+                    (text, count_tokens(text)) for text in self._split(block, budget)
+                ]
+            else:
+                pieces = [("\n".join(block.lines), block.tokens)]
+
+            for text, tokens in pieces:
+                if parts and size + tokens > self.max_tokens:
+                    flush(carry_heading=True)
+                    if parts and size + tokens > self.max_tokens:
+                        flush()
+                parts.append((text, tokens, block.kind, block.headings))
+                size += tokens
+        flush()
+
+        # A trailing heading with nothing under it is not worth a chunk
+        return [chunk for chunk in chunks if not HEADING.match(chunk.text)]
+
+
+def _common(paths):
+    """Heading path shared by every block of a chunk."""
+    if not paths:
+        return []
+    common = paths[0]
+    for path in paths[1:]:
+        i = 0
+        while i < min(len(common), len(path)) and common[i] == path[i]:
+            i += 1
+        common = common[:i]
+    return list(common)
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+from ...config import get_db_path
+from ...logger import get_logger
+
+logger = get_logger(__name__, debug=False)
+
+# Columns added after the table was first created, with their types
+LATER_COLUMNS = {
+    "etag": "TEXT",
+    "last_modified": "TEXT",
+    "content_hash": "TEXT",
+    "chunk_hashes": "TEXT",
+    "checked_at": "TEXT",
+    "source_hash": "TEXT",
+}
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _ensure_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            url TEXT,
+            metadata TEXT,
+            chunks INTEGER DEFAULT 0,
+            updated_at TEXT
+        );
+        """
+    )
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+    for column, kind in LATER_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE documents ADD COLUMN {column} {kind}")
+
+
+def _content_hash(chunk_hashes):
+    # Same value as ProcessedPage.content_hash
+    return hashlib.sha1("".join(chunk_hashes).encode("utf-8")).hexdigest()
+
+
+def save_document(
+    niche,
+    doc_id,
+    url,
+    metadata,
+    chunk_hashes,
+    etag=None,
+    last_modified=None,
+    source_hash=None,
+):
+    """Store the metadata of an extracted article once.
+
+    The document id is the id of the article in the ``urls`` table; Qdrant
+    chunks only carry this id and their position in the document.
+
+    Args:
+        niche (_str_): example: ai_ml, data science, cybersecurity
+        doc_id (_int_): Id of the article in the urls table
+        url (_str_): URL the article was extracted from
+        metadata (_dict_): title, author, published_date, source_url, tags
+        chunk_hashes (_list_): Hash of every chunk, in document order
+        etag (_str_, optional): ETag header of the response
+        last_modified (_str_, optional): Last-Modified header of the response
+        source_hash (_str_, optional): Hash of the readability output
+    """
+    save_documents(
+        niche,
+        [(doc_id, url, metadata, chunk_hashes, etag, last_modified, source_hash)],
+    )
+
+
+def save_documents(niche, documents):
+    """Store several documents in one transaction.
+
+    Args:
+        niche (_str_): example: ai_ml, data science, cybersecurity
+        documents (_list_): ``(doc_id, url, metadata, chunk_hashes, etag,
+            last_modified, source_hash)`` tuples, as taken by save_document()
+    """
+    db_path = get_db_path(niche)
+    now = _now()
+    rows = [
+        (
+            doc_id,
+            url,
+            json.dumps(metadata, ensure_ascii=False),
+            len(chunk_hashes),
+            now,
+            etag,
+            last_modified,
+            _content_hash(chunk_hashes),
+            json.dumps(chunk_hashes),
+            now,
+            source_hash,
+        )
+        for (
+            doc_id,
+            url,
+            metadata,
+            chunk_hashes,
+            etag,
+            last_modified,
+            source_hash,
+        ) in documents
+    ]
+    try:
+        with sqlite3.connect(db_path) as conn:
+            _ensure_table(conn)
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO documents (
+                    id, url, metadata, chunks, updated_at, etag, last_modified,
+                    content_hash, chunk_hashes, checked_at, source_hash
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            conn.commit()
+    except Exception as e:
+        logger.exception(f"Failed to save {len(rows)} documents in {niche}: {e}")
+
+
+def get_documents(niche, doc_ids):
+    """Metadata of several documents, for joining it back onto chunks.
+
+    Args:
+        niche (_str_): example: ai_ml, data science, cybersecurity
+        doc_ids (_list_): Document ids found in chunk payloads
+
+    Returns:
+        _dict_: doc_id -> metadata dict (with ``url`` added)
+    """
+    doc_ids = sorted({doc_id for doc_id in doc_ids if doc_id is not None})
+    if not doc_ids:
+        return {}
+
+    db_path = get_db_path(niche)
+    try:
+        with sqlite3.connect(db_path) as conn:
+            _ensure_table(conn)
+            rows = conn.execute(
+                f"""
+                SELECT id, url, metadata FROM documents
+                WHERE id IN ({','.join('?' for _ in doc_ids)})
+                """,
+                doc_ids,
+            ).fetchall()
+    except Exception as e:
+        logger.exception(f"Failed to read documents from {niche}: {e}")
+        return {}
+
+    return {
+        doc_id: {**json.loads(metadata or "{}"), "url": url}
+        for doc_id, url, metadata in rows
+    }
+
+
+def due_documents(niche, max_age_hours, limit):
+    """Documents not checked for changes in the last ``max_age_hours``.
+
+    Args:
+        niche (_str_): example: ai_ml, data science, cybersecurity
+        max_age_hours (float): How old the last check may be
+        limit (_int_): Maximum number of documents
+
+    Returns:
+        _list_: dicts with id, url, etag, last_modified, content_hash,
+        chunk_hashes and source_hash, least recently checked first
+    """
+    db_path = get_db_path(niche)
+    cutoff = datetime.now() - timedelta(hours=max_age_hours)
+    try:
+        with sqlite3.connect(db_path) as conn:
+            _ensure_table(conn)
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                """
+                SELECT id, url, etag, last_modified, content_hash, chunk_hashes,
+                    source_hash
+                FROM documents
+                WHERE checked_at IS NULL OR checked_at < ?
+                ORDER BY checked_at
+                LIMIT ?
+                """,
+                (cutoff.strftime("%Y-%m-%d %H:%M:%S"), limit),
+            ).fetchall()
+    except Exception as e:
+        logger.exception(f"Failed to read due documents from {niche}: {e}")
+        return []
+
+    return [
+        {**dict(row), "chunk_hashes": json.loads(row["chunk_hashes"] or "[]")}
+        for row in rows
+    ]
+
+
+def touch_document(niche, doc_id, etag=None, last_modified=None, source_hash=None):
+    """Record an unchanged check, keeping any validators the server sent."""
+    touch_documents(niche, [(doc_id, etag, last_modified, source_hash)])
+
+
+def touch_documents(niche, checks):
+    """Record several unchanged checks in one transaction.
+
+    Args:
+        niche (_str_): example: ai_ml, data science, cybersecurity
+        checks (_list_): ``(doc_id, etag, last_modified, source_hash)`` tuples
+    """
+    db_path = get_db_path(niche)
+    now = _now()
+    rows = [
+        (now, etag, modified, source_hash, doc_id)
+        for doc_id, etag, modified, source_hash in checks
+    ]
+    try:
+        with sqlite3.connect(db_path) as conn:
+            _ensure_table(conn)
+            conn.executemany(
+                """
+                UPDATE documents
+                SET checked_at = ?,
+                    etag = COALESCE(?, etag),
+                    last_modified = COALESCE(?, last_modified),
+                    source_hash = COALESCE(?, source_hash)
+                WHERE id = ?
+                """,
+                rows,
+            )
+            conn.commit()
+    except Exception as e:
+        logger.exception(f"Failed to update {len(checks)} documents in {niche}: {e}")
@@ -1,8 +1,13 @@
 import sqlite3
-from playwright.async_api import async_playwright
+import time
 import re, json
+from crawl4ai import CacheMode, CrawlerRunConfig
+from ..browser import get_browser_session
+from ..db import run_db
 from ...config import get_db_path
 from ...logger import get_logger
+from ...metrics import inc, observe
+from ...resilience import CircuitOpen, domain_breaker
 
 
 async def RedirectHelper(url: str):
@@ -11,24 +16,41 @@ async def RedirectHelper(url: str):
     if not url.startswith(("http://", "https://")):
         url = "https://" + url
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    # A domain that keeps failing is skipped until its circuit allows a probe
+    breaker = domain_breaker(url)
+    breaker.check()
 
-        final_url = url  # default: assume no redirect
+    # Reuses a pooled page of the process-wide browser
+    session = get_browser_session()
+    config = CrawlerRunConfig(
+        wait_until="networkidle", page_timeout=60000, cache_mode=CacheMode.BYPASS
+    )
 
-        try:
-            await page.goto(url, wait_until="networkidle", timeout=60000)
-            if page.url and page.url != url:
-                final_url = page.url
-            print("Final URL:", final_url)
-            print("----")
-        except Exception as e:
-            print(f"Navigation error for {url}: {e}")
-        finally:
-            await browser.close()
+    final_url = url  # default: assume no redirect
+    status = "ok"
+    started = time.perf_counter()
+
+    try:
+        result = await session.arun(url, config)
+        if result.success:
+            breaker.record_success()
+        else:
+            breaker.record_error(result.error_message)
+        redirected = getattr(result, "redirected_url", None)
+        if redirected and redirected != url:
+            final_url = redirected
+            status = "redirected"
+        print("Final URL:", final_url)
+        print("----")
+    except Exception as e:
+        status = "error"
+        breaker.record_error(e)
+        print(f"Navigation error for {url}: {e}")
+    finally:
+        observe("redirect_seconds", time.perf_counter() - started, status=status)
+        inc("redirects_total", status=status)
 
-        return final_url
+    return final_url
 
 
 async def get_unprocessed_urls(niche, limit, debug=False):
@@ -36,14 +58,18 @@ async def get_unprocessed_urls(niche, limit, debug=False):
 
     db_path = get_db_path(niche)
 
-    try:
+    def select():
         with sqlite3.connect(db_path) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT id, url FROM urls WHERE processed = 0 LIMIT ?",
                 (limit,),
             )
-            rows = cursor.fetchall()
+            return cursor.fetchall()
+
+    try:
+        # Runs on the database thread, the event loop keeps serving fetches
+        rows = await run_db(select)
     except Exception as e:
         logger.exception(f"Error connecting to SQLite database at {db_path}: {e}")
         return [], []
@@ -53,7 +79,12 @@ async def get_unprocessed_urls(niche, limit, debug=False):
     for id, url in rows:
         if debug:
             print(f"Before: {url}")
-        urls_red = await RedirectHelper(url)
+        try:
+            urls_red = await RedirectHelper(url)
+        except CircuitOpen as e:
+            # Stays unprocessed and is picked up by a later run
+            logger.info(f"Postponing {url}: {e}")
+            continue
         if urls_red is not None:
             urls_after.append(urls_red)
             url_ids.append(id)
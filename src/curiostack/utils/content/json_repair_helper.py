@@ -0,0 +1,73 @@
+import json
+import re
+
+FENCE = re.compile(r"```(?:json)?")
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def _close_truncated(text):
+    """Close strings, objects and arrays left open by a cut-off response."""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+
+    if escaped:
+        text = text[:-1]
+    if in_string:
+        text += '"'
+    # A dangling comma, or inside an object a key still waiting for its
+    # value; a last string in an array is a complete element
+    if stack and stack[-1] == "}":
+        text = re.sub(r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$', "", text.rstrip())
+    else:
+        text = re.sub(r",\s*$", "", text.rstrip())
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text):
+    """Parse a model's JSON answer, fixing the usual breakages locally.
+
+    Handles code fences and prose around the object, trailing commas, raw
+    newlines inside strings and output cut off mid-string or mid-object.
+
+    Args:
+        text (_str_): Raw model output.
+
+    Returns:
+        _dict_: The parsed object.
+
+    Raises:
+        ValueError: If no JSON object can be recovered.
+    """
+    text = FENCE.sub("", text or "").strip()
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object in the output")
+    text = text[start:]
+
+    end = text.rfind("}")
+    candidates = [text[: end + 1]] if end != -1 else []
+    candidates.append(text)
+    for candidate in candidates:
+        for attempt in (candidate, _close_truncated(candidate)):
+            attempt = TRAILING_COMMA.sub(r"\1", attempt)
+            try:
+                result = json.loads(attempt, strict=False)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(result, dict):
+                return result
+    raise ValueError("Could not repair the JSON output")
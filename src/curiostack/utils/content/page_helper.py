@@ -0,0 +1,65 @@
+import hashlib
+from typing import List, NamedTuple, Tuple
+
+from .chunk_helper import MarkdownChunker
+from .extractor_helper import extract_metadata_and_content
+from .readability_helper import readability_extract
+
+# Built once per process, pool workers included
+_chunkers = {}
+
+
+class ProcessedPage(NamedTuple):
+    """What crosses back from a pool process: metadata and chunks only."""
+
+    metadata: dict
+    chunks: List[Tuple[str, str, str]]  # (text, heading path, hash)
+    score: float
+    # Hash of the readability output, set even when the LLM filter is needed
+    source_hash: str = ""
+
+    @property
+    def content_hash(self):
+        # Changes whenever any chunk is added, removed, edited or moved
+        joined = "".join(chunk_hash for _, _, chunk_hash in self.chunks)
+        return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def _chunk(markdown, max_tokens):
+    if max_tokens not in _chunkers:
+        _chunkers[max_tokens] = MarkdownChunker(max_tokens=max_tokens)
+    chunks = _chunkers[max_tokens].split(markdown)
+    return [
+        (
+            chunk.text,
+            " > ".join(chunk.headings),
+            hashlib.sha1(chunk.text.encode("utf-8")).hexdigest(),
+        )
+        for chunk in chunks
+    ]
+
+
+def process_html(page_html, url, min_score, max_tokens=300) -> ProcessedPage:
+    """Readability extraction and chunking of one page.
+
+    Args:
+        page_html (_str_): Full page HTML.
+        url (_str_): URL of the page.
+        min_score (float): Lowest readability score accepted.
+        max_tokens (int): Token budget of a chunk.
+
+    Returns:
+        ProcessedPage: Without chunks when the score is below ``min_score``
+        and the page needs the LLM filter; the markdown is not sent back.
+    """
+    metadata, markdown, score = readability_extract(page_html, url)
+    source_hash = hashlib.sha1((markdown or "").encode("utf-8")).hexdigest()
+    if score < min_score:
+        return ProcessedPage({}, [], score, source_hash)
+    return ProcessedPage(metadata, _chunk(markdown, max_tokens), score, source_hash)
+
+
+def process_markdown(markdown, max_tokens=300) -> ProcessedPage:
+    """Split the LLM filter output into metadata and chunks."""
+    metadata, cleaned_markdown = extract_metadata_and_content(markdown)
+    return ProcessedPage(metadata, _chunk(cleaned_markdown, max_tokens), 1.0)
@@ -0,0 +1,250 @@
+import json
+import re
+from datetime import datetime
+
+from crawl4ai import DefaultMarkdownGenerator
+from lxml import etree, html as lxml_html
+
+# Elements that never hold article text
+NOISE_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+    "form",
+    "iframe",
+    "svg",
+    "button",
+)
+
+# class/id hints of boilerplate blocks, unless they also look like content
+UNLIKELY = re.compile(
+    r"comment|share|social|related|newsletter|cookie|consent|sidebar|promo|"
+    r"subscribe|signup|banner|advert|sponsor|breadcrumb|menu|popup|modal|footer",
+    re.I,
+)
+MAYBE = re.compile(r"article|body|content|main|post|entry|story|text", re.I)
+
+ARTICLE_TYPES = (
+    "Article",
+    "BlogPosting",
+    "NewsArticle",
+    "TechArticle",
+    "ScholarlyArticle",
+    "Report",
+)
+
+DATE_FORMATS = ("%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d %b %Y", "%Y/%m/%d")
+
+_markdown = DefaultMarkdownGenerator(options={"ignore_links": True})
+
+
+def _text(node):
+    return re.sub(r"\s+", " ", node.text_content()).strip()
+
+
+def _iso_date(value):
+    """YYYY-MM-DD from the date formats sites usually publish, else None."""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    match = re.match(r"(\d{4})-(\d{2})-(\d{2})", value)
+    if match:
+        return match.group(0)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def _name(value):
+    # JSON-LD authors come as a string, an object or a list of either
+    if isinstance(value, list):
+        names = [_name(item) for item in value]
+        return ", ".join(name for name in names if name) or None
+    if isinstance(value, dict):
+        return value.get("name")
+    return value or None
+
+
+def _keywords(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return []
+    return [str(tag).strip() for tag in value if str(tag).strip()]
+
+
+def _json_ld_article(tree):
+    """The first Article-like object among the page's JSON-LD blocks."""
+    for script in tree.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text or "")
+        except ValueError:
+            continue
+        items = data if isinstance(data, list) else [data]
+        for item in list(items):
+            if isinstance(item, dict) and isinstance(item.get("@graph"), list):
+                items.extend(item["@graph"])
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            types = item.get("@type")
+            types = types if isinstance(types, list) else [types]
+            if any(t in ARTICLE_TYPES for t in types):
+                return item
+    return {}
+
+
+def page_metadata(tree, url):
+    """Metadata from JSON-LD, OpenGraph and ``<meta>`` tags.
+
+    Args:
+        tree: Parsed page (``lxml.html``), before any cleaning.
+        url (_str_): URL the page was fetched from.
+
+    Returns:
+        _dict_: title, author, published_date, source_url and tags; the same
+        keys the LLM content filter writes in its metadata block.
+    """
+    meta = {}
+    for node in tree.xpath("//meta[@content]"):
+        key = (node.get("property") or node.get("name") or "").strip().lower()
+        if key and key not in meta:
+            meta[key] = node.get("content").strip()
+    tags = [
+        node.get("content").strip()
+        for node in tree.xpath('//meta[@property="article:tag"][@content]')
+    ]
+    ld = _json_ld_article(tree)
+
+    title = ld.get("headline") or meta.get("og:title") or meta.get("twitter:title")
+    if not title:
+        found = tree.xpath("//title")
+        title = _text(found[0]) if found else None
+
+    canonical = tree.xpath('//link[@rel="canonical"]/@href')
+    source_url = (canonical[0] if canonical else None) or meta.get("og:url") or url
+
+    published = (
+        ld.get("datePublished")
+        or meta.get("article:published_time")
+        or meta.get("date")
+        or meta.get("publish_date")
+        or meta.get("dc.date")
+    )
+    author = _name(ld.get("author")) or meta.get("author") or meta.get("article:author")
+    if author and author.startswith(("http://", "https://")):
+        author = None  # article:author is often a profile URL
+    tags = _keywords(ld.get("keywords")) or tags or _keywords(meta.get("keywords"))
+
+    return {
+        "title": title or None,
+        "author": author or None,
+        "published_date": _iso_date(published),
+        "source_url": source_url,
+        "tags": tags[:8],
+    }
+
+
+def _link_density(node, text_length):
+    if not text_length:
+        return 1.0
+    link_length = sum(len(_text(a)) for a in node.iter("a"))
+    return min(link_length / text_length, 1.0)
+
+
+def _drop_boilerplate(tree):
+    etree.strip_elements(tree, *NOISE_TAGS, with_tail=False)
+    doomed = []
+    for node in tree.iter(etree.Element):
+        if node.tag in ("html", "body", "article", "main"):
+            continue
+        hints = f"{node.get('class', '')} {node.get('id', '')}"
+        if UNLIKELY.search(hints) and not MAYBE.search(hints):
+            doomed.append(node)
+    for node in doomed:
+        if node.getparent() is not None:
+            node.drop_tree()
+
+
+def main_content(tree):
+    """Pick the element holding the article body, readability style.
+
+    Every paragraph votes for its parent (and half a vote for the
+    grandparent) with a weight growing with its length and commas. The
+    winner is penalised by its link density, then widened to an enclosing
+    ``<article>``/``<main>`` so headings, code and tables come along.
+    """
+    scores = {}
+    for p in tree.iter("p", "pre", "td", "blockquote"):
+        text = _text(p)
+        if len(text) < 25:
+            continue
+        weight = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = p.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0) + weight
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0) + weight / 2
+
+    best, best_score = None, 0
+    for node, score in scores.items():
+        score *= 1 - _link_density(node, len(_text(node)))
+        if score > best_score:
+            best, best_score = node, score
+    if best is None:
+        found = tree.xpath("//article|//main|//body")
+        return found[0] if found else tree
+
+    for ancestor in best.iterancestors("article", "main"):
+        return ancestor
+    return best
+
+
+def readability_extract(page_html, url, min_chars=1500):
+    """Extract an article without the LLM.
+
+    Args:
+        page_html (_str_): Full page HTML as served.
+        url (_str_): URL of the page.
+        min_chars (int): Body length counted as a complete article.
+
+    Returns:
+        _tuple_: ``(metadata, markdown, score)`` where metadata and markdown
+        match ``extract_metadata_and_content`` and score (0..1) says how
+        much the result can be trusted.
+    """
+    try:
+        tree = lxml_html.fromstring(page_html)
+    except (etree.ParserError, ValueError):
+        return {}, "", 0.0
+
+    metadata = page_metadata(tree, url)
+    _drop_boilerplate(tree)
+    node = main_content(tree)
+
+    text_length = len(_text(node))
+    link_density = _link_density(node, text_length)
+    score = (
+        0.6 * min(text_length / min_chars, 1.0)
+        + 0.2 * (1 - min(link_density / 0.5, 1.0))
+        + 0.1 * bool(metadata["title"])
+        + 0.1 * bool(metadata["author"] or metadata["published_date"])
+    )
+
+    content_html = lxml_html.tostring(node, encoding="unicode")
+    markdown = _markdown.generate_markdown(
+        input_html=content_html, base_url=url, citations=False
+    ).raw_markdown.strip()
+    if metadata["title"] and not markdown.startswith("#"):
+        markdown = f"# {metadata['title']}\n\n{markdown}"
+
+    return metadata, markdown, round(score, 3)
@@ -0,0 +1,160 @@
+import glob
+import json
+import os
+import sqlite3
+from typing import List, NamedTuple
+
+import numpy as np
+
+from .writer_helper import raw_dir
+from ..vector.vector_helper import embed_queries, embedding_name
+from ...config import get_db_path
+from ...logger import get_logger
+
+logger = get_logger(__name__, debug=False)
+
+
+class TopicCluster(NamedTuple):
+    """One post to write: its leading title and the near-duplicates it covers."""
+
+    title: str
+    vector: List[float]
+    members: List[str]
+
+
+def title_vectors(niche, titles):
+    """Embeddings of titles, cached per embedding model in the niche database.
+
+    Only titles never embedded before cost an embedding request.
+
+    Args:
+        niche (_str_): example: ai_ml, data science, cybersecurity
+        titles (_list_): Titles to embed
+
+    Returns:
+        _list_: One vector per title, in order
+    """
+    titles = list(titles)
+    unique = list(dict.fromkeys(titles))
+    model = embedding_name()
+    db_path = get_db_path(niche)
+    vectors = {}
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS topic_vectors (
+                title TEXT,
+                model TEXT,
+                vector BLOB,
+                PRIMARY KEY (title, model)
+            );
+            """
+        )
+        # Stay under SQLite's limit on bound parameters
+        for start in range(0, len(unique), 500):
+            batch = unique[start : start + 500]
+            rows = conn.execute(
+                f"""
+                SELECT title, vector FROM topic_vectors
+                WHERE model = ? AND title IN ({','.join('?' for _ in batch)})
+                """,
+                [model, *batch],
+            )
+            for title, blob in rows:
+                vectors[title] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+        missing = [title for title in unique if title not in vectors]
+        if missing:
+            new_vectors = embed_queries(missing)
+            conn.executemany(
+                "INSERT OR REPLACE INTO topic_vectors VALUES (?, ?, ?)",
+                [
+                    (title, model, np.asarray(vector, dtype=np.float32).tobytes())
+                    for title, vector in zip(missing, new_vectors)
+                ],
+            )
+            conn.commit()
+            vectors.update(zip(missing, new_vectors))
+    logger.info(f"{len(missing)} of {len(unique)} titles needed an embedding")
+    return [vectors[title] for title in titles]
+
+
+def written_posts(niche):
+    """Posts already written for a niche.
+
+    Returns:
+        _dict_: post title -> path of its JSON file
+    """
+    posts = {}
+    for path in sorted(glob.glob(os.path.join(raw_dir(niche), "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                title = json.load(f).get("title")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable post {path}: {e}")
+            continue
+        if title:
+            posts[title] = path
+    return posts
+
+
+def _normalized(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2:
+        return matrix.reshape(0, 0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def cluster_topics(titles, vectors, written=(), written_vectors=(), threshold=0.9):
+    """Group near-duplicate titles so each story is written about once.
+
+    Titles are taken in order. One whose cosine similarity to an already
+    written post reaches ``threshold`` is covered by that post; otherwise it
+    joins the first cluster whose leading title is that similar, or leads a
+    new cluster.
+
+    Args:
+        titles (_list_): Pending titles, see get_titles()
+        vectors (_list_): One vector per title
+        written (_list_): Titles of posts already written
+        written_vectors (_list_): One vector per written title
+        threshold (float): Cosine similarity from which titles are duplicates
+
+    Returns:
+        _tuple_: ``(clusters, covered)``; clusters is a list of TopicCluster,
+        covered maps a pending title to the written post that covers it
+    """
+    pending = _normalized(vectors)
+    done = _normalized(written_vectors)
+    clusters = []
+    leaders = []
+    covered = {}
+
+    for i, title in enumerate(titles):
+        if len(done):
+            scores = done @ pending[i]
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                covered[title] = written[best]
+                continue
+        if leaders:
+            scores = pending[leaders] @ pending[i]
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                clusters[best].members.append(title)
+                continue
+        leaders.append(i)
+        clusters.append(TopicCluster(title, vectors[i], []))
+    return clusters, covered
+
+
+def link_sources(path, urls):
+    """Add source URLs to the ``sources`` list of a written post."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    sources = data.get("sources") or []
+    sources += [url for url in urls if url and url not in sources]
+    data["sources"] = sources
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
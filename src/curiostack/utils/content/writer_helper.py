@@ -36,6 +36,51 @@ def get_titles(niche, debug=False):
         return []
 
 
+def raw_dir(niche):
+    """Directory the writer saves the posts of a niche to."""
+    _, script_dir = get_db_path(niche, script_dir=True)
+    return os.path.join(script_dir, "..", "..", "data", "raw", niche)
+
+
+def topic_urls(niche, titles):
+    """Article URL of each title, for linking the sources of a post.
+
+    Args:
+        niche (_str_): example: ai_ml, data science, cybersecurity
+        titles (_list_): Titles as returned by get_titles()
+
+    Returns:
+        _dict_: title -> url
+    """
+    titles = list(titles)
+    if not titles:
+        return {}
+    db_path = get_db_path(niche)
+    placeholders = ",".join("?" for _ in titles)
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT title, url FROM urls WHERE title IN ({placeholders})", titles
+        ).fetchall()
+    return dict(rows)
+
+
+def mark_written(niche, titles):
+    """Mark titles as written without saving a post for them.
+
+    Used for topics folded into another post as extra sources.
+    """
+    titles = list(titles)
+    if not titles:
+        return
+    db_path = get_db_path(niche)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "UPDATE urls SET content_written = 1 WHERE title = ?",
+            [(title,) for title in titles],
+        )
+        conn.commit()
+
+
 def content_save(top, final_data, niche, debug=False):
     """
     Save generated content to a JSON file and update the database
@@ -46,14 +91,17 @@ def content_save(top, final_data, niche, debug=False):
         final_data (dict): The content data in JSON format.
         niche (str): Example: "ai_ml", "data_science", "cybersecurity".
         debug (bool): Whether to enable debug logging.
+
+    Returns:
+        bool: Whether the post was saved and its title marked as written.
     """
     logger = get_logger(__name__, debug=debug)
 
     # Get paths
-    db_path, script_dir = get_db_path(niche, script_dir=True)
+    db_path = get_db_path(niche)
 
     # Directory for output
-    output_dir = os.path.join(script_dir, "..", "..", "data", "raw", niche)
+    output_dir = raw_dir(niche)
     os.makedirs(output_dir, exist_ok=True)
 
     # Sanitize filename
@@ -80,9 +128,11 @@ def content_save(top, final_data, niche, debug=False):
             conn.commit()
 
         logger.info(f"Content successfully saved for '{top}' → {output_path}")
+        return True
 
     except Exception as e:
         logger.exception(f"Error saving content for '{top}' to {output_path}: {e}")
+        return False
 
 
 # # Example usage
@@ -1 +1,9 @@
-from .crawler_helper import save_data, niches_urls
\ No newline at end of file
+from .crawler_helper import (
+    save_data,
+    niches_urls,
+    known_urls,
+    rejected_links,
+    save_rejected_links,
+)
+from .schedule_helper import SourceScheduler
+from .listing_helper import ListingLink, listing_links, compact_listing
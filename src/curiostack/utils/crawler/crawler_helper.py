@@ -1,6 +1,7 @@
 import os
 import sqlite3
 import json
+import time
 from ...config import get_db_path
 from ...logger import get_logger
 
@@ -33,12 +34,82 @@ def niches_urls(niche):
     return urls_ai_ml
 
 
+def known_urls(niche):
+    """Every URL already stored for a niche, as a set."""
+    db_path = get_db_path(niche)
+    if not os.path.exists(db_path):
+        return set()
+    try:
+        with sqlite3.connect(db_path) as conn:
+            return {row[0] for row in conn.execute("SELECT url FROM urls")}
+    except sqlite3.OperationalError:
+        # No urls table before the first crawl
+        return set()
+
+
+def rejected_links(niche, source, max_age_days=30):
+    """Links of a source page the LLM did not take as articles.
+
+    Rejections expire after ``max_age_days``, so a link the model got
+    wrong once is offered again eventually.
+
+    Args:
+        niche (_str_): example: ai_ml, data science, cybersecurity
+        source (_str_): URL of the listing page
+        max_age_days (float, optional): Forget rejections older than this
+
+    Returns:
+        set: Rejected URLs
+    """
+    db_path = get_db_path(niche)
+    if not os.path.exists(db_path):
+        return set()
+    cutoff = time.time() - max_age_days * 86400
+    try:
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(
+                "SELECT url FROM listing_seen WHERE source = ? AND seen_at >= ?",
+                (source, cutoff),
+            )
+            return {row[0] for row in rows}
+    except sqlite3.OperationalError:
+        # No listing_seen table before the first rejection
+        return set()
+
+
+def save_rejected_links(niche, source, urls):
+    """Remember links of a source page the LLM did not take as articles."""
+    if not urls:
+        return
+    db_path = get_db_path(niche)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    now = time.time()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS listing_seen (
+                source TEXT,
+                url TEXT,
+                seen_at REAL,
+                PRIMARY KEY (source, url)
+            );
+            """
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO listing_seen VALUES (?, ?, ?)",
+            [(source, url, now) for url in urls],
+        )
+
+
 def save_data(final_filtered_data, niche):
     """_summary_
 
     Args:
         final_filtered_data (_doc_): The web source data in JSON format
         niche (_str_): example: ai_ml, data science, cybersecurity
+
+    Returns:
+        _int_: Number of URLs that were not in the database yet
     """
     # Build database file path
     db_path = get_db_path(niche)
@@ -63,6 +134,7 @@ def save_data(final_filtered_data, niche):
     """)
 
     # Insert new URLs with titles (duplicates skipped automatically)
+    new_urls = 0
     for item in final_filtered_data:
         url = item.get("url")
         title = item.get("title")
@@ -71,9 +143,11 @@ def save_data(final_filtered_data, niche):
             INSERT OR IGNORE INTO urls (url, title, niche)
             VALUES (?, ?, ?)
             """, (url, title, niche))
+            new_urls += cursor.rowcount
 
     conn.commit()
     conn.close()
 
     print(f"Data successfully saved to: {db_path}")
+    return new_urls
 
@@ -0,0 +1,123 @@
+import re
+from typing import NamedTuple, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from lxml import html as lxml_html
+
+# Links inside these are site chrome, never article links
+CHROME_TAGS = {"nav", "header", "footer", "aside", "form", "script", "noscript"}
+
+# Anchor text shorter than this is a menu item or a "Read more"
+MIN_TEXT_CHARS = 15
+
+# A parent holding more links than this is the listing itself, not one card
+MAX_CARD_LINKS = 3
+
+SKIP_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".pdf", ".zip")
+
+MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?"
+DATE_HINT = re.compile(
+    rf"\d{{4}}-\d{{2}}-\d{{2}}|{MONTH} \d{{1,2}},? \d{{4}}|\d{{1,2}} {MONTH},? \d{{4}}"
+)
+
+
+class ListingLink(NamedTuple):
+    """A link on a listing page that may point to an article."""
+
+    text: str
+    url: str
+    date: Optional[str]
+
+
+def _text(node):
+    return re.sub(r"\s+", " ", node.text_content()).strip()
+
+
+def _in_chrome(node):
+    return any(parent.tag in CHROME_TAGS for parent in node.iterancestors())
+
+
+def _anchor_text(anchor):
+    text = _text(anchor) or anchor.get("title") or ""
+    if not text:
+        image = anchor.find(".//img")
+        text = image.get("alt", "") if image is not None else ""
+    return text.strip()
+
+
+def _date_hint(anchor):
+    # Look for a date in the card around the link, not in the whole listing
+    node = anchor
+    for _ in range(3):
+        node = node.getparent()
+        if node is None or node.tag in ("body", "html"):
+            return None
+        if len(node.findall(".//a")) > MAX_CARD_LINKS:
+            return None
+        time_tag = node.find(".//time")
+        if time_tag is not None:
+            return (time_tag.get("datetime") or _text(time_tag))[:32] or None
+        match = DATE_HINT.search(_text(node)[:500])
+        if match:
+            return match.group(0)
+    return None
+
+
+def listing_links(page_html, base_url, known=(), rejected=(), max_links=150):
+    """Reduce a listing page to the links that may be new articles.
+
+    Links in navigation, headers, footers and forms are dropped, as are
+    links with menu-sized text, media files, the page itself, links seen
+    earlier on the page, links already in ``known`` and links the LLM
+    rejected on an earlier crawl of the page.
+
+    Args:
+        page_html (_str_): Raw HTML of the listing page
+        base_url (_str_): URL of the page, to resolve relative links
+        known (set, optional): URLs already in the urls table
+        rejected (set, optional): URLs of this page the LLM did not take as
+            articles, see rejected_links()
+        max_links (int, optional): Keep at most this many links
+
+    Returns:
+        _list_: ListingLink tuples in page order
+    """
+    if not page_html:
+        return []
+    try:
+        tree = lxml_html.fromstring(page_html)
+    except Exception:
+        return []
+
+    page = urldefrag(base_url)[0].rstrip("/")
+    seen = set()
+    links = []
+    for anchor in tree.iter("a"):
+        href = (anchor.get("href") or "").strip()
+        if not href or href.startswith(("#", "mailto:", "javascript:", "tel:")):
+            continue
+        url = urldefrag(urljoin(base_url, href))[0]
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.path in ("", "/"):
+            continue
+        if url.rstrip("/") == page or parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            continue
+        if url in seen or url in known or url in rejected or _in_chrome(anchor):
+            continue
+        text = _anchor_text(anchor)
+        if len(text) < MIN_TEXT_CHARS:
+            continue
+        seen.add(url)
+        links.append(ListingLink(text[:200], url, _date_hint(anchor)))
+        if len(links) >= max_links:
+            break
+    return links
+
+
+def compact_listing(source_url, links):
+    """The prompt text for a listing page: one markdown link per line."""
+    lines = [f"Source page: {source_url}", ""]
+    for link in links:
+        date = f" ({link.date})" if link.date else ""
+        lines.append(f"- [{link.text}]({link.url}){date}")
+    return "\n".join(lines)
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import time
+
+from ...config import get_db_path
+from ...logger import get_logger
+
+logger = get_logger(__name__, debug=False)
+
+HOUR = 3600
+
+
+class SourceScheduler:
+    """Decides which source pages of a niche are due for a crawl.
+
+    Every source has its own recrawl interval, kept in the ``sources`` table
+    of the niche database. A crawl that finds new article URLs halves the
+    interval, one that finds nothing stretches it by half, both within
+    ``[min_interval, max_interval]``. Failures back off exponentially from
+    ``retry_delay`` without touching the learned interval.
+    """
+
+    def __init__(
+        self,
+        niche,
+        initial_interval=12 * HOUR,
+        min_interval=2 * HOUR,
+        max_interval=7 * 24 * HOUR,
+        retry_delay=HOUR,
+    ):
+        self.niche = niche
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retry_delay = retry_delay
+        self.db_path = get_db_path(niche)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sources (
+                    url TEXT PRIMARY KEY,
+                    interval REAL,
+                    next_due_at REAL DEFAULT 0,
+                    last_crawled_at REAL,
+                    crawls INTEGER DEFAULT 0,
+                    new_urls_total INTEGER DEFAULT 0,
+                    last_new_urls INTEGER DEFAULT 0,
+                    failures INTEGER DEFAULT 0,
+                    last_error TEXT
+                );
+                """
+            )
+
+    def due(self, urls, now=None):
+        """The subset of ``urls`` whose next crawl time has passed.
+
+        Sources never seen before are due straight away.
+        """
+        now = time.time() if now is None else now
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO sources (url, interval) VALUES (?, ?)",
+                [(url, self.initial_interval) for url in urls],
+            )
+            rows = dict(conn.execute("SELECT url, next_due_at FROM sources"))
+        return [url for url in urls if rows.get(url, 0) <= now]
+
+    def record(self, url, success, new_urls=0, error=None, now=None):
+        """Update a source after a crawl and compute its next due time.
+
+        Args:
+            url (_str_): Source page URL
+            success (bool): Whether the page could be crawled
+            new_urls (_int_): Article URLs found that were not known yet
+            error (_str_, optional): Error message of a failed crawl
+        """
+        now = time.time() if now is None else now
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT interval, failures FROM sources WHERE url = ?", (url,)
+            ).fetchone()
+            interval, failures = row if row else (self.initial_interval, 0)
+            interval = interval or self.initial_interval
+
+            if not success:
+                failures += 1
+                wait = min(self.retry_delay * 2 ** (failures - 1), self.max_interval)
+                conn.execute(
+                    """
+                    INSERT INTO sources (
+                        url, interval, next_due_at, failures, last_error
+                    )
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        next_due_at = excluded.next_due_at,
+                        failures = excluded.failures,
+                        last_error = excluded.last_error
+                    """,
+                    (url, interval, now + wait, failures, error),
+                )
+                return
+
+            factor = 0.5 if new_urls else 1.5
+            interval = min(max(interval * factor, self.min_interval), self.max_interval)
+            conn.execute(
+                """
+                INSERT INTO sources (
+                    url, interval, next_due_at, last_crawled_at, crawls,
+                    new_urls_total, last_new_urls, failures, last_error
+                )
+                VALUES (?, ?, ?, ?, 1, ?, ?, 0, NULL)
+                ON CONFLICT(url) DO UPDATE SET
+                    interval = excluded.interval,
+                    next_due_at = excluded.next_due_at,
+                    last_crawled_at = excluded.last_crawled_at,
+                    crawls = crawls + 1,
+                    new_urls_total = new_urls_total + excluded.last_new_urls,
+                    last_new_urls = excluded.last_new_urls,
+                    failures = 0,
+                    last_error = NULL
+                """,
+                (url, interval, now + interval, now, new_urls, new_urls),
+            )
+        logger.info(
+            f"{url}: {new_urls} new URL(s), next crawl in {interval / HOUR:.1f}h"
+        )
+
+    def postpone(self, url, delay, now=None):
+        """Move a source's next crawl ``delay`` seconds ahead without counting
+        a failure, e.g. while the circuit of its domain is open."""
+        now = time.time() if now is None else now
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "UPDATE sources SET next_due_at = ? WHERE url = ?", (now + delay, url)
+            )
+
+    def summary(self):
+        """All sources of the niche with their schedule, soonest due first."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM sources ORDER BY next_due_at").fetchall()
+        return [dict(row) for row in rows]
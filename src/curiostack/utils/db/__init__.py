@@ -0,0 +1 @@
+from .db_helper import db_executor, run_db, BatchedWrites
@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_lock = threading.Lock()
+_state = {"pid": None, "executor": None}
+
+
+def db_executor():
+    """The one thread that runs SQLite work for the async stages.
+
+    A single thread keeps writes to the niche databases serialized and off
+    the event loop. It is recreated after a fork. Event loops on several
+    threads (the shell's loop, pipeline jobs) may ask at the same time, so
+    creating it is locked; two executors would mean two writer threads.
+    """
+    with _lock:
+        if _state["pid"] != os.getpid():
+            executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="curiostack-db"
+            )
+            _state.update(pid=os.getpid(), executor=executor)
+        return _state["executor"]
+
+
+async def run_db(func, *args, **kwargs):
+    """Await a blocking database call made on the database thread."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(db_executor(), call)
+
+
+class BatchedWrites:
+    """Buffers rows and writes them in batches on the database thread.
+
+    Args:
+        write (callable): Blocking function taking a list of rows
+        batch_size (int): Rows buffered before a write
+    """
+
+    def __init__(self, write, batch_size=50):
+        self.write = write
+        self.batch_size = batch_size
+        self.rows = []
+
+    async def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        rows, self.rows = self.rows, []
+        if rows:
+            await run_db(self.write, rows)
@@ -0,0 +1,8 @@
+from .fetch_helper import (
+    StaticFetcher,
+    article_text_length,
+    is_js_shell,
+    conditional_get,
+    get_http_session,
+    close_http_session,
+)
@@ -0,0 +1,303 @@
+import asyncio
+import os
+import sqlite3
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+import aiohttp
+from lxml import etree, html as lxml_html
+
+from ...config import get_db_path
+from ...logger import get_logger
+from ...metrics import inc, observe
+
+logger = get_logger(__name__, debug=False)
+
+USER_AGENT = "Mozilla/5.0 Crawl4AI/1.0"
+
+# Elements that never hold article text
+NOISE_TAGS = ("script", "style", "noscript", "nav", "header", "footer", "aside", "form")
+
+# Markers of client-side rendered shells (React/Next/Vue roots, JS walls)
+JS_SHELL_MARKERS = (
+    'id="root"></div>',
+    'id="app"></div>',
+    'id="__next"></div>',
+    "enable javascript",
+    "javascript is required",
+)
+
+MAX_BYTES = 5_000_000
+
+_http = {"loop": None, "session": None}
+
+
+def get_http_session():
+    """Pooled aiohttp session for the running event loop."""
+    loop = asyncio.get_running_loop()
+    session = _http["session"]
+    if session is None or session.closed or _http["loop"] is not loop:
+        connector = aiohttp.TCPConnector(limit=32, limit_per_host=4, ttl_dns_cache=300)
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=20, connect=5),
+            headers={"User-Agent": USER_AGENT},
+        )
+        _http.update(loop=loop, session=session)
+    return session
+
+
+async def close_http_session():
+    session, loop = _http["session"], _http["loop"]
+    _http.update(loop=None, session=None)
+    if session is not None and loop is asyncio.get_running_loop():
+        await session.close()
+
+
+def article_text_length(page_html):
+    """Characters of paragraph text outside navigation and scripts.
+
+    Returns 0 for pages that look like a JavaScript-rendered shell, and None
+    when the HTML cannot be parsed.
+    """
+    try:
+        tree = lxml_html.fromstring(page_html)
+    except (etree.ParserError, ValueError):
+        return None
+    etree.strip_elements(tree, *NOISE_TAGS, with_tail=False)
+
+    paragraphs = [p.text_content().strip() for p in tree.iter("p", "li", "pre")]
+    length = sum(len(text) for text in paragraphs if len(text) >= 40)
+    if length < 500 and is_js_shell(page_html):
+        return 0
+    return length
+
+
+def is_js_shell(page_html):
+    """Whether the page carries a marker of client-side rendering.
+
+    Pages that merely keep their text in ``<div>``s also score low in
+    article_text_length(), so only a marker counts as evidence of a shell.
+    """
+    lowered = page_html[:200_000].lower()
+    return any(marker in lowered for marker in JS_SHELL_MARKERS)
+
+
+async def conditional_get(url, etag=None, last_modified=None):
+    """GET with If-None-Match / If-Modified-Since.
+
+    Returns:
+        _tuple_: ``(status, html, etag, last_modified)``; status is None when
+        the request failed, html is None unless the status is 200 with HTML.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    started = time.perf_counter()
+    try:
+        session = get_http_session()
+        async with session.get(url, headers=headers, allow_redirects=True) as response:
+            page_html = None
+            content_type = response.headers.get("Content-Type", "")
+            if response.status == 200 and "html" in content_type:
+                body = await response.content.read(MAX_BYTES)
+                page_html = body.decode(response.charset or "utf-8", "replace")
+            return (
+                response.status,
+                page_html,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+    except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError) as e:
+        logger.debug(f"Conditional fetch failed for {url}: {e}")
+        return None, None, None, None
+    finally:
+        observe("conditional_fetch_seconds", time.perf_counter() - started)
+
+
+def _domain(url):
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class StaticFetcher:
+    """Fetch pages with a plain HTTP GET when the site does not need a browser.
+
+    The decision is remembered per domain in the niche database: a domain
+    whose pages come back as full server-rendered HTML is fetched statically
+    from then on. A domain goes straight to the browser only after
+    ``shell_pages`` of its pages came back as JS shells, and is probed
+    statically again ``reprobe_after`` seconds later, since sites change
+    their rendering.
+    """
+
+    def __init__(
+        self, niche, min_text_chars=1200, shell_pages=3, reprobe_after=7 * 86400
+    ):
+        self.niche = niche
+        self.min_text_chars = min_text_chars
+        self.shell_pages = shell_pages
+        self.reprobe_after = reprobe_after
+        self.db_path = get_db_path(niche)
+        # domain -> {"mode", "shell_pages", "updated_at"}
+        self.modes = {}
+        # url -> (ETag, Last-Modified) of the last static response
+        self.validators = {}
+        self._changed = set()
+        self._load()
+
+    def _load(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS domain_fetch_modes (
+                        domain TEXT PRIMARY KEY,
+                        mode TEXT,
+                        updated_at TEXT,
+                        shell_pages INTEGER DEFAULT 0
+                    );
+                    """
+                )
+                columns = {
+                    row[1]
+                    for row in conn.execute("PRAGMA table_info(domain_fetch_modes)")
+                }
+                if "shell_pages" not in columns:
+                    conn.execute(
+                        "ALTER TABLE domain_fetch_modes "
+                        "ADD COLUMN shell_pages INTEGER DEFAULT 0"
+                    )
+                rows = conn.execute(
+                    "SELECT domain, mode, updated_at, shell_pages "
+                    "FROM domain_fetch_modes"
+                ).fetchall()
+            self.modes = {
+                domain: {
+                    "mode": mode,
+                    "shell_pages": shell_pages or 0,
+                    "updated_at": _timestamp(updated_at),
+                }
+                for domain, mode, updated_at, shell_pages in rows
+            }
+        except Exception as e:
+            logger.exception(f"Failed to load fetch modes for {self.niche}: {e}")
+
+    def save(self):
+        """Persist the domains whose decision changed during this run."""
+        if not self._changed:
+            return
+        rows = [
+            (
+                domain,
+                self.modes[domain]["mode"],
+                datetime.fromtimestamp(self.modes[domain]["updated_at"]).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+                self.modes[domain]["shell_pages"],
+            )
+            for domain in self._changed
+        ]
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO domain_fetch_modes VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                conn.commit()
+            self._changed.clear()
+        except Exception as e:
+            logger.exception(f"Failed to save fetch modes for {self.niche}: {e}")
+
+    def mode(self, domain, now=None):
+        """Fetch mode of a domain: static, browser, or None while undecided
+        or due for a new static probe."""
+        entry = self.modes.get(domain)
+        if entry is None:
+            return None
+        now = time.time() if now is None else now
+        due = entry["updated_at"] + self.reprobe_after
+        if entry["mode"] == "browser" and now >= due:
+            return None
+        return entry["mode"]
+
+    def _remember(self, domain, mode, shell_pages):
+        if self.modes.get(domain, {}).get("mode") != mode:
+            logger.info(f"Fetch mode for {domain}: {mode}")
+        # Re-stamped on every confirmation, which pushes the next static
+        # probe of a browser domain back
+        self.modes[domain] = {
+            "mode": mode,
+            "shell_pages": shell_pages,
+            "updated_at": time.time(),
+        }
+        self._changed.add(domain)
+
+    def _record(self, domain, page_html, length):
+        # Only a full page or a JS shell is evidence about the domain; short,
+        # unparsable or div-only pages leave the decision as it is
+        entry = self.modes.get(domain, {"mode": None, "shell_pages": 0})
+        if length is not None and length >= self.min_text_chars:
+            self._remember(domain, "static", 0)
+        elif length == 0 and is_js_shell(page_html):
+            shells = entry["shell_pages"] + 1
+            mode = "browser" if shells >= self.shell_pages else entry["mode"]
+            self._remember(domain, mode, shells)
+
+    async def fetch(self, url):
+        """Try the static path for ``url``.
+
+        Returns:
+            _str_ | None: The page HTML, or None if the browser is needed.
+        """
+        domain = _domain(url)
+        if self.mode(domain) == "browser":
+            return None
+
+        started = time.perf_counter()
+        page_html = None
+        try:
+            session = get_http_session()
+            async with session.get(url, allow_redirects=True) as response:
+                content_type = response.headers.get("Content-Type", "")
+                if response.status == 200 and "html" in content_type:
+                    body = await response.content.read(MAX_BYTES)
+                    page_html = body.decode(response.charset or "utf-8", "replace")
+                    self.validators[url] = (
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                    )
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError) as e:
+            logger.debug(f"Static fetch failed for {url}: {e}")
+        observe("static_fetch_seconds", time.perf_counter() - started)
+        return self.accept(url, page_html)
+
+    def accept(self, url, page_html):
+        """Decide whether HTML fetched for ``url`` can be used without the
+        browser, and learn from it.
+
+        Returns:
+            _str_ | None: The page HTML, or None if the browser is needed.
+        """
+        domain = _domain(url)
+        if page_html is not None and self.mode(domain) != "browser":
+            length = article_text_length(page_html)
+            self._record(domain, page_html, length)
+            if length is not None and length >= self.min_text_chars:
+                inc("fetch_mode_total", mode="static")
+                return page_html
+            # Otherwise a shell or just a short page; let the browser have it
+        inc("fetch_mode_total", mode="browser")
+        return None
+
+
+def _timestamp(updated_at):
+    try:
+        return datetime.strptime(updated_at, "%Y-%m-%d %H:%M:%S").timestamp()
+    except (TypeError, ValueError):
+        return 0.0
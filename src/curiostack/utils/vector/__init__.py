@@ -0,0 +1,10 @@
+from .vector_helper import (
+    upsert_chunks,
+    point_id,
+    delete_points,
+    set_chunk_payloads,
+    embed_queries,
+    search_batch,
+)
+from .compaction_helper import compact_collection
+from .sync_helper import sync_collection, sync_collections
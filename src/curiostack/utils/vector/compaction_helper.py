@@ -0,0 +1,247 @@
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+from qdrant_client.http import models
+
+from .vector_helper import CONTENT_KEY, METADATA_KEY, point_id
+from ...config import client, get_db_path
+from ...logger import get_logger
+from ...metrics import inc, timer
+
+logger = get_logger(__name__, debug=False)
+
+# Why a point is removed, in the order the checks are made
+REASONS = ("orphaned", "expired", "superseded", "duplicate", "legacy")
+
+# Vacuum settings applied by an optimized compaction; Qdrant's defaults
+# (0.2 and 1000) leave small or lightly pruned segments unvacuumed
+VACUUM_DELETED_THRESHOLD = 0.05
+VACUUM_MIN_VECTORS = 100
+
+
+def _load_documents(niche):
+    """Documents with their chunk hashes, and the ids left in the urls table.
+
+    Returns:
+        _tuple_: doc_id -> document, and the set of url ids (None when the
+        niche has no urls table)
+    """
+    db_path = get_db_path(niche)
+    with sqlite3.connect(db_path) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        url_ids = None
+        if "urls" in tables:
+            url_ids = {row[0] for row in conn.execute("SELECT id FROM urls")}
+        if "documents" not in tables:
+            return {}, url_ids
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+        hashes = "chunk_hashes" if "chunk_hashes" in columns else "NULL"
+        rows = conn.execute(
+            f"SELECT id, metadata, updated_at, {hashes} FROM documents"
+        ).fetchall()
+
+    documents = {}
+    for doc_id, metadata, updated_at, chunk_hashes in rows:
+        documents[doc_id] = {
+            "metadata": json.loads(metadata or "{}"),
+            "updated_at": updated_at,
+            "chunk_hashes": json.loads(chunk_hashes or "[]"),
+        }
+    return documents, url_ids
+
+
+def _is_expired(document, cutoff):
+    date = document["metadata"].get("published_date") or document["updated_at"]
+    try:
+        return datetime.fromisoformat(str(date)[:10]) < cutoff
+    except ValueError:
+        return False
+
+
+def compact_collection(
+    niche,
+    max_age_days=None,
+    dry_run=True,
+    include_legacy=False,
+    optimize=False,
+    batch_size=256,
+):
+    """Find and delete points that no longer earn their place.
+
+    The collection is scrolled once without vectors. A point is removed when
+    it is:
+
+    - orphaned: the urls row of its document is gone (only judged when the
+      niche has recorded documents)
+    - expired: its article is older than ``max_age_days``
+    - superseded: an old version of a chunk the refresh did not delete
+    - duplicate: the same text already stored for another point of the
+      same document
+    - legacy: stored before chunks pointed to a document (only with
+      ``include_legacy``; these points are still the only copy)
+
+    Args:
+        niche (_str_): Niche whose collection is compacted
+        max_age_days (float, optional): Expire articles older than this
+        dry_run (bool): Only report what would be deleted
+        include_legacy (bool): Also delete points without a doc_id
+        optimize (bool): After deleting, lower the collection's vacuum
+            thresholds so Qdrant rewrites the segments holding deleted points
+        batch_size (int): Points per scroll page and per delete request
+
+    Returns:
+        _dict_: Points scanned, points to delete per reason and the bytes
+        that deleting them frees (vectors plus payload, estimated)
+    """
+    documents, url_ids = _load_documents(niche)
+    # Without the documents table (a niche not re-extracted since chunks
+    # got a doc_id) every point would look orphaned; judge none of them
+    document_rules = bool(documents) and url_ids is not None
+    if not document_rules:
+        logger.warning(
+            f"No documents recorded for {niche}: skipping the orphaned and "
+            "expired rules"
+        )
+    cutoff = None
+    if max_age_days is not None:
+        cutoff = datetime.now() - timedelta(days=max_age_days)
+    expired_docs = {
+        doc_id
+        for doc_id, doc in documents.items()
+        if document_rules and cutoff is not None and _is_expired(doc, cutoff)
+    }
+    current_ids = {
+        doc_id: {point_id(doc_id, chunk_hash) for chunk_hash in doc["chunk_hashes"]}
+        for doc_id, doc in documents.items()
+    }
+
+    vectors = client.get_collection(niche).config.params.vectors
+    vector_bytes = getattr(vectors, "size", 0) * 4
+
+    report = {
+        "collection": niche,
+        "dry_run": dry_run,
+        "scanned": 0,
+        "delete": {reason: 0 for reason in REASONS},
+        "reclaim_bytes": 0,
+    }
+    to_delete = []
+    # Whole documents go through one filtered delete instead of id lists
+    doc_deletes = {"orphaned": set(), "expired": set()}
+    seen_texts = set()
+    offset = None
+
+    with timer("compaction_scan_seconds", collection=niche):
+        while True:
+            points, offset = client.scroll(
+                collection_name=niche,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            for point in points:
+                report["scanned"] += 1
+                payload = point.payload or {}
+                meta = payload.get(METADATA_KEY) or {}
+                doc_id = meta.get("doc_id")
+                text = payload.get(CONTENT_KEY) or ""
+                text_hash = hashlib.sha1(text.encode("utf-8")).digest()
+
+                if doc_id is None:
+                    reason = "legacy" if include_legacy else None
+                elif document_rules and doc_id not in url_ids:
+                    reason = "orphaned"
+                elif doc_id in expired_docs:
+                    reason = "expired"
+                elif current_ids.get(doc_id) and (
+                    str(point.id) not in current_ids[doc_id]
+                ):
+                    reason = "superseded"
+                elif (doc_id, text_hash) in seen_texts:
+                    # Only within a document: a chunk shared by two articles
+                    # is listed in both of their chunk hashes
+                    reason = "duplicate"
+                else:
+                    reason = None
+
+                if reason is None:
+                    seen_texts.add((doc_id, text_hash))
+                    continue
+                report["delete"][reason] += 1
+                report["reclaim_bytes"] += vector_bytes + len(json.dumps(payload))
+                if reason in doc_deletes:
+                    doc_deletes[reason].add(doc_id)
+                    continue
+                to_delete.append(point.id)
+
+                if not dry_run and len(to_delete) >= batch_size:
+                    _delete(niche, to_delete)
+                    to_delete = []
+            if offset is None:
+                break
+
+    if not dry_run:
+        _delete(niche, to_delete)
+        doc_ids = sorted(doc_deletes["orphaned"] | doc_deletes["expired"])
+        for start in range(0, len(doc_ids), batch_size):
+            _delete_documents(niche, doc_ids[start : start + batch_size])
+        _forget_documents(niche, sorted(doc_deletes["expired"]))
+        if optimize:
+            # A changed optimizer config wakes the optimizers, which now
+            # vacuum any segment with a few percent of its points deleted
+            client.update_collection(
+                collection_name=niche,
+                optimizers_config=models.OptimizersConfigDiff(
+                    deleted_threshold=VACUUM_DELETED_THRESHOLD,
+                    vacuum_min_vector_number=VACUUM_MIN_VECTORS,
+                ),
+            )
+            report["optimized"] = True
+
+    total = sum(report["delete"].values())
+    verb = "Would delete" if dry_run else "Deleted"
+    logger.info(
+        f"{verb} {total}/{report['scanned']} points from {niche}: {report['delete']}"
+    )
+    return report
+
+
+def _delete_documents(collection_name, doc_ids):
+    selector = models.FilterSelector(
+        filter=models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=f"{METADATA_KEY}.doc_id", match=models.MatchAny(any=doc_ids)
+                )
+            ]
+        )
+    )
+    with timer("qdrant_delete_seconds", collection=collection_name):
+        client.delete(collection_name=collection_name, points_selector=selector)
+    inc("compaction_documents_deleted_total", len(doc_ids), collection=collection_name)
+
+
+def _forget_documents(niche, doc_ids):
+    # Expired articles leave the documents table so refresh stops checking them
+    if not doc_ids:
+        return
+    with sqlite3.connect(get_db_path(niche)) as conn:
+        conn.execute(
+            f"DELETE FROM documents WHERE id IN ({','.join('?' for _ in doc_ids)})",
+            doc_ids,
+        )
+        conn.commit()
+
+
+def _delete(collection_name, ids):
+    if not ids:
+        return
+    with timer("qdrant_delete_seconds", collection=collection_name):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=list(ids)),
+        )
+    inc("compaction_points_deleted_total", len(ids), collection=collection_name)
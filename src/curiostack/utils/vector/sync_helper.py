@@ -0,0 +1,125 @@
+from qdrant_client.http import models
+
+from ...logger import get_logger
+from ...metrics import inc, timer
+
+logger = get_logger(__name__, debug=False)
+
+
+def sync_collection(
+    source, target, collection_name, batch_size=256, prune=False, confirm=None
+):
+    """Copy one collection between two Qdrant instances.
+
+    Points keep their ids, so the copy is an upsert and can be repeated:
+    only a first sync writes everything. The collection is created on the
+    target with the source's vector settings when it is missing.
+
+    Args:
+        source (QdrantClient): Client to copy from, e.g. the local store
+        target (QdrantClient): Client to copy to, e.g. the remote cluster
+        collection_name (_str_): Collection, one per niche
+        batch_size (int, optional): Points per scroll and upsert
+        prune (bool, optional): Delete target points missing on the source,
+            so the target mirrors the source
+        confirm (callable, optional): ``(collection_name, count) -> bool``,
+            asked before pruning ``count`` points; prunes without asking
+            when None
+
+    Returns:
+        _dict_: Points copied and pruned
+    """
+    vectors = source.get_collection(collection_name).config.params.vectors
+    if not target.collection_exists(collection_name):
+        target.create_collection(
+            collection_name=collection_name, vectors_config=vectors
+        )
+
+    report = {"collection": collection_name, "copied": 0, "pruned": 0}
+    seen = set()
+    offset = None
+    with timer("qdrant_sync_seconds", collection=collection_name):
+        while True:
+            points, offset = source.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                target.upsert(
+                    collection_name=collection_name,
+                    points=[
+                        models.PointStruct(
+                            id=point.id, vector=point.vector, payload=point.payload
+                        )
+                        for point in points
+                    ],
+                )
+                seen.update(str(point.id) for point in points)
+                report["copied"] += len(points)
+            if offset is None:
+                break
+
+        if prune:
+            stale = _stale(target, collection_name, seen, batch_size)
+            if stale and (confirm is None or confirm(collection_name, len(stale))):
+                _delete(target, collection_name, stale, batch_size)
+                report["pruned"] = len(stale)
+
+    inc("qdrant_sync_points_total", report["copied"], collection=collection_name)
+    logger.info(
+        f"Synced {collection_name}: {report['copied']} points copied, "
+        f"{report['pruned']} pruned"
+    )
+    return report
+
+
+def _stale(target, collection_name, keep, batch_size):
+    # Ids are collected first; deleting while scrolling would move the offset
+    stale = []
+    offset = None
+    while True:
+        points, offset = target.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        stale.extend(point.id for point in points if str(point.id) not in keep)
+        if offset is None:
+            break
+    return stale
+
+
+def _delete(target, collection_name, ids, batch_size):
+    for start in range(0, len(ids), batch_size):
+        target.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=ids[start : start + batch_size]),
+        )
+
+
+def sync_collections(
+    source, target, collections=None, batch_size=256, prune=False, confirm=None
+):
+    """Copy niche collections between two Qdrant instances, see
+    sync_collection().
+
+    Args:
+        collections (_list_, optional): Collections to copy; all collections
+            of the source by default
+
+    Returns:
+        _list_: One report per collection
+    """
+    if collections is None:
+        collections = [c.name for c in source.get_collections().collections]
+    return [
+        sync_collection(
+            source, target, name, batch_size=batch_size, prune=prune, confirm=confirm
+        )
+        for name in collections
+    ]
@@ -0,0 +1,219 @@
+import inspect
+import uuid
+import numpy as np
+from qdrant_client.http import models
+from qdrant_client.http.models import PointStruct
+from ...config import embeddings, client
+from ...metrics import inc, timer
+
+# Payload keys used by langchain_qdrant, so QdrantVectorStore can read our points
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+
+
+def point_id(doc_id, chunk_hash):
+    """Stable Qdrant id of a chunk: the same text in the same document
+    always maps to the same point, so unchanged chunks are never rewritten.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc_id}:{chunk_hash}"))
+
+
+def upsert_chunks(collection_name, texts, metadatas, batch_size=64, ids=None):
+    """Embed text chunks and upsert them into a Qdrant collection.
+
+    Embedding and upserting are done per batch and timed separately.
+
+    Args:
+        collection_name (_str_): Qdrant collection, one per niche
+        texts (_list_): Chunk texts
+        metadatas (_list_): One metadata dict per chunk
+        batch_size (int, optional): Chunks per embedding request. Defaults to 64.
+        ids (_list_, optional): Point ids, see point_id(). Random if not given.
+
+    Returns:
+        _int_: Number of points written
+    """
+    written = 0
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start : start + batch_size]
+        batch_meta = metadatas[start : start + batch_size]
+        if ids is None:
+            batch_ids = [str(uuid.uuid4()) for _ in batch]
+        else:
+            batch_ids = ids[start : start + batch_size]
+
+        with timer("embedding_batch_seconds", collection=collection_name):
+            vectors = embeddings.embed_documents(batch)
+        inc("api_calls_total", api="embeddings")
+        inc("embedded_texts_total", len(batch), collection=collection_name)
+
+        points = [
+            PointStruct(
+                id=id_,
+                vector=vector,
+                payload={CONTENT_KEY: text, METADATA_KEY: meta},
+            )
+            for id_, text, vector, meta in zip(batch_ids, batch, vectors, batch_meta)
+        ]
+        with timer("qdrant_upsert_seconds", collection=collection_name):
+            client.upsert(collection_name=collection_name, points=points)
+        inc("qdrant_points_upserted_total", len(points), collection=collection_name)
+        written += len(points)
+
+    return written
+
+
+def delete_points(collection_name, ids=None, doc_id=None):
+    """Delete chunks by point id, or every chunk of a document.
+
+    Args:
+        collection_name (_str_): Qdrant collection, one per niche
+        ids (_list_, optional): Point ids to delete
+        doc_id (_int_, optional): Delete all points of this document instead
+    """
+    if doc_id is not None:
+        selector = models.FilterSelector(
+            filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key=f"{METADATA_KEY}.doc_id",
+                        match=models.MatchValue(value=doc_id),
+                    )
+                ]
+            )
+        )
+    elif ids:
+        selector = models.PointIdsList(points=list(ids))
+    else:
+        return
+    with timer("qdrant_delete_seconds", collection=collection_name):
+        client.delete(collection_name=collection_name, points_selector=selector)
+    inc("qdrant_delete_calls_total", collection=collection_name)
+
+
+def set_chunk_payloads(collection_name, payloads):
+    """Rewrite the metadata of existing points without re-embedding them.
+
+    Args:
+        collection_name (_str_): Qdrant collection, one per niche
+        payloads (_dict_): point id -> new metadata dict
+    """
+    if not payloads:
+        return
+    operations = [
+        models.SetPayloadOperation(
+            set_payload=models.SetPayload(payload={METADATA_KEY: meta}, points=[id_])
+        )
+        for id_, meta in payloads.items()
+    ]
+    with timer("qdrant_upsert_seconds", collection=collection_name):
+        client.batch_update_points(
+            collection_name=collection_name, update_operations=operations
+        )
+
+
+def embedding_name():
+    """Name of the configured embedding model, for keying cached vectors."""
+    for attr in ("model", "model_name"):
+        name = getattr(embeddings, attr, None)
+        if isinstance(name, str):
+            return name
+    return type(embeddings).__name__
+
+
+def embed_queries(texts, batch_size=100):
+    """Embed search queries in as few requests as possible.
+
+    Args:
+        texts (_list_): Query texts, e.g. the titles the writer covers
+        batch_size (int, optional): Texts per embedding request
+
+    Returns:
+        _list_: One vector per text, in order
+    """
+    # Gemini embeds queries with their own task type when asked to
+    params = inspect.signature(embeddings.embed_documents).parameters
+    kwargs = {"task_type": "retrieval_query"} if "task_type" in params else {}
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        with timer("embedding_batch_seconds", collection="queries"):
+            vectors.extend(
+                embeddings.embed_documents(texts[start : start + batch_size], **kwargs)
+            )
+        inc("api_calls_total", api="embeddings")
+    return vectors
+
+
+def _normalized(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _mmr(query, points, k, lambda_mult):
+    # Maximal marginal relevance over the fetched candidates. Rows are
+    # normalized once, so all cosines come from two matrix products.
+    if not points:
+        return []
+    candidates = _normalized([point.vector for point in points])
+    relevance = candidates @ _normalized([query])[0]
+    similarity = candidates @ candidates.T
+    # Highest similarity of each candidate to the chosen ones
+    redundancy = np.zeros(len(points), dtype=np.float32)
+    chosen = []
+    for _ in range(min(k, len(points))):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[chosen] = -np.inf
+        best = int(np.argmax(scores))
+        redundancy = (
+            np.maximum(redundancy, similarity[best]) if chosen else similarity[best]
+        )
+        chosen.append(best)
+    return [points[i] for i in chosen]
+
+
+def search_batch(
+    collection_name, vectors, k=6, fetch_k=32, lambda_mult=0.7, batch_size=32
+):
+    """MMR search for many precomputed query vectors in few round trips.
+
+    Candidates for up to ``batch_size`` queries are fetched by one batch
+    query; the MMR re-ranking runs locally on their vectors.
+
+    Args:
+        collection_name (_str_): Qdrant collection, one per niche
+        vectors (_list_): Query vectors, see embed_queries()
+        k (int, optional): Chunks returned per query
+        fetch_k (int, optional): Candidates fetched per query for MMR
+        lambda_mult (float, optional): 1 is pure relevance, 0 pure diversity
+        batch_size (int, optional): Queries per batch request
+
+    Returns:
+        _list_: Per query, a list of ``(text, metadata)`` tuples
+    """
+    results = []
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start : start + batch_size]
+        requests = [
+            models.QueryRequest(
+                query=vector, limit=fetch_k, with_payload=True, with_vector=True
+            )
+            for vector in batch
+        ]
+        with timer("qdrant_search_seconds", collection=collection_name):
+            responses = client.query_batch_points(
+                collection_name=collection_name, requests=requests
+            )
+        inc("qdrant_search_calls_total", collection=collection_name)
+        for vector, response in zip(batch, responses):
+            points = [point for point in response.points if point.vector]
+            results.append(
+                [
+                    (
+                        (point.payload or {}).get(CONTENT_KEY, ""),
+                        (point.payload or {}).get(METADATA_KEY) or {},
+                    )
+                    for point in _mmr(vector, points, k, lambda_mult)
+                ]
+            )
+    return results
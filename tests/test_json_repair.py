@@ -0,0 +1,64 @@
+import pytest
+
+json_repair = pytest.importorskip("curiostack.utils.content.json_repair_helper")
+repair_json = json_repair.repair_json
+
+
+def test_valid_json_is_returned_as_is():
+    assert repair_json('{"title": "A", "tags": ["x", "y"]}') == {
+        "title": "A",
+        "tags": ["x", "y"],
+    }
+
+
+def test_code_fences_and_surrounding_prose_are_dropped():
+    text = 'Here is the post:\n```json\n{"title": "A"}\n```\nHope this helps!'
+
+    assert repair_json(text) == {"title": "A"}
+
+
+def test_trailing_commas_are_removed():
+    assert repair_json('{"tags": ["x", "y",], "featured": false,}') == {
+        "tags": ["x", "y"],
+        "featured": False,
+    }
+
+
+def test_raw_newlines_inside_strings_are_kept():
+    assert repair_json('{"content": "## Intro\nBody"}') == {"content": "## Intro\nBody"}
+
+
+def test_output_cut_off_mid_string_is_closed():
+    assert repair_json('{"title": "A", "content": "Half a sen') == {
+        "title": "A",
+        "content": "Half a sen",
+    }
+
+
+def test_output_cut_off_inside_nested_values_is_closed():
+    assert repair_json('{"title": "A", "tags": ["x", "y"') == {
+        "title": "A",
+        "tags": ["x", "y"],
+    }
+
+
+@pytest.mark.parametrize(
+    "text",
+    ['{"title": "A",', '{"title": "A", "excerpt"', '{"title": "A", "excerpt":'],
+)
+def test_a_dangling_key_or_comma_is_dropped(text):
+    assert repair_json(text) == {"title": "A"}
+
+
+def test_a_cut_off_escape_is_dropped():
+    assert repair_json('{"title": "say \\') == {"title": "say "}
+
+
+def test_the_last_complete_object_wins_over_trailing_garbage():
+    assert repair_json('{"title": "A"} and then {"broken') == {"title": "A"}
+
+
+@pytest.mark.parametrize("text", [None, "", "no json here", "[1, 2, 3]"])
+def test_unrecoverable_output_raises(text):
+    with pytest.raises(ValueError):
+        repair_json(text)
@@ -0,0 +1,112 @@
+import pytest
+
+ledger_module = pytest.importorskip("curiostack.jobs.ledger")
+
+RunLedger = ledger_module.RunLedger
+_settle = ledger_module._settle
+
+UNITS = [("crawl", "ai_ml"), ("extract", "ai_ml"), ("write", "ai_ml")]
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return RunLedger(str(tmp_path / "jobs.db"))
+
+
+def run_unit(ledger, run_id, stage, niche, outcomes):
+    with ledger.unit(run_id, stage, niche) as counts:
+        counts.update(outcomes)
+
+
+def test_settle():
+    assert _settle({}) == ("completed", None)
+    assert _settle({"success": 4, "skipped": 1}) == ("completed", None)
+    assert _settle({"success": 3, "failed": 1}) == (
+        "partial",
+        "1 failed of 4 item(s)",
+    )
+    assert _settle({"success": 2, "postponed": 2}) == (
+        "partial",
+        "2 postponed of 4 item(s)",
+    )
+    assert _settle({"success": 1, "failed": 1, "postponed": 2}) == (
+        "partial",
+        "1 failed and 2 postponed of 4 item(s)",
+    )
+
+
+def test_start_run_records_pending_units(ledger):
+    run_id = ledger.start_run("pipeline", UNITS)
+
+    assert ledger.pending_units(run_id) == UNITS
+    units = ledger.units(run_id)
+    assert [(u["stage"], u["niche"], u["status"]) for u in units] == [
+        (stage, niche, "pending") for stage, niche in UNITS
+    ]
+    assert ledger.history()[0]["status"] == "running"
+
+
+def test_completed_units_settle_the_run(ledger):
+    run_id = ledger.start_run("pipeline", UNITS)
+
+    for stage, niche in UNITS:
+        run_unit(ledger, run_id, stage, niche, {"success": 2})
+
+    assert ledger.pending_units(run_id) == []
+    run = ledger.history("pipeline")[0]
+    assert run["status"] == "completed"
+    assert run["completed"] == len(UNITS)
+    assert [u["stage"] for u in ledger.unit_history("extract")] == ["extract"]
+
+
+def test_postponed_items_make_a_unit_partial_and_the_run_resumable(ledger):
+    run_id = ledger.start_run("pipeline", UNITS)
+    run_unit(ledger, run_id, "crawl", "ai_ml", {"success": 5})
+    run_unit(ledger, run_id, "extract", "ai_ml", {"success": 3, "postponed": 1})
+    run_unit(ledger, run_id, "write", "ai_ml", {"written": 2})
+
+    extract = ledger.units(run_id)[1]
+    assert extract["status"] == "partial"
+    assert extract["error"] == "1 postponed of 4 item(s)"
+    # Every unit ended, but not all completed
+    assert ledger.history("pipeline")[0]["status"] == "failed"
+
+    assert ledger.start_run("pipeline", UNITS) == run_id
+    assert ledger.pending_units(run_id) == [("extract", "ai_ml")]
+    run = ledger.history("pipeline")[0]
+    assert run["status"] == "running"
+    assert run["resumes"] == 1
+
+    run_unit(ledger, run_id, "extract", "ai_ml", {"success": 1})
+    assert ledger.history("pipeline")[0]["status"] == "completed"
+
+
+def test_failed_unit_records_the_error(ledger):
+    run_id = ledger.start_run("pipeline", UNITS[:1])
+
+    with pytest.raises(RuntimeError):
+        with ledger.unit(run_id, "crawl", "ai_ml"):
+            raise RuntimeError("feed unreachable")
+
+    unit = ledger.units(run_id)[0]
+    assert unit["status"] == "failed"
+    assert unit["error"] == "feed unreachable"
+    assert ledger.pending_units(run_id) == UNITS[:1]
+
+
+def test_resume_needs_the_same_units(ledger):
+    run_id = ledger.start_run("pipeline", UNITS)
+
+    assert ledger.start_run("pipeline", UNITS[:2]) != run_id
+    assert ledger.start_run("pipeline", UNITS, resume=False) != run_id
+
+
+def test_fail_run_closes_a_stopped_run(ledger):
+    run_id = ledger.start_run("pipeline", UNITS)
+    run_unit(ledger, run_id, "crawl", "ai_ml", {"success": 1})
+
+    ledger.fail_run(run_id)
+
+    assert ledger.history("pipeline")[0]["status"] == "failed"
+    assert ledger.start_run("pipeline", UNITS) == run_id
+    assert ledger.pending_units(run_id) == UNITS[1:]
@@ -0,0 +1,101 @@
+import pytest
+
+pytest.importorskip("lxml")
+listing_helper = pytest.importorskip("curiostack.utils.crawler.listing_helper")
+listing_links = listing_helper.listing_links
+compact_listing = listing_helper.compact_listing
+
+BASE = "https://blog.example.com/news/"
+
+PAGE = """
+<html><body>
+  <header><a href="/about-the-company-and-team">About the company and team</a></header>
+  <nav><a href="/category/machine-learning">Machine learning articles</a></nav>
+  <main>
+    <article>
+      <a href="/2024/05/new-model-released">A new model was released today</a>
+      <time datetime="2024-05-02T10:00:00Z">May 2</time>
+    </article>
+    <article>
+      <a href="2024/05/benchmarks#comments">Benchmarks that actually matter</a>
+      <span>Published May 3, 2024</span>
+    </article>
+    <article>
+      <a href="https://blog.example.com/2024/05/new-model-released">
+        A new model was released today
+      </a>
+    </article>
+    <a href="/2024/05/short">Read more</a>
+    <a href="/files/whitepaper-on-models.pdf">Download the whitepaper PDF</a>
+    <a href="mailto:editor@example.com">Write to the editor of the blog</a>
+    <a href="#top">Back to the top of this page</a>
+    <a href="/">Home page of the example blog</a>
+    <a href="https://blog.example.com/news">This very listing page again</a>
+    <a href="/2024/05/gallery"><img src="x.png" alt="Photos from the launch event"></a>
+  </main>
+  <footer><a href="/privacy-policy-and-terms">Privacy policy and terms</a></footer>
+</body></html>
+"""
+
+
+def test_article_links_are_kept_in_page_order():
+    links = listing_links(PAGE, BASE)
+
+    assert [link.url for link in links] == [
+        "https://blog.example.com/2024/05/new-model-released",
+        "https://blog.example.com/news/2024/05/benchmarks",
+        "https://blog.example.com/2024/05/gallery",
+    ]
+    assert links[0].text == "A new model was released today"
+
+
+def test_dates_are_taken_from_the_card_around_the_link():
+    links = {link.url: link for link in listing_links(PAGE, BASE)}
+
+    new_model = links["https://blog.example.com/2024/05/new-model-released"]
+    benchmarks = links["https://blog.example.com/news/2024/05/benchmarks"]
+    assert new_model.date == "2024-05-02T10:00:00Z"
+    assert benchmarks.date == "May 3, 2024"
+
+
+def test_image_alt_text_stands_in_for_missing_anchor_text():
+    links = {link.url: link for link in listing_links(PAGE, BASE)}
+
+    assert (
+        links["https://blog.example.com/2024/05/gallery"].text
+        == "Photos from the launch event"
+    )
+
+
+def test_known_and_rejected_links_are_left_out():
+    known = {"https://blog.example.com/2024/05/new-model-released"}
+    rejected = {"https://blog.example.com/2024/05/gallery"}
+
+    links = listing_links(PAGE, BASE, known=known, rejected=rejected)
+
+    assert [link.url for link in links] == [
+        "https://blog.example.com/news/2024/05/benchmarks"
+    ]
+
+
+def test_max_links_caps_the_result():
+    assert len(listing_links(PAGE, BASE, max_links=2)) == 2
+
+
+@pytest.mark.parametrize("page_html", [None, "", "   "])
+def test_empty_pages_have_no_links(page_html):
+    assert listing_links(page_html, BASE) == []
+
+
+def test_compact_listing_is_one_markdown_line_per_link():
+    links = listing_links(PAGE, BASE, max_links=2)
+
+    assert compact_listing(BASE, links).splitlines() == [
+        f"Source page: {BASE}",
+        "",
+        "- [A new model was released today]"
+        "(https://blog.example.com/2024/05/new-model-released) "
+        "(2024-05-02T10:00:00Z)",
+        "- [Benchmarks that actually matter]"
+        "(https://blog.example.com/news/2024/05/benchmarks) (May 3, 2024)",
+    ]
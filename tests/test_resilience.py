@@ -0,0 +1,225 @@
+import asyncio
+
+import pytest
+
+resilience = pytest.importorskip("curiostack.resilience")
+CircuitBreaker = resilience.CircuitBreaker
+CircuitOpen = resilience.CircuitOpen
+RetryBudget = resilience.RetryBudget
+
+
+class FakeClock:
+    """Stands in for the ``time`` module: sleeping moves the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock, request):
+    # Breakers and budgets are process-wide by name; one per test
+    return CircuitBreaker(
+        f"test:{request.node.name}", failure_threshold=3, reset_timeout=10.0
+    )
+
+
+def test_transient_errors_are_told_apart():
+    assert resilience.is_transient(TimeoutError())
+    assert resilience.is_transient(RuntimeError("429 Too Many Requests"))
+    assert resilience.is_transient("net::ERR_CONNECTION_RESET")
+    assert not resilience.is_transient(ValueError("404 Not Found"))
+    assert not resilience.is_transient(CircuitOpen("x", 5))
+    assert not resilience.is_transient(None)
+
+
+def test_circuit_opens_after_the_failure_threshold(breaker):
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.state == "closed"
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_in() == 10.0
+
+
+def test_a_success_resets_the_failure_count(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_non_transient_errors_do_not_open_the_circuit(breaker):
+    for _ in range(5):
+        breaker.record_error(ValueError("bad request"))
+
+    assert breaker.state == "closed"
+
+
+def test_check_raises_while_open(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 4
+
+    with pytest.raises(CircuitOpen) as raised:
+        breaker.check()
+    assert raised.value.retry_in == pytest.approx(6.0)
+
+
+def test_half_open_lets_one_probe_through(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 10
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_circuit(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 10
+    breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_for_twice_as_long(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 10
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert breaker.retry_in() == 20.0
+
+
+def test_open_time_is_capped(clock):
+    breaker = CircuitBreaker(
+        "test:capped", failure_threshold=1, reset_timeout=10, max_reset_timeout=25
+    )
+    breaker.record_failure()
+    for _ in range(3):
+        clock.now += breaker.retry_in()
+        breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.retry_in() == 25
+
+
+def test_retry_budget_allows_a_share_of_the_calls():
+    budget = RetryBudget(ratio=0.5, max_tokens=2)
+
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_retry_budget_saves_at_most_max_tokens():
+    budget = RetryBudget(ratio=1, max_tokens=2)
+    for _ in range(10):
+        budget.deposit()
+
+    assert [budget.withdraw() for _ in range(3)] == [True, True, False]
+
+
+def _flaky(errors, result="ok"):
+    calls = []
+
+    def func(*args, **kwargs):
+        calls.append((args, kwargs))
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return func, calls
+
+
+def test_call_with_retry_retries_transient_failures(breaker, clock):
+    func, calls = _flaky([TimeoutError(), ConnectionError()])
+
+    assert resilience.call_with_retry(func, 1, circuit=breaker, key="v") == "ok"
+    assert calls == [((1,), {"key": "v"})] * 3
+    assert len(clock.sleeps) == 2
+    assert breaker.failures == 0
+
+
+def test_call_with_retry_raises_non_transient_errors_at_once(breaker, clock):
+    func, calls = _flaky([ValueError("bad prompt")])
+
+    with pytest.raises(ValueError):
+        resilience.call_with_retry(func, circuit=breaker)
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_call_with_retry_gives_up_after_the_attempts(breaker, clock):
+    func, calls = _flaky([TimeoutError()] * 5)
+
+    with pytest.raises(TimeoutError):
+        resilience.call_with_retry(func, circuit=breaker, attempts=2)
+    assert len(calls) == 2
+
+
+def test_call_with_retry_stops_at_an_open_circuit(breaker, clock):
+    func, calls = _flaky([TimeoutError()] * 5)
+
+    with pytest.raises(TimeoutError):
+        resilience.call_with_retry(func, circuit=breaker, attempts=3)
+    with pytest.raises(CircuitOpen):
+        resilience.call_with_retry(func, circuit=breaker)
+    assert len(calls) == 3
+
+
+def test_backoff_is_jittered_below_the_cap():
+    delays = [resilience.backoff_delay(attempt, 1.0, 5.0) for attempt in range(10)]
+
+    assert all(0 <= delay <= 5.0 for delay in delays)
+
+
+def test_acall_with_retry_retries_transient_failures(breaker, monkeypatch):
+    sleeps = []
+
+    async def no_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", no_sleep)
+    attempts = []
+
+    async def func():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise RuntimeError("503 Service Unavailable")
+        return "ok"
+
+    result = asyncio.run(resilience.acall_with_retry(func, circuit=breaker))
+
+    assert result == "ok"
+    assert len(attempts) == 2
+    assert len(sleeps) == 1
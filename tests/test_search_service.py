@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("qdrant_client")
+pytest_asyncio = pytest.importorskip("pytest_asyncio")
+service_module = pytest.importorskip("curiostack.search.service")
+
+from qdrant_client import AsyncQdrantClient, models  # noqa: E402
+
+from curiostack.utils.vector.vector_helper import (  # noqa: E402
+    CONTENT_KEY,
+    METADATA_KEY,
+)
+
+SearchService = service_module.SearchService
+pytestmark = pytest.mark.asyncio
+
+# Query words and chunk texts map to fixed 3-d vectors
+VECTORS = {
+    "transformers": [1.0, 0.0, 0.0],
+    "robots": [0.0, 1.0, 0.0],
+    "compilers": [0.0, 0.0, 1.0],
+}
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    async def aembed_query(self, text):
+        self.calls.append(text)
+        await asyncio.sleep(0.01)
+        return VECTORS[text.split()[0]]
+
+
+def fake_documents(niche, doc_ids):
+    return {doc_id: {"title": f"Doc {doc_id}", "niche": niche} for doc_id in doc_ids}
+
+
+def _point(point_id, doc_id, position, vector, text):
+    return models.PointStruct(
+        id=point_id,
+        vector=vector,
+        payload={
+            CONTENT_KEY: text,
+            METADATA_KEY: {"doc_id": doc_id, "position": position, "section": None},
+        },
+    )
+
+
+@pytest_asyncio.fixture
+async def service():
+    client = AsyncQdrantClient(":memory:")
+    for niche in ("ai_ml", "devtools"):
+        await client.create_collection(
+            niche,
+            vectors_config=models.VectorParams(
+                size=3, distance=models.Distance.COSINE
+            ),
+        )
+    await client.upsert(
+        "ai_ml",
+        points=[
+            _point(1, 10, 0, [0.9, 0.1, 0.0], "attention is all you need"),
+            _point(2, 10, 1, [0.8, 0.2, 0.0], "scaling transformers"),
+            _point(3, 10, 2, [0.7, 0.3, 0.0], "positional encodings"),
+            _point(4, 10, 3, [0.6, 0.4, 0.0], "layer norms"),
+            _point(5, 11, 0, [0.1, 0.9, 0.0], "warehouse robots"),
+        ],
+    )
+    await client.upsert(
+        "devtools",
+        points=[_point(6, 20, 0, [0.5, 0.0, 0.5], "compiling transformers")],
+    )
+    embeddings = FakeEmbeddings()
+    service = SearchService(
+        client=client,
+        embeddings=embeddings,
+        documents=fake_documents,
+        chunks_per_document=2,
+    )
+    yield service
+    await service.close()
+
+
+async def test_results_are_documents_ranked_by_their_best_chunk(service):
+    response = await service.search("transformers", k=5)
+
+    assert response["niches"] == ["ai_ml", "devtools"]
+    assert response["errors"] == {}
+    assert [doc["doc_id"] for doc in response["results"]] == [10, 20, 11]
+    best = response["results"][0]
+    assert best["niche"] == "ai_ml"
+    assert best["metadata"] == {"title": "Doc 10", "niche": "ai_ml"}
+    # Chunks come best first, capped per document
+    assert [chunk["position"] for chunk in best["chunks"]] == [0, 1]
+    assert best["score"] == best["chunks"][0]["score"]
+
+
+async def test_k_limits_the_documents_returned(service):
+    response = await service.search("transformers", k=1)
+
+    assert [doc["doc_id"] for doc in response["results"]] == [10]
+
+
+async def test_search_can_be_limited_to_some_niches(service):
+    response = await service.search("transformers", niches=["devtools"])
+
+    assert response["niches"] == ["devtools"]
+    assert [doc["doc_id"] for doc in response["results"]] == [20]
+
+
+async def test_repeated_query_is_served_from_the_cache(service):
+    first = await service.search("transformers")
+    second = await service.search("  Transformers ")
+
+    assert not first["cached"]
+    assert second["cached"]
+    assert second["query"] == "  Transformers "
+    assert second["results"] == first["results"]
+    assert service.embeddings.calls == ["transformers"]
+
+
+async def test_responses_with_a_failed_niche_are_not_cached(service, monkeypatch):
+    search_niche = service._search_niche
+    failing = ["devtools"]
+
+    async def flaky(niche, vector, k):
+        if niche in failing:
+            failing.remove(niche)
+            raise RuntimeError("collection unavailable")
+        return await search_niche(niche, vector, k)
+
+    monkeypatch.setattr(service, "_search_niche", flaky)
+
+    first = await service.search("transformers")
+    second = await service.search("transformers")
+    third = await service.search("transformers")
+
+    assert first["errors"] == {"devtools": "collection unavailable"}
+    assert [doc["doc_id"] for doc in first["results"]] == [10, 11]
+    assert not second["cached"]
+    assert second["errors"] == {}
+    assert [doc["doc_id"] for doc in second["results"]] == [10, 20, 11]
+    assert third["cached"]
+    # The query vector is cached either way
+    assert service.embeddings.calls == ["transformers"]
+
+
+async def test_concurrent_misses_share_one_embedding_call(service):
+    responses = await asyncio.gather(
+        *(service.search("robots", k=1) for _ in range(5))
+    )
+
+    assert service.embeddings.calls == ["robots"]
+    assert all(r["results"][0]["doc_id"] == 11 for r in responses)
+
+
+async def test_query_vectors_are_reused_across_niche_selections(service):
+    await service.search("compilers", niches=["ai_ml"])
+    await service.search("compilers", niches=["devtools"])
+
+    assert service.embeddings.calls == ["compilers"]
+
+
+@pytest.mark.parametrize("query", ["", "   "])
+async def test_empty_query_is_rejected(service, query):
+    with pytest.raises(ValueError):
+        await service.search(query)
+
+
+async def test_unknown_niche_is_rejected(service):
+    with pytest.raises(ValueError, match="nope"):
+        await service.search("transformers", niches=["nope"])
@@ -0,0 +1,79 @@
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+topic_helper = pytest.importorskip("curiostack.utils.content.topic_helper")
+cluster_topics = topic_helper.cluster_topics
+
+
+def at(degrees):
+    """Unit vector at an angle; cosine similarity is the cosine of the gap."""
+    radians = math.radians(degrees)
+    return [math.cos(radians), math.sin(radians)]
+
+
+def test_no_titles_gives_no_clusters():
+    assert cluster_topics([], []) == ([], {})
+
+
+def test_distinct_titles_lead_their_own_clusters():
+    clusters, covered = cluster_topics(["A", "B", "C"], [at(0), at(60), at(120)])
+
+    assert [c.title for c in clusters] == ["A", "B", "C"]
+    assert all(c.members == [] for c in clusters)
+    assert covered == {}
+
+
+def test_near_duplicates_join_the_first_similar_cluster():
+    titles = ["GPT-5 released", "Rust 2.0", "OpenAI ships GPT-5", "GPT-5 is out"]
+    vectors = [at(0), at(90), at(10), at(5)]
+
+    clusters, covered = cluster_topics(titles, vectors, threshold=0.9)
+
+    assert [c.title for c in clusters] == ["GPT-5 released", "Rust 2.0"]
+    assert clusters[0].members == ["OpenAI ships GPT-5", "GPT-5 is out"]
+    assert clusters[0].vector == at(0)
+    assert covered == {}
+
+
+def test_titles_are_compared_with_cluster_leaders_only():
+    # B is close to A and C is close to B, but C is not close to A
+    clusters, _ = cluster_topics(["A", "B", "C"], [at(0), at(17), at(34)], 0.9)
+
+    assert [(c.title, c.members) for c in clusters] == [("A", ["B"]), ("C", [])]
+
+
+def test_titles_covered_by_a_written_post_are_not_clustered():
+    clusters, covered = cluster_topics(
+        ["Old news again", "Fresh story"],
+        [at(3), at(90)],
+        written=["Old news"],
+        written_vectors=[at(0)],
+    )
+
+    assert [c.title for c in clusters] == ["Fresh story"]
+    assert covered == {"Old news again": "Old news"}
+
+
+def test_similarity_equal_to_the_threshold_counts_as_duplicate():
+    threshold = math.cos(math.radians(20))
+
+    clusters, _ = cluster_topics(["A", "B"], [at(0), at(20)], threshold=threshold)
+
+    assert [(c.title, c.members) for c in clusters] == [("A", ["B"])]
+
+
+def test_vector_length_does_not_matter():
+    clusters, _ = cluster_topics(["A", "B"], [[10.0, 0.0], [0.5, 0.01]])
+
+    assert [(c.title, c.members) for c in clusters] == [("A", ["B"])]
+
+
+def test_zero_vectors_do_not_match_anything():
+    clusters, covered = cluster_topics(
+        ["A", "B"], [[0.0, 0.0], [0.0, 0.0]], ["W"], [[1.0, 0.0]]
+    )
+
+    assert [c.title for c in clusters] == ["A", "B"]
+    assert covered == {}
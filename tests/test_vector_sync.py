@@ -0,0 +1,136 @@
+import pytest
+
+pytest.importorskip("qdrant_client")
+sync_module = pytest.importorskip("curiostack.utils.vector.sync_helper")
+
+from qdrant_client import QdrantClient, models  # noqa: E402
+
+sync_collection = sync_module.sync_collection
+sync_collections = sync_module.sync_collections
+
+COLLECTION = "ai_ml"
+
+
+def make_source(count=5):
+    source = QdrantClient(location=":memory:")
+    source.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(size=3, distance=models.Distance.COSINE),
+    )
+    source.upsert(
+        collection_name=COLLECTION,
+        points=[
+            models.PointStruct(
+                id=i, vector=[1.0, float(i), 0.5], payload={"doc_id": i}
+            )
+            for i in range(1, count + 1)
+        ],
+    )
+    return source
+
+
+def point_ids(client):
+    points, _ = client.scroll(collection_name=COLLECTION, limit=100)
+    return sorted(point.id for point in points)
+
+
+def test_sync_creates_and_copies_collection():
+    source, target = make_source(), QdrantClient(location=":memory:")
+
+    report = sync_collection(source, target, COLLECTION, batch_size=2)
+
+    assert report == {"collection": COLLECTION, "copied": 5, "pruned": 0}
+    assert point_ids(target) == [1, 2, 3, 4, 5]
+    params = target.get_collection(COLLECTION).config.params.vectors
+    assert params.size == 3
+    assert params.distance == models.Distance.COSINE
+    copied = target.retrieve(COLLECTION, ids=[3], with_payload=True)
+    assert copied[0].payload == {"doc_id": 3}
+
+
+def test_sync_again_is_idempotent():
+    source, target = make_source(), QdrantClient(location=":memory:")
+    sync_collection(source, target, COLLECTION)
+
+    report = sync_collection(source, target, COLLECTION)
+
+    assert report["copied"] == 5
+    assert target.count(COLLECTION).count == 5
+
+
+def test_prune_asks_before_deleting_stale_points():
+    source, target = make_source(), QdrantClient(location=":memory:")
+    sync_collection(source, target, COLLECTION)
+    source.delete(
+        collection_name=COLLECTION,
+        points_selector=models.PointIdsList(points=[2, 4]),
+    )
+    asked = []
+
+    def refuse(name, count):
+        asked.append((name, count))
+        return False
+
+    report = sync_collection(source, target, COLLECTION, prune=True, confirm=refuse)
+    assert asked == [(COLLECTION, 2)]
+    assert report["pruned"] == 0
+    assert point_ids(target) == [1, 2, 3, 4, 5]
+
+    report = sync_collection(
+        source, target, COLLECTION, prune=True, confirm=lambda name, count: True
+    )
+    assert report["pruned"] == 2
+    assert point_ids(target) == [1, 3, 5]
+
+
+def test_without_prune_target_keeps_extra_points():
+    source, target = make_source(), QdrantClient(location=":memory:")
+    sync_collection(source, target, COLLECTION)
+    source.delete(
+        collection_name=COLLECTION,
+        points_selector=models.PointIdsList(points=[1]),
+    )
+
+    sync_collection(source, target, COLLECTION)
+
+    assert point_ids(target) == [1, 2, 3, 4, 5]
+
+
+def test_sync_collections_defaults_to_every_source_collection():
+    source, target = make_source(), QdrantClient(location=":memory:")
+
+    reports = sync_collections(source, target)
+
+    assert [report["collection"] for report in reports] == [COLLECTION]
+    assert target.count(COLLECTION).count == 5
+
+
+def test_qdrant_client_modes():
+    config = pytest.importorskip("curiostack.config")
+
+    client = config.qdrant_client("memory")
+    assert isinstance(client, QdrantClient)
+    assert client.get_collections().collections == []
+    with pytest.raises(ValueError):
+        config.qdrant_client("cloud")
+
+
+def test_lazy_client_opens_on_first_use():
+    config = pytest.importorskip("curiostack.config")
+
+    lazy = config._LazyClient("memory")
+    assert lazy._client is None
+
+    lazy.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(size=3, distance=models.Distance.COSINE),
+    )
+    opened = lazy._client
+    assert opened is not None
+    # Later calls reuse the same embedded store
+    assert lazy.collection_exists(COLLECTION)
+    assert lazy._client is opened
+
+    target = QdrantClient(location=":memory:")
+    sync_collection(lazy, target, COLLECTION)
+    assert target.collection_exists(COLLECTION)